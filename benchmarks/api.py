@@ -0,0 +1,192 @@
+"""
+API benchmark for pmctl against an offline fake API server.
+
+For each scale (number of bindings) a fake API server (benchmarks/fakeapi.py)
+is started in its own process, preloaded with synthetic namespaces, users with token Secrets and
+RoleBindings/ClusterRoleBindings in pmctl's naming scheme. Each subcommand
+is then run as a pmctl process against it, and the wall time, the number of
+API requests, the bytes transferred and the peak RSS of the pmctl process
+are recorded.
+
+Usage:
+    python benchmarks/api.py [--scales 1000,10000,100000] [--runs 3] [--commands "user describe,report"]
+                             [--fault-rate 0.05] [--output results.json] [--baseline previous.json]
+                             [--tolerance 0.25]
+
+--fault-rate makes the fake API server fail that fraction of the requests
+(429, 500, resets, truncated bodies, expired continue tokens) to measure
+the cost of pmctl's retries.
+
+Exits with status 1 when, with --baseline, a median regresses by more than
+the tolerance.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from urllib.request import Request, urlopen
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+PMCTL_SCRIPT = os.path.join(BENCHMARKS_DIR, '..', 'source', 'pmctl.py')
+FAKE_API_SCRIPT = os.path.join(BENCHMARKS_DIR, 'fakeapi.py')
+MANAGER_NAMESPACE = 'pmctl'
+
+# Subcommands to measure; {run} is replaced by a per-run counter so that
+# mutating commands always act on fresh objects
+SUBCOMMANDS = {
+    'user list': ['user', 'list'],
+    'user describe': ['user', 'describe', 'user-000000'],
+    'user add': ['user', 'add', 'bench-{run}'],
+    'ns grant': ['ns', 'grant', 'bench-{run}', 'ns-00000', 'developer'],
+    'ns revoke': ['ns', 'revoke', 'user-000000', 'ns-00000', 'developer', '--yes'],
+    'ns print': ['ns', 'print', 'user-000000', 'ns-00000'],
+    'ns print request': ['ns', 'print', 'user-000000', 'ns-00000', '--token-mode', 'request'],
+    'cluster grant': ['cluster', 'grant', 'bench-{run}', 'read-only'],
+    'report': ['report'],
+    'migrate labels': ['migrate', 'labels', '--dry-run'],
+}
+
+METRICS = ('wall_ms', 'requests', 'bytes', 'peak_rss_kb')
+
+
+class FakeApiProcess:
+    """
+    The fake API server in its own process.
+
+    Keeping the preloaded objects out of this process matters: pmctl is
+    forked from here, and a child's peak RSS includes the memory it was
+    forked with.
+    """
+    def __init__(self, bindings, kubeconfig, latency=0.0, fault_rate=0.0):
+        self.process = subprocess.Popen(
+            [sys.executable, FAKE_API_SCRIPT, '--port', '0', '--bindings', str(bindings),
+             '--kubeconfig', kubeconfig, '--namespace', MANAGER_NAMESPACE, '--latency', str(latency),
+             '--fault-rate', str(fault_rate)],
+            stdout=subprocess.PIPE, text=True
+        )
+        info = json.loads(self.process.stdout.readline())
+        self.url = info['url']
+        self.dataset = info['dataset']
+
+    def reset_counters(self):
+        urlopen(Request(f"{self.url}/_bench/reset", data=b'', method='POST')).read()
+
+    def counters(self):
+        return json.loads(urlopen(f"{self.url}/_bench/counters").read())
+
+    def close(self):
+        self.process.terminate()
+        self.process.wait()
+
+
+def run_once(command, server, env):
+    """
+    Run pmctl once and return its metrics.
+    """
+    server.reset_counters()
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    stderr = process.stderr.read()
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = 0  # Reaped by wait4
+    wall_ms = (time.perf_counter() - started) * 1000
+    counters = server.counters()
+    return {
+        'wall_ms': wall_ms,
+        'requests': counters['requests'],
+        'bytes': counters['bytes_sent'] + counters['bytes_received'],
+        'peak_rss_kb': rusage.ru_maxrss,
+        'exit_status': os.waitstatus_to_exitcode(status),
+        'stderr': stderr.decode('utf-8', 'replace')[-500:],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='pmctl API benchmark against a fake API server')
+    parser.add_argument('--scales', default='1000,10000,100000',
+                        help='Comma-separated binding counts (default: 1000,10000,100000)')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per subcommand (default: 3)')
+    parser.add_argument('--commands', help=f"Comma-separated subcommands (default: all of {', '.join(SUBCOMMANDS)})")
+    parser.add_argument('--latency', type=float, default=0.0, help='Added latency per API request in seconds')
+    parser.add_argument('--fault-rate', type=float, default=0.0, help='Fraction of API requests that fail (default: 0)')
+    parser.add_argument('--output', help='Write the JSON results to this file')
+    parser.add_argument('--baseline', help='Previous results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative regression against the baseline (default: 0.25)')
+    args = parser.parse_args()
+
+    commands = [name.strip() for name in args.commands.split(',')] if args.commands else list(SUBCOMMANDS)
+    unknown = [name for name in commands if name not in SUBCOMMANDS]
+    if unknown:
+        parser.error(f"unknown subcommands: {', '.join(unknown)}")
+
+    results = {'runs': args.runs, 'python': sys.version.split()[0], 'scales': {}}
+    failures = []
+    run_counter = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in [int(value) for value in args.scales.split(',')]:
+            kubeconfig = os.path.join(directory, f'kubeconfig-{scale}')
+            server = FakeApiProcess(scale, kubeconfig, args.latency, args.fault_rate)
+            env = dict(os.environ)
+            env.pop('KUBERNETES_SERVICE_HOST', None)  # Force the kubeconfig code path
+            env.pop('PMCTL_CACHE_DIR', None)
+            env.update({
+                'KUBECONFIG': kubeconfig,
+                'PMCTL_NO_DAEMON': '1',
+                'PMCTL_NAMESPACE': MANAGER_NAMESPACE,
+            })
+
+            entries = {}
+            for name in commands:
+                samples = []
+                for _ in range(args.runs):
+                    run_counter += 1
+                    argv = [arg.replace('{run}', str(run_counter)) for arg in SUBCOMMANDS[name]]
+                    if name == 'ns revoke':
+                        # Recreate the binding so every run revokes something
+                        subprocess.run([sys.executable, PMCTL_SCRIPT, 'ns', 'grant', 'user-000000', 'ns-00000', 'developer'],
+                                       env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                    samples.append(run_once([sys.executable, PMCTL_SCRIPT] + argv, server, env))
+                entry = {metric: round(statistics.median(sample[metric] for sample in samples), 1) for metric in METRICS}
+                entry['peak_rss_kb'] = max(sample['peak_rss_kb'] for sample in samples)
+                failed = [sample for sample in samples if sample['exit_status'] != 0]
+                if failed:
+                    entry['errors'] = len(failed)
+                    failures.append(f"{scale} {name}: exit status {failed[0]['exit_status']}: {failed[0]['stderr'].strip()}")
+                entries[name] = entry
+                print(f"{scale:>7} {name:14} wall {entry['wall_ms']} ms, {entry['requests']} requests, "
+                      f"{entry['bytes']} bytes, peak RSS {entry['peak_rss_kb']} KiB", file=sys.stderr)
+            results['scales'][str(scale)] = {'dataset': server.dataset, 'commands': entries}
+            server.close()
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        for scale, data in results['scales'].items():
+            for name, entry in data['commands'].items():
+                previous = baseline.get('scales', {}).get(scale, {}).get('commands', {}).get(name, {})
+                for metric in METRICS:
+                    if entry.get(metric) and previous.get(metric) and \
+                            entry[metric] > previous[metric] * (1 + args.tolerance):
+                        failures.append(f"{scale} {name}: {metric} {previous[metric]} -> {entry[metric]}")
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
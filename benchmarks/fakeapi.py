@@ -0,0 +1,699 @@
+"""
+In-memory stand-in for the Kubernetes API server, for offline benchmarks.
+
+Implements the subset of the API that pmctl uses: get/list/create/patch/
+delete and deletecollection for ServiceAccounts, Secrets, ConfigMaps,
+Namespaces, RoleBindings and ClusterRoleBindings, with pagination (limit/continue),
+label and field selectors, metadata-only lists (PartialObjectMetadataList),
+watches, TokenRequest and SubjectAccessReview. Service account token
+Secrets are populated shortly after creation, like the token controller
+does.
+
+Every request and the bytes sent and received are counted so benchmarks
+can report them; GET /_bench/counters returns the counters and
+POST /_bench/reset clears them.
+
+With --fault-rate, that fraction of the requests (watches excepted) fails
+like an overloaded control plane would: 429 with Retry-After, 500, a reset
+connection or a body cut off mid-way, and continue tokens expire (410).
+
+Run standalone for manual testing:
+    python benchmarks/fakeapi.py [--port 18080] [--bindings 1000] [--kubeconfig fake.kubeconfig] [--fault-rate 0.05]
+
+It prints one JSON line with its URL and the generated dataset.
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SA_TOKEN_SECRET_TYPE = 'kubernetes.io/service-account-token'
+NAMESPACED_TEMPLATE = 'template-namespaced-resources'
+CLUSTER_TEMPLATE = 'template-cluster-resources'
+NAMESPACE_PERMISSIONS = ['developer', 'operation', 'monitoring']
+CLUSTER_PERMISSIONS = ['read-only', 'admin']
+
+# resource -> (kind, apiVersion, namespaced)
+RESOURCES = {
+    'serviceaccounts': ('ServiceAccount', 'v1', True),
+    'secrets': ('Secret', 'v1', True),
+    'configmaps': ('ConfigMap', 'v1', True),
+    'namespaces': ('Namespace', 'v1', False),
+    'rolebindings': ('RoleBinding', 'rbac.authorization.k8s.io/v1', True),
+    'clusterrolebindings': ('ClusterRoleBinding', 'rbac.authorization.k8s.io/v1', False),
+    'roles': ('Role', 'rbac.authorization.k8s.io/v1', True),
+    'clusterroles': ('ClusterRole', 'rbac.authorization.k8s.io/v1', False),
+    'subjectaccessreviews': ('SubjectAccessReview', 'authorization.k8s.io/v1', False),
+}
+
+API_PREFIXES = ('/api/v1', '/apis/rbac.authorization.k8s.io/v1', '/apis/authorization.k8s.io/v1')
+
+TEMPLATE_ROLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'charts', 'templates',
+                                   'template-cluster-roles.yml')
+
+
+class Store:
+    """
+    Objects by kind, with a global resourceVersion and an event log for watches.
+    """
+    def __init__(self, token_delay=0.05):
+        self.lock = threading.Condition()
+        self.resource_version = 1
+        self.objects = {}  # kind -> {(namespace, name): object}
+        self.sorted_cache = {}  # kind -> sorted list of objects
+        self.events = []  # (resourceVersion, kind, type, object)
+        self.token_delay = token_delay
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.faults = 0
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = self.bytes_sent = self.bytes_received = self.faults = 0
+
+    def counters(self):
+        with self.lock:
+            return {'requests': self.requests, 'bytes_sent': self.bytes_sent,
+                    'bytes_received': self.bytes_received, 'faults': self.faults}
+
+    def _stamp(self, obj):
+        self.resource_version += 1
+        metadata = obj.setdefault('metadata', {})
+        metadata['resourceVersion'] = str(self.resource_version)
+        metadata.setdefault('uid', str(uuid.uuid4()))
+        metadata.setdefault('creationTimestamp', time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+
+    def load(self, kind, obj):
+        """
+        Add an object without recording a watch event (for preloading data).
+        """
+        with self.lock:
+            self._stamp(obj)
+            self.objects.setdefault(kind, {})[(obj['metadata'].get('namespace'), obj['metadata']['name'])] = obj
+            self.sorted_cache.pop(kind, None)
+
+    def put(self, kind, obj, event_type='ADDED'):
+        with self.lock:
+            self._stamp(obj)
+            self.objects.setdefault(kind, {})[(obj['metadata'].get('namespace'), obj['metadata']['name'])] = obj
+            self.sorted_cache.pop(kind, None)
+            self.events.append((self.resource_version, kind, event_type, json.loads(json.dumps(obj))))
+            self.lock.notify_all()
+            return obj
+
+    def get(self, kind, namespace, name):
+        with self.lock:
+            return self.objects.get(kind, {}).get((namespace, name))
+
+    def delete(self, kind, namespace, name):
+        with self.lock:
+            obj = self.objects.get(kind, {}).pop((namespace, name), None)
+            if obj is None:
+                return None
+            self.sorted_cache.pop(kind, None)
+            self.resource_version += 1
+            obj['metadata']['resourceVersion'] = str(self.resource_version)
+            self.events.append((self.resource_version, kind, 'DELETED', obj))
+            self.lock.notify_all()
+            return obj
+
+    def items(self, kind, namespace=None):
+        """
+        Return (objects sorted by namespace/name, current resourceVersion).
+        """
+        with self.lock:
+            items = self.sorted_cache.get(kind)
+            if items is None:
+                items = [obj for _, obj in sorted(self.objects.get(kind, {}).items(),
+                                                  key=lambda entry: (entry[0][0] or '', entry[0][1]))]
+                self.sorted_cache[kind] = items
+            resource_version = str(self.resource_version)
+        if namespace is not None:
+            items = [obj for obj in items if obj['metadata'].get('namespace') == namespace]
+        return items, resource_version
+
+
+def match_labels(obj, selector):
+    """
+    Evaluate a label selector (=, ==, !=, in, notin, exists, !exists).
+    """
+    if not selector:
+        return True
+    labels = obj['metadata'].get('labels') or {}
+    terms, depth, current = [], 0, ''
+    for char in selector:  # Split on commas outside of parentheses
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if char == ',' and depth == 0:
+            terms.append(current)
+            current = ''
+        else:
+            current += char
+    terms.append(current)
+
+    for term in (term.strip() for term in terms):
+        if ' notin ' in term:
+            key, values = term.split(' notin ', 1)
+            if labels.get(key.strip()) in [v.strip() for v in values.strip(' ()').split(',')]:
+                return False
+        elif ' in ' in term:
+            key, values = term.split(' in ', 1)
+            if labels.get(key.strip()) not in [v.strip() for v in values.strip(' ()').split(',')]:
+                return False
+        elif '!=' in term:
+            key, value = term.split('!=', 1)
+            if labels.get(key.strip()) == value.strip():
+                return False
+        elif '=' in term:
+            key, value = term.split('=', 1)
+            if labels.get(key.rstrip('=').strip()) != value.strip():
+                return False
+        elif term.startswith('!'):
+            if term[1:] in labels:
+                return False
+        elif term and term not in labels:
+            return False
+    return True
+
+
+def match_fields(obj, selector):
+    """
+    Evaluate a field selector on metadata.name, metadata.namespace or a top-level field.
+    """
+    if not selector:
+        return True
+    for term in selector.split(','):
+        negate = '!=' in term
+        key, value = term.split('!=' if negate else '=', 1)
+        key = key.rstrip('=')
+        if key.startswith('metadata.'):
+            actual = obj['metadata'].get(key.split('.', 1)[1])
+        else:
+            actual = obj.get(key)
+        if (actual == value) == negate:
+            return False
+    return True
+
+
+LABEL_VALUE = re.compile(r'^(([A-Za-z0-9][-A-Za-z0-9_.]*)?[A-Za-z0-9])?$')
+
+
+def invalid_labels(metadata):
+    """
+    Return the labels whose values the API server would reject (422).
+    """
+    return sorted(key for key, value in (metadata.get('labels') or {}).items()
+                  if value is not None and (len(value) > 63 or not LABEL_VALUE.match(value)))
+
+
+def rule_matches(rule, attributes):
+    """
+    Match one policy rule against SubjectAccessReview attributes, as the RBAC authorizer does.
+    """
+    if rule.get('verbs') and not ({'*', attributes.get('verb')} & set(rule['verbs'])):
+        return False
+    if 'path' in attributes:  # Non-resource request
+        return any(url == '*' or url == attributes['path'] or
+                   (url.endswith('*') and attributes['path'].startswith(url[:-1]))
+                   for url in rule.get('nonResourceURLs') or [])
+    if not ({'*', attributes.get('group') or ''} & set(rule.get('apiGroups') or [])):
+        return False
+    resource = attributes.get('resource', '')
+    if attributes.get('subresource'):
+        resource += '/' + attributes['subresource']
+    resources = rule.get('resources') or []
+    if not ('*' in resources or resource in resources or
+            (attributes.get('subresource') and '*/' + attributes['subresource'] in resources)):
+        return False
+    return not rule.get('resourceNames') or attributes.get('name') in rule['resourceNames']
+
+
+def authorize(store, spec):
+    """
+    Evaluate a SubjectAccessReview for a service account user and its groups by scanning the stored bindings.
+    """
+    parts = (spec.get('user') or '').split(':')
+    if len(parts) != 4 or parts[:2] != ['system', 'serviceaccount']:
+        return False
+    subjects = {('ServiceAccount', parts[3], parts[2])}
+    subjects.update(('Group', group, None) for group in spec.get('groups') or [])
+    attributes = spec.get('nonResourceAttributes') or spec.get('resourceAttributes') or {}
+    namespace = (spec.get('resourceAttributes') or {}).get('namespace')
+
+    # Non-resource URLs are only granted through ClusterRoleBindings
+    bindings, _ = store.items('ClusterRoleBinding')
+    if namespace:
+        bindings = bindings + store.items('RoleBinding', namespace)[0]
+    for binding in bindings:
+        # Only ServiceAccount subjects are namespaced
+        bound = {(sub.get('kind'), sub.get('name'), sub.get('namespace') if sub.get('kind') == 'ServiceAccount' else None)
+                 for sub in binding.get('subjects') or []}
+        if not subjects & bound:
+            continue
+        role_ref = binding.get('roleRef') or {}
+        if role_ref.get('kind') == 'Role':
+            role = store.get('Role', binding['metadata'].get('namespace'), role_ref.get('name'))
+        else:
+            role = store.get('ClusterRole', None, role_ref.get('name'))
+        if role and any(rule_matches(rule, attributes) for rule in role.get('rules') or []):
+            return True
+    return False
+
+
+def make_handler(store, latency=0.0, fault_rate=0.0):
+    def faulty(method):
+        """
+        Fail a fraction of the requests instead of handling them.
+        """
+        def handler(self):
+            self.truncate = False
+            if not fault_rate or self.path.startswith('/_bench/') or 'watch=' in self.path \
+                    or random.random() >= fault_rate:
+                return method(self)
+            fault = random.choice(('429', '500', 'reset', 'truncate') if self.command == 'GET' else ('429', '500', 'reset'))
+            if fault != 'truncate':
+                # Consume the request body so it is not read as the next request
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            with store.lock:
+                store.requests += fault != 'truncate'  # Truncated requests are counted when handled
+                store.faults += 1
+            if fault == '429':
+                self.send_status(429, 'TooManyRequests', 'Too many requests, please try again later.',
+                                 headers={'Retry-After': '1'})
+            elif fault == '500':
+                self.send_status(500, 'InternalError', 'Internal error occurred: injected fault')
+            elif fault == 'reset':
+                self.close_connection = True
+            else:
+                self.truncate = True
+                method(self)
+        return handler
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status, body, headers=None, chunked=False):
+            data = json.dumps(body).encode('utf-8')
+            with store.lock:
+                store.bytes_sent += len(data)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            if chunked:
+                # Lists come chunked without a Content-Length, like from the API server
+                self.send_header('Transfer-Encoding', 'chunked')
+            else:
+                self.send_header('Content-Length', str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            if self.truncate:
+                # Cut the body off half-way, like a connection reset mid-response
+                half = data[:len(data) // 2]
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(half), half) if chunked else half)
+                self.close_connection = True
+                return
+            if chunked:
+                for offset in range(0, len(data), 32 * 1024):
+                    chunk = data[offset:offset + 32 * 1024]
+                    self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                self.wfile.write(b'0\r\n\r\n')
+                return
+            self.wfile.write(data)
+
+        def send_status(self, status, reason, message, extra=None, headers=None):
+            body = {'kind': 'Status', 'apiVersion': 'v1', 'metadata': {}, 'status': 'Failure',
+                    'message': message, 'reason': reason, 'code': status}
+            body.update(extra or {})
+            self.send_json(status, body, headers)
+
+        def read_body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            data = self.rfile.read(length) if length else b''
+            with store.lock:
+                store.bytes_received += len(data)
+            return json.loads(data or b'{}')
+
+        def route(self):
+            """
+            Split the request path into (resource, namespace, name, subresource, query).
+            """
+            with store.lock:
+                store.requests += 1
+            if latency:
+                time.sleep(latency)
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            prefix = next((p for p in API_PREFIXES if url.path.startswith(p + '/')), None)
+            if prefix is None:
+                return None
+            parts = [part for part in url.path[len(prefix):].split('/') if part]
+            namespace = None
+            if len(parts) >= 3 and parts[0] == 'namespaces' and parts[2] in RESOURCES:
+                namespace = parts[1]
+                parts = parts[2:]
+            if not parts or parts[0] not in RESOURCES:
+                return None
+            name = parts[1] if len(parts) > 1 else None
+            subresource = parts[2] if len(parts) > 2 else None
+            return parts[0], namespace, name, subresource, query
+
+        @faulty
+        def do_GET(self):
+            if self.path == '/_bench/counters':
+                # Benchmark control endpoint; not counted
+                return self.send_json(200, store.counters())
+            route = self.route()
+            if route is None:
+                return self.send_status(404, 'NotFound', 'the server could not find the requested resource')
+            resource, namespace, name, _, query = route
+            kind, api_version, _ = RESOURCES[resource]
+            if name:
+                obj = store.get(kind, namespace, name)
+                if obj is None:
+                    return self.send_status(404, 'NotFound', f'{resource} "{name}" not found')
+                return self.send_json(200, dict(obj, kind=kind, apiVersion=api_version))
+            if (query.get('watch') or '').lower() in ('true', '1'):
+                return self.watch(kind, namespace, query)
+
+            items, resource_version = store.items(kind, namespace)
+            if query.get('labelSelector') or query.get('fieldSelector'):
+                items = [obj for obj in items if match_labels(obj, query.get('labelSelector'))
+                         and match_fields(obj, query.get('fieldSelector'))]
+            start = 0
+            if query.get('continue'):
+                token = json.loads(query['continue'])
+                if token.get('expired') or (fault_rate and random.random() < fault_rate):
+                    # Lets clients exercise 410 recovery; the Status carries a fresh token
+                    return self.send_status(410, 'Expired', 'The provided continue parameter is too old',
+                                            {'metadata': {'continue': json.dumps({'start': token['start']})}})
+                start = token['start']
+            limit = int(query.get('limit') or 0)
+            page = items[start:start + limit] if limit else items[start:]
+            metadata = {'resourceVersion': resource_version}
+            if limit and start + limit < len(items):
+                metadata['continue'] = json.dumps({'start': start + limit})
+                metadata['remainingItemCount'] = len(items) - start - limit
+
+            if 'as=PartialObjectMetadataList' in self.headers.get('Accept', ''):
+                page = [{'kind': 'PartialObjectMetadata', 'apiVersion': 'meta.k8s.io/v1',
+                         'metadata': obj['metadata']} for obj in page]
+                list_kind, list_api_version = 'PartialObjectMetadataList', 'meta.k8s.io/v1'
+            else:
+                page = [dict(obj, kind=kind, apiVersion=api_version) for obj in page]
+                list_kind, list_api_version = kind + 'List', api_version
+            self.send_json(200, {'kind': list_kind, 'apiVersion': list_api_version,
+                                 'metadata': metadata, 'items': page}, chunked=True)
+
+        def watch(self, kind, namespace, query):
+            sent = int(query.get('resourceVersion') or 0)
+            deadline = time.time() + float(query.get('timeoutSeconds') or 30)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+
+            def write_chunk(data):
+                with store.lock:
+                    store.bytes_sent += len(data)
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+                self.wfile.flush()
+
+            try:
+                while True:
+                    with store.lock:
+                        events = [event for event in store.events if event[0] > sent and event[1] == kind and
+                                  (namespace is None or event[3]['metadata'].get('namespace') == namespace)]
+                        if not events:
+                            remaining = deadline - time.time()
+                            if remaining <= 0:
+                                break
+                            store.lock.wait(remaining)
+                            continue
+                    for resource_version, _, event_type, obj in events:
+                        sent = resource_version
+                        if match_labels(obj, query.get('labelSelector')) and \
+                                match_fields(obj, query.get('fieldSelector')):
+                            write_chunk(json.dumps({'type': event_type, 'object': obj}).encode('utf-8') + b'\n')
+                write_chunk(b'')
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        @faulty
+        def do_POST(self):
+            if self.path == '/_bench/reset':
+                store.reset_counters()
+                return self.send_json(200, {})
+            route = self.route()
+            if route is None:
+                return self.send_status(404, 'NotFound', 'the server could not find the requested resource')
+            resource, namespace, name, subresource, _ = route
+            body = self.read_body()
+            if resource == 'subjectaccessreviews':
+                body['status'] = {'allowed': authorize(store, body.get('spec') or {})}
+                return self.send_json(201, body)
+            if subresource == 'token':
+                if store.get('ServiceAccount', namespace, name) is None:
+                    return self.send_status(404, 'NotFound', f'serviceaccounts "{name}" not found')
+                expiration = body.get('spec', {}).get('expirationSeconds') or 3600
+                body['status'] = {
+                    'token': f"token-{name}-{uuid.uuid4().hex[:8]}",
+                    'expirationTimestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                                                         time.gmtime(time.time() + expiration))
+                }
+                return self.send_json(201, body)
+
+            kind, api_version, namespaced = RESOURCES[resource]
+            metadata = body.setdefault('metadata', {})
+            if invalid_labels(metadata):
+                return self.send_status(422, 'Invalid', f'invalid label values: {", ".join(invalid_labels(metadata))}')
+            if namespaced:
+                metadata['namespace'] = namespace
+            if store.get(kind, namespace, metadata.get('name')) is not None:
+                return self.send_status(409, 'AlreadyExists', f'{resource} "{metadata.get("name")}" already exists')
+            is_token_secret = kind == 'Secret' and body.get('type') == SA_TOKEN_SECRET_TYPE
+            if is_token_secret:
+                body['data'] = {}
+            obj = store.put(kind, body)
+            if is_token_secret:
+                threading.Thread(target=self.populate_token, args=(namespace, metadata['name']), daemon=True).start()
+            self.send_json(201, dict(obj, kind=kind, apiVersion=api_version))
+
+        @staticmethod
+        def populate_token(namespace, name):
+            time.sleep(store.token_delay)
+            obj = store.get('Secret', namespace, name)
+            if obj is None:
+                return
+            obj = json.loads(json.dumps(obj))
+            obj['data'] = {'token': base64.b64encode(f'token-{name}'.encode()).decode(),
+                           'ca.crt': base64.b64encode(b'fake-ca').decode()}
+            store.put('Secret', obj, 'MODIFIED')
+
+        @faulty
+        def do_PATCH(self):
+            route = self.route()
+            if route is None:
+                return self.send_status(404, 'NotFound', 'the server could not find the requested resource')
+            resource, namespace, name, _, _ = route
+            kind, api_version, _ = RESOURCES[resource]
+            body = self.read_body()
+            obj = store.get(kind, namespace, name)
+            if obj is None:
+                return self.send_status(404, 'NotFound', f'{resource} "{name}" not found')
+            if invalid_labels(body.get('metadata') or {}):
+                return self.send_status(422, 'Invalid',
+                                        f'invalid label values: {", ".join(invalid_labels(body["metadata"]))}')
+            obj = json.loads(json.dumps(obj))
+            # Merge patch of metadata maps, which is all pmctl patches
+            for key, value in (body.get('metadata') or {}).items():
+                if isinstance(value, dict):
+                    merged = obj['metadata'].get(key) or {}
+                    for field, field_value in value.items():
+                        if field_value is None:
+                            merged.pop(field, None)
+                        else:
+                            merged[field] = field_value
+                    obj['metadata'][key] = merged
+            obj = store.put(kind, obj, 'MODIFIED')
+            self.send_json(200, dict(obj, kind=kind, apiVersion=api_version))
+
+        @faulty
+        def do_DELETE(self):
+            route = self.route()
+            if route is None:
+                return self.send_status(404, 'NotFound', 'the server could not find the requested resource')
+            resource, namespace, name, _, query = route
+            kind, _, _ = RESOURCES[resource]
+            body = self.read_body()
+            if name is None:
+                items, _ = store.items(kind, namespace)
+                for obj in items:
+                    if match_labels(obj, query.get('labelSelector')):
+                        store.delete(kind, namespace, obj['metadata']['name'])
+                return self.send_json(200, {'kind': 'Status', 'apiVersion': 'v1', 'status': 'Success'})
+
+            obj = store.get(kind, namespace, name)
+            preconditions = body.get('preconditions') or {}
+            if obj is not None and preconditions.get('resourceVersion') and \
+                    preconditions['resourceVersion'] != obj['metadata']['resourceVersion']:
+                return self.send_status(409, 'Conflict', 'Precondition failed: resourceVersion mismatch')
+            if obj is not None and preconditions.get('uid') and preconditions['uid'] != obj['metadata']['uid']:
+                return self.send_status(409, 'Conflict', 'Precondition failed: UID mismatch')
+            if store.delete(kind, namespace, name) is None:
+                return self.send_status(404, 'NotFound', f'{resource} "{name}" not found')
+            self.send_json(200, {'kind': 'Status', 'apiVersion': 'v1', 'status': 'Success'})
+
+    return Handler
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping watches or keep-alive connections on exit is expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeApiServer:
+    """
+    Fake API server listening on a local port, serving a Store.
+    """
+    def __init__(self, store=None, port=0, latency=0.0, fault_rate=0.0):
+        self.store = store or Store()
+        self.server = QuietHTTPServer(('127.0.0.1', port), make_handler(self.store, latency, fault_rate))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def write_kubeconfig(self, path, namespace='pmctl'):
+        kubeconfig = {
+            'apiVersion': 'v1',
+            'kind': 'Config',
+            'current-context': 'fake',
+            'clusters': [{'name': 'fake', 'cluster': {'server': self.url}}],
+            'contexts': [{'name': 'fake', 'context': {'cluster': 'fake', 'user': 'fake', 'namespace': namespace}}],
+            'users': [{'name': 'fake', 'user': {'token': 'fake'}}],
+        }
+        with open(path, 'w') as f:
+            json.dump(kubeconfig, f)  # JSON is valid YAML
+        return path
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def load_template_roles(store):
+    """
+    Load the template ClusterRoles that pmctl binds from the Helm chart.
+    """
+    import yaml
+
+    with open(TEMPLATE_ROLES_PATH, 'r') as f:
+        # Drop the Helm directives; what remains is plain YAML documents
+        text = ''.join(line for line in f if not line.lstrip().startswith('{{'))
+    for role in yaml.safe_load_all(text):
+        if role:
+            store.load('ClusterRole', {'metadata': role['metadata'], 'rules': role.get('rules') or []})
+
+
+def populate(store, bindings, manager_namespace='pmctl'):
+    """
+    Preload synthetic pmctl data with about `bindings` bindings.
+
+    One user per 10 bindings; each user gets 9 RoleBindings spread over the
+    namespaces (one namespace per 100 bindings) and 1 ClusterRoleBinding, all
+    in pmctl's naming scheme and labelled, plus a populated token Secret.
+
+    Returns:
+        dict: Counts of the generated objects
+    """
+    users = max(1, bindings // 10)
+    namespaces = max(9, bindings // 100)
+    store.load('Namespace', {'metadata': {'name': manager_namespace}})
+    store.load('ConfigMap', {'metadata': {'name': 'kube-root-ca.crt', 'namespace': manager_namespace},
+                             'data': {'ca.crt': 'fake-ca'}})
+    load_template_roles(store)
+    for index in range(namespaces):
+        store.load('Namespace', {'metadata': {'name': f'ns-{index:05d}', 'labels': {'team': f'team-{index % 10}'}}})
+
+    token = base64.b64encode(b'token').decode()
+    ca = base64.b64encode(b'fake-ca').decode()
+    for user_index in range(users):
+        username = f'user-{user_index:06d}'
+        store.load('ServiceAccount', {'metadata': {'name': username, 'namespace': manager_namespace,
+                                                   'labels': {'app.kubernetes.io/managed-by': 'pmctl'}}})
+        store.load('Secret', {
+            'metadata': {'name': f'{username}-token', 'namespace': manager_namespace,
+                         'annotations': {'kubernetes.io/service-account.name': username}},
+            'type': SA_TOKEN_SECRET_TYPE,
+            'data': {'token': token, 'ca.crt': ca}
+        })
+        subjects = [{'kind': 'ServiceAccount', 'name': username, 'namespace': manager_namespace}]
+        for offset in range(9):
+            namespace = f'ns-{(user_index + offset * 7) % namespaces:05d}'
+            permission = NAMESPACE_PERMISSIONS[(user_index + offset) % len(NAMESPACE_PERMISSIONS)]
+            store.load('RoleBinding', {
+                'metadata': {
+                    'name': f'{username}___{NAMESPACED_TEMPLATE}___{permission}___{namespace}',
+                    'namespace': namespace,
+                    'labels': {'app.kubernetes.io/managed-by': 'pmctl', 'pmctl/user': username,
+                               'pmctl/scope': 'namespace', 'pmctl/permission': permission}
+                },
+                'roleRef': {'apiGroup': 'rbac.authorization.k8s.io', 'kind': 'ClusterRole',
+                            'name': f'{NAMESPACED_TEMPLATE}___{permission}'},
+                'subjects': subjects
+            })
+        permission = CLUSTER_PERMISSIONS[user_index % len(CLUSTER_PERMISSIONS)]
+        store.load('ClusterRoleBinding', {
+            'metadata': {
+                'name': f'{username}___{CLUSTER_TEMPLATE}___{permission}',
+                'labels': {'app.kubernetes.io/managed-by': 'pmctl', 'pmctl/user': username,
+                           'pmctl/scope': 'cluster', 'pmctl/permission': permission}
+            },
+            'roleRef': {'apiGroup': 'rbac.authorization.k8s.io', 'kind': 'ClusterRole',
+                        'name': f'{CLUSTER_TEMPLATE}___{permission}'},
+            'subjects': subjects
+        })
+    return {'users': users, 'namespaces': namespaces, 'bindings': users * 10}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Kubernetes API server for pmctl benchmarks')
+    parser.add_argument('--port', type=int, default=18080, help='Port to listen on (default: 18080)')
+    parser.add_argument('--bindings', type=int, default=100, help='Synthetic bindings to preload (default: 100)')
+    parser.add_argument('--kubeconfig', default='fake.kubeconfig', help='Where to write a kubeconfig for the server')
+    parser.add_argument('--namespace', default='pmctl', help='Manager namespace (default: pmctl)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Added latency per API request in seconds')
+    parser.add_argument('--fault-rate', type=float, default=0.0,
+                        help='Fraction of requests that fail with 429, 500, a reset or a truncated body (default: 0)')
+    args = parser.parse_args()
+
+    server = FakeApiServer(port=args.port, latency=args.latency, fault_rate=args.fault_rate)
+    dataset = populate(server.store, args.bindings, args.namespace)
+    server.write_kubeconfig(args.kubeconfig, args.namespace)
+    # One JSON line on stdout tells a driving benchmark where the server is
+    print(json.dumps({'url': server.url, 'kubeconfig': args.kubeconfig, 'dataset': dataset}), flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""
+Start-up benchmark for pmctl.
+
+Measures, per subcommand, the time from process spawn to the first API
+request (time-to-first-API-call), the total wall time and the peak RSS of
+the pmctl process. Both the plain script and a PyInstaller build (as produced
+by the Dockerfile) can be measured. The API server is a local stub that
+answers every request immediately, so the numbers reflect pmctl's own
+start-up cost rather than cluster latency.
+
+The script run is also checked against an import budget: modules that a
+subcommand must not load (e.g. `--help` must not import the kubernetes
+client).
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--binary PATH] [--output results.json]
+                                 [--baseline previous.json] [--tolerance 0.25]
+
+To measure the PyInstaller build, copy the bundle out of the image first:
+    docker build -t pmctl .
+    docker run --rm -v "$PWD:/out" pmctl cp -r /opt/pmctl /out/pmctl-bin
+    python benchmarks/startup.py --binary ./pmctl-bin/pmctl
+
+Exits with status 1 when an import budget is exceeded or, with --baseline,
+when a median regresses by more than the tolerance.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PMCTL_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'source', 'pmctl.py')
+
+# Subcommands to measure, as pmctl arguments
+SUBCOMMANDS = {
+    'help': ['--help'],
+    'user list': ['user', 'list'],
+    'user describe': ['user', 'describe', 'bench-user'],
+    'ns grant': ['ns', 'grant', 'bench-user', 'bench', 'developer'],
+    'ns print': ['ns', 'print', 'bench-user', 'bench'],
+    'cluster grant': ['cluster', 'grant', 'bench-user', 'read-only'],
+}
+
+# Modules each subcommand must not import (checked for the plain script only)
+IMPORT_BUDGET = {
+    'help': ['kubernetes', 'yaml', 'requests'],
+}
+
+EMPTY_LIST = {'kind': 'List', 'apiVersion': 'v1', 'metadata': {'resourceVersion': '1'}, 'items': []}
+NOT_FOUND = {'kind': 'Status', 'apiVersion': 'v1', 'status': 'Failure', 'reason': 'NotFound', 'code': 404}
+
+
+class StubApiServer:
+    """
+    Minimal API server stand-in that records when the first request arrives.
+    """
+    def __init__(self):
+        self.first_request_at = None
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, body):
+                with stub.lock:
+                    if stub.first_request_at is None:
+                        stub.first_request_at = time.perf_counter()
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0].rstrip('/')
+                # Collections end in a plural resource name, single objects in a name
+                if path.rsplit('/', 1)[-1] in ('serviceaccounts', 'secrets', 'rolebindings',
+                                                'clusterrolebindings', 'namespaces'):
+                    self.reply(200, EMPTY_LIST)
+                else:
+                    self.reply(404, NOT_FOUND)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                self.reply(201, body)
+
+            do_PATCH = do_POST
+
+            def do_DELETE(self):
+                self.reply(200, {'kind': 'Status', 'apiVersion': 'v1', 'status': 'Success'})
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def reset(self):
+        with self.lock:
+            self.first_request_at = None
+
+    def close(self):
+        self.server.shutdown()
+
+
+def write_kubeconfig(directory, server_url):
+    path = os.path.join(directory, 'kubeconfig')
+    kubeconfig = {
+        'apiVersion': 'v1',
+        'kind': 'Config',
+        'current-context': 'bench',
+        'clusters': [{'name': 'bench', 'cluster': {'server': server_url}}],
+        'contexts': [{'name': 'bench', 'context': {'cluster': 'bench', 'user': 'bench', 'namespace': 'pmctl'}}],
+        'users': [{'name': 'bench', 'user': {'token': 'bench'}}],
+    }
+    with open(path, 'w') as f:
+        json.dump(kubeconfig, f)  # JSON is valid YAML
+    return path
+
+
+def run_once(command, stub, env):
+    """
+    Run pmctl once. Returns (time_to_first_api_call_ms, wall_ms, peak_rss_kb).
+    """
+    stub.reset()
+    started = time.perf_counter()
+    process = subprocess.Popen(command, env=env, stdin=subprocess.DEVNULL,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, _, rusage = os.wait4(process.pid, 0)
+    finished = time.perf_counter()
+    process.returncode = 0  # Reaped by wait4
+    first_call = None
+    if stub.first_request_at is not None:
+        first_call = (stub.first_request_at - started) * 1000
+    return first_call, (finished - started) * 1000, rusage.ru_maxrss
+
+
+def imported_modules(args, env):
+    """
+    Return the top-level packages imported by the script for the given arguments.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', PMCTL_SCRIPT] + args,
+                            env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True)
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            modules.add(line.rsplit('|', 1)[1].strip().split('.')[0])
+    return modules
+
+
+def median(values):
+    values = [value for value in values if value is not None]
+    return round(statistics.median(values), 1) if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='pmctl start-up benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per subcommand (default: 5)')
+    parser.add_argument('--binary', help='PyInstaller build of pmctl to measure as well')
+    parser.add_argument('--output', help='Write the JSON results to this file')
+    parser.add_argument('--baseline', help='Previous results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed relative regression against the baseline (default: 0.25)')
+    args = parser.parse_args()
+
+    targets = {'script': [sys.executable, PMCTL_SCRIPT]}
+    if args.binary:
+        targets['pyinstaller'] = [os.path.abspath(args.binary)]
+
+    stub = StubApiServer()
+    failures = []
+    results = {'runs': args.runs, 'python': sys.version.split()[0], 'targets': {}}
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ)
+        env.pop('KUBERNETES_SERVICE_HOST', None)  # Force the kubeconfig code path
+        env.update({
+            'KUBECONFIG': write_kubeconfig(directory, stub.url),
+            'PMCTL_NO_DAEMON': '1',
+            'PMCTL_NAMESPACE': 'pmctl',
+        })
+        env.pop('PMCTL_CACHE_DIR', None)
+
+        for target, command in targets.items():
+            results['targets'][target] = {}
+            for name, subcommand in SUBCOMMANDS.items():
+                samples = [run_once(command + subcommand, stub, env) for _ in range(args.runs)]
+                entry = {
+                    'time_to_first_api_call_ms': median(sample[0] for sample in samples),
+                    'wall_ms': median(sample[1] for sample in samples),
+                    'peak_rss_kb': max(sample[2] for sample in samples),
+                }
+                if target == 'script':
+                    modules = imported_modules(subcommand, env)
+                    over_budget = sorted(set(IMPORT_BUDGET.get(name, [])) & modules)
+                    entry['import_budget_violations'] = over_budget
+                    if over_budget:
+                        failures.append(f"{target} {name}: imports {', '.join(over_budget)}")
+                results['targets'][target][name] = entry
+                print(f"{target:12} {name:14} first call {entry['time_to_first_api_call_ms']} ms, "
+                      f"wall {entry['wall_ms']} ms, peak RSS {entry['peak_rss_kb']} KiB", file=sys.stderr)
+    stub.close()
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        for target, commands in results['targets'].items():
+            for name, entry in commands.items():
+                previous = baseline.get('targets', {}).get(target, {}).get(name, {})
+                for metric in ('time_to_first_api_call_ms', 'wall_ms', 'peak_rss_kb'):
+                    if entry.get(metric) and previous.get(metric) and \
+                            entry[metric] > previous[metric] * (1 + args.tolerance):
+                        failures.append(f"{target} {name}: {metric} {previous[metric]} -> {entry[metric]}")
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
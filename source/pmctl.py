@@ -1,71 +1,2354 @@
 import argparse
+import atexit
 import base64
+import codecs
+import csv
+import fnmatch
+import hashlib
+import heapq
+import json
 import os
+import random
+import re
+import signal
+import socket
+import socketserver
 import sys
-import yaml
+import threading
 import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
 from io import StringIO
-from kubernetes import client, config
-from kubernetes.client.rest import ApiException
+from urllib.parse import urlparse
+
+# The kubernetes client dominates start-up time, so it is only imported by
+# load_kubernetes() once a command actually talks to the API server. yaml and
+# requests are imported by the few commands that use them.
+client = config = watch = ApiException = None
+
+
+def load_kubernetes():
+    """
+    Import the kubernetes client on first use.
+    """
+    global client, config, watch, ApiException
+    if client is None:
+        from kubernetes import client as kubernetes_client, config as kubernetes_config, watch as kubernetes_watch
+        from kubernetes.client.rest import ApiException as kubernetes_api_exception
+        client, config, watch = kubernetes_client, kubernetes_config, kubernetes_watch
+        ApiException = kubernetes_api_exception
+
+# Labels stamped on every binding created by pmctl
+MANAGED_BY_LABEL = 'app.kubernetes.io/managed-by'
+MANAGED_BY_VALUE = 'pmctl'
+USER_LABEL = 'pmctl/user'
+SCOPE_LABEL = 'pmctl/scope'
+PERMISSION_LABEL = 'pmctl/permission'
+
+# Time-bound grants: the label lets the expiry controller select them server-side
+EXPIRES_LABEL = 'pmctl/expires'
+EXPIRES_AT_ANNOTATION = 'pmctl/expires-at'
+EXPIRING_SELECTOR = f"{MANAGED_BY_LABEL}={MANAGED_BY_VALUE},{EXPIRES_LABEL}=true"
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+NAMESPACED_TEMPLATE = 'template-namespaced-resources'
+CLUSTER_TEMPLATE = 'template-cluster-resources'
+NAMESPACE_PERMISSIONS = ['developer', 'operation', 'monitoring']
+CLUSTER_PERMISSIONS = ['read-only', 'admin']
+
+SA_NAME_ANNOTATION = 'kubernetes.io/service-account.name'
+SA_TOKEN_SECRET_TYPE = 'kubernetes.io/service-account-token'
+
+# ConfigMap with the cluster CA bundle that Kubernetes publishes in every namespace
+ROOT_CA_CONFIGMAP = 'kube-root-ca.crt'
+# Shortest token lifetime the TokenRequest API accepts
+MIN_TOKEN_DURATION = 600
+
+# Ask the API server for metadata only, falling back to full objects if unsupported
+METADATA_ACCEPT = 'application/json;as=PartialObjectMetadataList;v=v1;g=meta.k8s.io,application/json'
+
+# Raw list endpoints used by the streaming fetch layer
+BINDING_LIST_PATHS = {
+    'RoleBinding': '/apis/rbac.authorization.k8s.io/v1/rolebindings',
+    'ClusterRoleBinding': '/apis/rbac.authorization.k8s.io/v1/clusterrolebindings'
+}
+NAMESPACED_ROLE_BINDING_PATH = '/apis/rbac.authorization.k8s.io/v1/namespaces/{namespace}/rolebindings'
+LIST_CHUNK_SIZE = 64 * 1024
+
+# Unix socket of the resident daemon started with 'pmctl serve'
+DEFAULT_SOCKET_PATH = '/tmp/pmctl.sock'
+# Environment that shapes how commands run: PMCTL_* (except the client-side
+# settings) and these. Commands are only forwarded to a daemon started with the same values
+DAEMON_ENV_NAMES = ('KUBECONFIG', 'CONTROL_PLANE_ADDRESS', 'CLUSTER_NAME', 'TELEGRAM_BOT_API', 'TELEGRAM_CHAT_ID')
+CLIENT_ENV_NAMES = ('PMCTL_SOCKET', 'PMCTL_NO_DAEMON')
+
+# Lets commands running inside 'pmctl serve' ask their questions on the client's terminal
+_prompt = threading.local()
+
+
+def ask(question):
+    """
+    input() that also works for commands forwarded to the daemon.
+    """
+    handler = getattr(_prompt, 'handler', None)
+    if handler:
+        return handler(question)
+    return input(question)
+
+
+def in_cluster_service_account():
+    """
+    Return the name of the ServiceAccount pmctl runs as, from its mounted token, or None.
+    """
+    try:
+        with open('/var/run/secrets/kubernetes.io/serviceaccount/token', 'r') as f:
+            payload = f.read().strip().split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+    except (OSError, IndexError, ValueError):
+        return None
+    # sub is 'system:serviceaccount:<namespace>:<name>'
+    return claims.get('sub', '').split(':')[-1] or None
+
+
+def user_label_value(username):
+    """
+    Return the pmctl/user label value of a username.
+
+    Label values are limited to 63 characters, while ServiceAccount names may
+    be longer; longer names are shortened and suffixed with a hash of the
+    full name, which stays unique. Code that needs the username itself reads
+    it from the binding name (see binding_username).
+    """
+    if len(username) <= 63:
+        return username
+    digest = hashlib.sha256(username.encode('utf-8')).hexdigest()[:10]
+    return f"{username[:52]}-{digest}"
+
+
+def binding_labels(username, scope, permission):
+    """
+    Labels identifying a pmctl-managed binding.
+
+    Args:
+        username (str): Name of the user/service account
+        scope (str): 'namespace' or 'cluster'
+        permission (str): Permission level
+    """
+    return {
+        MANAGED_BY_LABEL: MANAGED_BY_VALUE,
+        USER_LABEL: user_label_value(username),
+        SCOPE_LABEL: scope,
+        PERMISSION_LABEL: permission
+    }
+
+
+def label_selector(username=None, scope=None, permission=None):
+    """
+    Build a label selector matching pmctl-managed bindings.
+    """
+    terms = [f"{MANAGED_BY_LABEL}={MANAGED_BY_VALUE}"]
+    if username:
+        terms.append(f"{USER_LABEL}={user_label_value(username)}")
+    if scope:
+        terms.append(f"{SCOPE_LABEL}={scope}")
+    if permission:
+        terms.append(f"{PERMISSION_LABEL}={permission}")
+    return ','.join(terms)
+
+
+def split_list(value):
+    """
+    Split a comma-separated command line value into its non-empty items.
+    """
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def namespaced_binding_name(username, namespace, permission):
+    return f"{username}___{NAMESPACED_TEMPLATE}___{permission}___{namespace}"
+
+
+def cluster_binding_name(username, permission):
+    return f"{username}___{CLUSTER_TEMPLATE}___{permission}"
+
+
+def parse_binding_name(name):
+    """
+    Parse a binding name in pmctl's naming scheme.
+
+    Returns a (username, scope, permission, namespace) tuple, or None when the
+    name was not generated by pmctl. namespace is None for cluster bindings.
+    """
+    parts = name.split('___')
+    if len(parts) == 4 and parts[1] == NAMESPACED_TEMPLATE:
+        return parts[0], 'namespace', parts[2], parts[3]
+    if len(parts) == 3 and parts[1] == CLUSTER_TEMPLATE:
+        return parts[0], 'cluster', parts[2], None
+    return None
+
+
+def binding_username(binding):
+    """
+    Return the username of a binding record, from its name in pmctl's naming scheme or its label.
+    """
+    parsed = parse_binding_name(binding.name)
+    return parsed[0] if parsed else binding.labels.get(USER_LABEL)
+
+
+def binding_permission(binding):
+    """
+    Return the permission granted by a binding record, preferring its labels.
+    """
+    if binding.labels.get(PERMISSION_LABEL):
+        return binding.labels[PERMISSION_LABEL]
+    parts = binding.role_ref.split('___')
+    if len(parts) == 2 and parts[0] in (NAMESPACED_TEMPLATE, CLUSTER_TEMPLATE):
+        return parts[1]
+    return binding.role_ref  # Not a pmctl template, show the role itself
+
+
+def parse_duration(value):
+    """
+    Parse a duration such as '90m', '8h' or '1d12h' into seconds.
+
+    Raises:
+        ValueError: If the value is not a positive duration
+    """
+    text = value.strip().lower()
+    parts = re.findall(r'(\d+(?:\.\d+)?)([smhdw])', text)
+    seconds = sum(float(number) * DURATION_UNITS[unit] for number, unit in parts)
+    if not parts or ''.join(number + unit for number, unit in parts) != text or seconds <= 0:
+        raise ValueError(f"invalid duration '{value}' (expected a positive duration such as 90m, 8h or 1d12h)")
+    return seconds
+
+
+def grant_expiry(ttl=None, until=None):
+    """
+    Turn --ttl / --until into an expiry time in seconds since the epoch, or None.
+
+    until is an ISO 8601 time; without a UTC offset it is taken as local time.
+
+    Raises:
+        ValueError: If the value cannot be parsed or is not in the future
+    """
+    if ttl:
+        expires_at = time.time() + parse_duration(ttl)
+    elif until:
+        try:
+            moment = datetime.fromisoformat(until.strip().replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f"invalid time '{until}' (expected e.g. 2025-01-31T18:00 or 2025-01-31T17:00:00Z)")
+        if moment.tzinfo is None:
+            moment = moment.astimezone()
+        expires_at = moment.timestamp()
+    else:
+        return None
+    if expires_at <= time.time():
+        raise ValueError("the expiry must be in the future")
+    return int(expires_at)
+
+
+def format_expiry(expires_at):
+    """
+    Format an expiry time as it is stored in the expires-at annotation (RFC 3339, UTC).
+    """
+    return datetime.fromtimestamp(expires_at, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def binding_expiry(annotations):
+    """
+    Return the expiry time of a binding from its annotations, or None for a permanent grant.
+    """
+    value = (annotations or {}).get(EXPIRES_AT_ANNOTATION)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        print(f"Warning: ignoring invalid {EXPIRES_AT_ANNOTATION} annotation '{value}'", file=sys.stderr)
+        return None
+
+
+def expiry_metadata(expires_at):
+    """
+    Labels and annotations recording an expiry on a binding.
+
+    With expires_at None the values are None, which removes them in a merge patch.
+    """
+    return {
+        'labels': {EXPIRES_LABEL: 'true' if expires_at else None},
+        'annotations': {EXPIRES_AT_ANNOTATION: format_expiry(expires_at) if expires_at else None}
+    }
+
+
+def load_access_spec(path):
+    """
+    Load a declarative access matrix.
+
+    The file maps users to their namespace and cluster permissions:
+
+        users:
+          alice:
+            namespaces:
+              staging: [developer]
+            cluster: [read-only]
+
+    Args:
+        path (str): YAML file to read, '-' for stdin
+
+    Returns:
+        (users, namespace_grants, cluster_grants) where users is a set of names,
+        namespace_grants a set of (user, namespace, permission) and
+        cluster_grants a set of (user, permission).
+
+    Raises:
+        ValueError: If the file does not describe a valid access matrix
+    """
+    import yaml
+
+    try:
+        if path == '-':
+            spec = yaml.safe_load(sys.stdin)
+        else:
+            with open(path, 'r') as f:
+                spec = yaml.safe_load(f)
+    except yaml.YAMLError as e:
+        raise ValueError(str(e))
+
+    if not isinstance(spec, dict) or not isinstance(spec.get('users'), dict):
+        raise ValueError("expected a top-level 'users' mapping")
+
+    users, namespace_grants, cluster_grants = set(), set(), set()
+    for username, access in spec['users'].items():
+        username = str(username)
+        users.add(username)
+        access = access or {}
+        for namespace, permissions in (access.get('namespaces') or {}).items():
+            for permission in permissions or []:
+                if permission not in NAMESPACE_PERMISSIONS:
+                    raise ValueError(f"{username}: invalid namespace permission '{permission}' in {namespace}")
+                namespace_grants.add((username, str(namespace), permission))
+        for permission in access.get('cluster') or []:
+            if permission not in CLUSTER_PERMISSIONS:
+                raise ValueError(f"{username}: invalid cluster permission '{permission}'")
+            cluster_grants.add((username, permission))
+    return users, namespace_grants, cluster_grants
+
+
+def iter_json_list(chunks, envelope):
+    """
+    Incrementally parse a Kubernetes list response.
+
+    Yields the elements of "items" one by one as soon as each is complete, so
+    only the current item and network chunk are held in memory. The other
+    top-level fields (kind, metadata, ...) are stored in envelope.
+
+    Args:
+        chunks (iterable): The response body as byte chunks
+        envelope (dict): Receives the top-level fields other than items
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer, pos = '', 0
+
+    def more():
+        nonlocal buffer, pos
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise ValueError("truncated list response")
+        buffer = buffer[pos:] + text.decode(chunk)
+        pos = 0
+
+    def peek():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            more()
+
+    def value():
+        nonlocal pos
+        while True:
+            peek()
+            try:
+                result, pos = decoder.raw_decode(buffer, pos)
+                return result
+            except json.JSONDecodeError:
+                more()  # Incomplete value: read on
+
+    if peek() != '{':
+        raise ValueError("expected a JSON object")
+    pos += 1
+    while True:
+        char = peek()
+        if char == ',':
+            pos += 1
+            continue
+        if char == '}':
+            return
+        key = value()
+        if peek() != ':':
+            raise ValueError("expected ':' in list response")
+        pos += 1
+        if key != 'items' or peek() != '[':
+            envelope[key] = value()
+            continue
+        pos += 1
+        while True:
+            char = peek()
+            if char == ',':
+                pos += 1
+            elif char == ']':
+                pos += 1
+                break
+            else:
+                yield value()
+                # Drop what has been consumed
+                buffer, pos = buffer[pos:], 0
+
+
+class BindingRecord:
+    """
+    Compact, serializable view of a RoleBinding or ClusterRoleBinding.
+    """
+    __slots__ = ('kind', 'namespace', 'name', 'role_ref', 'subjects', 'labels', 'annotations', 'role_kind')
+
+    def __init__(self, kind, namespace, name, role_ref, subjects, labels=None, annotations=None,
+                 role_kind='ClusterRole'):
+        self.kind = kind
+        self.namespace = namespace
+        self.name = name
+        self.role_ref = role_ref
+        self.subjects = subjects
+        self.labels = labels or {}
+        self.annotations = annotations or {}
+        self.role_kind = role_kind
+
+    @property
+    def key(self):
+        return (self.namespace or '', self.name)
+
+    @classmethod
+    def from_model(cls, kind, obj):
+        """
+        Build a record from a V1RoleBinding / V1ClusterRoleBinding model.
+        """
+        subjects = tuple(
+            (sub.kind, sub.name, sub.namespace) for sub in (obj.subjects or [])
+        )
+        return cls(
+            kind,
+            obj.metadata.namespace,
+            obj.metadata.name,
+            obj.role_ref.name,
+            subjects,
+            obj.metadata.labels,
+            obj.metadata.annotations,
+            obj.role_ref.kind
+        )
+
+    @classmethod
+    def from_json(cls, kind, obj):
+        """
+        Build a record from a binding in its raw API JSON form.
+        """
+        metadata = obj['metadata']
+        subjects = tuple(
+            (sub.get('kind'), sub.get('name'), sub.get('namespace')) for sub in (obj.get('subjects') or [])
+        )
+        return cls(
+            kind,
+            metadata.get('namespace'),
+            metadata['name'],
+            (obj.get('roleRef') or {}).get('name'),
+            subjects,
+            metadata.get('labels'),
+            metadata.get('annotations'),
+            (obj.get('roleRef') or {}).get('kind') or 'ClusterRole'
+        )
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['kind'],
+            data.get('namespace'),
+            data['name'],
+            data['role_ref'],
+            tuple(tuple(sub) for sub in data.get('subjects', [])),
+            data.get('labels'),
+            data.get('annotations'),
+            data['role_kind']
+        )
+
+    def to_dict(self):
+        return {
+            'kind': self.kind,
+            'namespace': self.namespace,
+            'name': self.name,
+            'role_ref': self.role_ref,
+            'subjects': [list(sub) for sub in self.subjects],
+            'labels': self.labels,
+            'annotations': self.annotations,
+            'role_kind': self.role_kind
+        }
+
+
+class RbacBindingIndex:
+    """
+    Informer-style cache of RoleBindings and ClusterRoleBindings.
+
+    The bindings are listed once and then kept current with watches started
+    from the last seen resourceVersion. A subject (kind, namespace, name) ->
+    bindings index turns per-user lookups into a dictionary access. When a
+    snapshot path is set, the cache is persisted to disk so a cold start can
+    resume watching from the saved resourceVersion instead of relisting the
+    whole cluster. While background watches run, the snapshot is written
+    every SNAPSHOT_INTERVAL seconds if it changed, and on stop().
+    """
+    SNAPSHOT_VERSION = 2
+    SNAPSHOT_INTERVAL = 300
+    PAGE_SIZE = 500
+
+    def __init__(self, rbac_v1_api, snapshot_path=None, catchup_seconds=1, fetch=None):
+        self.rbac_v1_api = rbac_v1_api
+        self.fetch = fetch or self._fetch_models
+        self.snapshot_path = snapshot_path
+        self.catchup_seconds = catchup_seconds
+        self.lock = threading.RLock()
+        self.synced = False
+        self.list_funcs = {
+            'RoleBinding': self.rbac_v1_api.list_role_binding_for_all_namespaces,
+            'ClusterRoleBinding': self.rbac_v1_api.list_cluster_role_binding
+        }
+        self.bindings = {kind: {} for kind in self.list_funcs}
+        self.resource_versions = {kind: None for kind in self.list_funcs}
+        self.by_subject = {}
+        self.dirty = False
+        self._watch_threads = []
+        self._stopped = threading.Event()
+
+    def _index_add(self, record):
+        self.bindings[record.kind][record.key] = record
+        for kind, name, namespace in record.subjects:
+            self.by_subject.setdefault((kind, namespace, name), set()).add((record.kind, record.key))
+        self.dirty = True
+
+    def _index_remove(self, kind, key):
+        record = self.bindings[kind].pop(key, None)
+        if not record:
+            return
+        for subject_kind, name, namespace in record.subjects:
+            subject = (subject_kind, namespace, name)
+            refs = self.by_subject.get(subject)
+            if refs:
+                refs.discard((kind, key))
+                if not refs:
+                    del self.by_subject[subject]
+        self.dirty = True
+
+    def lookup(self, subject):
+        """
+        Return the bindings that reference the given subject.
+
+        Args:
+            subject (tuple): (kind, namespace, name) of the subject, e.g.
+                ('ServiceAccount', 'pmctl', 'alice')
+        """
+        with self.lock:
+            return [
+                self.bindings[kind][key]
+                for kind, key in sorted(self.by_subject.get(tuple(subject), ()))
+            ]
+
+    def _fetch_models(self, kind):
+        """
+        List one kind through the client models. Returns (records, resourceVersion).
+        """
+        records = []
+        continue_token = None
+        while True:
+            result = self.list_funcs[kind](limit=self.PAGE_SIZE, _continue=continue_token)
+            records.extend(BindingRecord.from_model(kind, obj) for obj in result.items)
+            continue_token = result.metadata._continue
+            if not continue_token:
+                return records, result.metadata.resource_version
+
+    def relist(self, kind):
+        """
+        Replace the cached bindings of one kind with a fresh paginated list.
+        """
+        records, resource_version = self.fetch(kind)
+
+        with self.lock:
+            for key in list(self.bindings[kind]):
+                self._index_remove(kind, key)
+            for record in records:
+                self._index_add(record)
+            self.resource_versions[kind] = resource_version
+
+    def apply_event(self, kind, event):
+        """
+        Apply a single watch event to the cache.
+        """
+        event_type = event['type']
+        if event_type == 'BOOKMARK':
+            resource_version = event['raw_object']['metadata'].get('resourceVersion')
+        else:
+            record = BindingRecord.from_model(kind, event['object'])
+            resource_version = event['object'].metadata.resource_version
+            with self.lock:
+                self._index_remove(kind, record.key)
+                if event_type != 'DELETED':
+                    self._index_add(record)
+        with self.lock:
+            if resource_version and resource_version != self.resource_versions[kind]:
+                self.resource_versions[kind] = resource_version
+                self.dirty = True
+
+    def watch(self, kind, timeout_seconds):
+        """
+        Stream changes for one kind from the last known resourceVersion.
+
+        A 410 Gone (the resourceVersion fell out of the watch cache) is
+        recovered with a full relist.
+        """
+        stream = watch.Watch()
+        try:
+            for event in stream.stream(
+                self.list_funcs[kind],
+                resource_version=self.resource_versions[kind],
+                timeout_seconds=timeout_seconds,
+                allow_watch_bookmarks=True
+            ):
+                self.apply_event(kind, event)
+                if self._stopped.is_set():
+                    stream.stop()
+        except ApiException as e:
+            if e.status != 410:
+                raise
+            self.relist(kind)
+
+    def _for_each_kind(self, func):
+        errors = []
+
+        def run(kind):
+            try:
+                func(kind)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(kind,)) for kind in self.list_funcs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    def sync(self):
+        """
+        Fill the cache, once.
+
+        Resumes from the on-disk snapshot when one is available (catching up
+        with a short watch), otherwise performs a full list. Later calls
+        return at once: the cache is kept current by the background watches
+        of start(), or reflects the state of the first call without them.
+        """
+        if self.synced:
+            return
+        if self.load_snapshot():
+            self._for_each_kind(lambda kind: self.watch(kind, self.catchup_seconds))
+        else:
+            self._for_each_kind(self.relist)
+        self.synced = True
+        self.save_snapshot()
+
+    def start(self, timeout_seconds=300):
+        """
+        Keep the cache current in the background with one watch per kind.
+        """
+        if self._watch_threads:
+            return
+        self.sync()
+
+        def run(kind):
+            while not self._stopped.is_set():
+                try:
+                    self.watch(kind, timeout_seconds)
+                except Exception as e:
+                    print(f"Warning: {kind} watch failed, retrying: {e}", file=sys.stderr)
+                    self._stopped.wait(5)
+
+        def save_periodically():
+            while not self._stopped.wait(self.SNAPSHOT_INTERVAL):
+                try:
+                    self.save_snapshot()
+                except OSError as e:
+                    print(f"Warning: could not save the RBAC snapshot: {e}", file=sys.stderr)
+
+        for kind in self.list_funcs:
+            thread = threading.Thread(target=run, args=(kind,), daemon=True)
+            thread.start()
+            self._watch_threads.append(thread)
+        if self.snapshot_path:
+            threading.Thread(target=save_periodically, daemon=True).start()
+
+    def stop(self):
+        self._stopped.set()
+        self.save_snapshot()
+
+    def load_snapshot(self):
+        """
+        Load the cache from the snapshot file. Returns True on success.
+        """
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring unreadable RBAC snapshot {self.snapshot_path}: {e}", file=sys.stderr)
+            return False
+        if snapshot.get('version') != self.SNAPSHOT_VERSION:
+            return False
+
+        with self.lock:
+            for kind in self.list_funcs:
+                if not snapshot['resource_versions'].get(kind):
+                    return False
+            for data in snapshot['bindings']:
+                self._index_add(BindingRecord.from_dict(data))
+            self.resource_versions.update(snapshot['resource_versions'])
+            self.dirty = False
+        return True
+
+    def save_snapshot(self):
+        """
+        Atomically write the cache to the snapshot file, if one is configured
+        and the cache changed since it was last written.
+        """
+        if not self.snapshot_path:
+            return
+        with self.lock:
+            if not self.dirty and os.path.exists(self.snapshot_path):
+                return
+            self.dirty = False
+            snapshot = {
+                'version': self.SNAPSHOT_VERSION,
+                'resource_versions': dict(self.resource_versions),
+                'bindings': [
+                    record.to_dict()
+                    for records in self.bindings.values()
+                    for record in records.values()
+                ]
+            }
+        os.makedirs(os.path.dirname(self.snapshot_path) or '.', exist_ok=True)
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(tmp_path, self.snapshot_path)
+
+
+class TokenSecretCache:
+    """
+    Small username -> token Secret name cache.
+
+    Each entry remembers the Secret's resourceVersion so a cached name can be
+    trusted without re-checking its annotation as long as the Secret is
+    unchanged. Persisted to disk when a path is set.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, username):
+        with self.lock:
+            return self.entries.get(username)
+
+    def put(self, username, name, resource_version):
+        with self.lock:
+            if self.entries.get(username) == {'name': name, 'resource_version': resource_version}:
+                return
+            self.entries[username] = {'name': name, 'resource_version': resource_version}
+            self._save()
+
+    def drop(self, username):
+        with self.lock:
+            if self.entries.pop(username, None) is not None:
+                self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+class RequestedTokenCache:
+    """
+    In-memory cache of tokens minted with the TokenRequest API.
+
+    Keyed by (username, audiences, duration). A token is reused until 80% of
+    its lifetime has passed, like the kubelet does for projected tokens, so
+    repeated kubeconfig prints make no API calls. Tokens never go to disk;
+    the resident daemon keeps them for as long as it runs.
+    """
+    REFRESH_FRACTION = 0.8
 
-class KubernetesPermissionManager:
     def __init__(self):
-        # Load service account configuration from in-cluster config
-        config.load_incluster_config()
-        
-        # Initialize Kubernetes API clients
-        self.core_v1_api = client.CoreV1Api()
-        self.rbac_v1_api = client.RbacAuthorizationV1Api()
-        
-        # Get the current namespace where the script is running
-        with open('/var/run/secrets/kubernetes.io/serviceaccount/namespace', 'r') as f:
-          self.manager_namespace = f.read().strip()
-        
+        self.lock = threading.Lock()
+        self.entries = {}  # key -> (token, refresh_at, expires_at)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and time.time() < entry[1]:
+                return entry[0], entry[2]
+            self.entries.pop(key, None)
+            return None
+
+    def put(self, key, token, expires_at):
+        now = time.time()
+        refresh_at = now + (expires_at - now) * self.REFRESH_FRACTION
+        with self.lock:
+            self.entries[key] = (token, refresh_at, expires_at)
+
+    def drop(self, username):
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == username]:
+                del self.entries[key]
+
+
+def token_secret_ready(secret):
+    """
+    Whether the token controller has populated a token Secret.
+    """
+    data = secret.data if hasattr(secret, 'data') else (secret or {}).get('data')
+    return bool(data and data.get('token') and data.get('ca.crt'))
+
+
+class TokenReadinessWatcher:
+    """
+    Waits for service account token Secrets to be populated.
+
+    All waiters share one watch on the token Secrets of the manager
+    namespace, so onboarding many users (e.g. in a batch) costs a single
+    stream instead of a poll per user. The watch runs only while someone is
+    waiting.
+    """
+    def __init__(self, core_v1_api, namespace):
+        self.core_v1_api = core_v1_api
+        self.namespace = namespace
+        self.lock = threading.Lock()
+        self.waiters = {}
+        self.thread = None
+
+    def wait(self, name, timeout):
+        """
+        Block until the named token Secret has a token and ca.crt.
+
+        Args:
+            name (str): Name of the token Secret
+            timeout (float): Seconds to wait before giving up
+
+        Returns:
+            The populated V1Secret, or None on timeout
+        """
+        event = threading.Event()
+        with self.lock:
+            self.waiters.setdefault(name, []).append(event)
+        try:
+            # Registering before the GET means no update can slip in between
+            secret = self.core_v1_api.read_namespaced_secret(name=name, namespace=self.namespace)
+            if token_secret_ready(secret):
+                return secret
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, daemon=True)
+                    self.thread.start()
+            if not event.wait(timeout):
+                return None
+            return self.core_v1_api.read_namespaced_secret(name=name, namespace=self.namespace)
+        finally:
+            with self.lock:
+                events = self.waiters.get(name, [])
+                if event in events:
+                    events.remove(event)
+                if not events:
+                    self.waiters.pop(name, None)
+
+    def _notify(self, name):
+        with self.lock:
+            for event in self.waiters.get(name, []):
+                event.set()
+
+    def _recheck(self):
+        """
+        Re-read every awaited Secret; covers updates made before the watch started.
+        """
+        with self.lock:
+            names = list(self.waiters)
+        for name in names:
+            try:
+                secret = self.core_v1_api.read_namespaced_secret(name=name, namespace=self.namespace)
+            except ApiException:
+                continue
+            if token_secret_ready(secret):
+                self._notify(name)
+
+    def _run(self):
+        resource_version = None
+        while True:
+            with self.lock:
+                if not self.waiters:
+                    self.thread = None
+                    return
+            try:
+                if resource_version is None:
+                    # A one-item list is the cheapest way to get a current resourceVersion
+                    resource_version = self.core_v1_api.list_namespaced_secret(
+                        namespace=self.namespace,
+                        field_selector=f"type={SA_TOKEN_SECRET_TYPE}",
+                        limit=1
+                    ).metadata.resource_version
+                    self._recheck()
+                stream = watch.Watch()
+                for event in stream.stream(
+                    self.core_v1_api.list_namespaced_secret,
+                    namespace=self.namespace,
+                    field_selector=f"type={SA_TOKEN_SECRET_TYPE}",
+                    resource_version=resource_version,
+                    timeout_seconds=30,
+                    allow_watch_bookmarks=True
+                ):
+                    secret = event['object']
+                    resource_version = secret.metadata.resource_version
+                    if event['type'] in ('ADDED', 'MODIFIED') and token_secret_ready(secret):
+                        self._notify(secret.metadata.name)
+                    with self.lock:
+                        if not self.waiters:
+                            stream.stop()
+            except ApiException as e:
+                if e.status != 410:
+                    time.sleep(1)
+                resource_version = None
+            except Exception:
+                time.sleep(1)
+                resource_version = None
+
+
+class ExpiryScheduler:
+    """
+    Revokes time-bound grants when they expire.
+
+    Time-bound bindings carry the pmctl/expires label, so one labelled,
+    metadata-only list and then one watch per binding kind keep a heap of
+    pending expiries current, and a single loop sleeps until the earliest
+    one is due. Nothing is rescanned periodically. Heap entries are keyed by
+    the binding's uid and expiry: an event that changes neither only
+    updates the pending entry, and entries that no longer match it (the
+    grant was renewed, made permanent or recreated) are skipped when popped
+    and compacted away once they pile up. Bindings are deleted with uid and
+    resourceVersion preconditions, so a grant renewed after it was taken
+    off the heap is not revoked under its old expiry.
+    """
+    KINDS = ('RoleBinding', 'ClusterRoleBinding')
+    RETRY_SECONDS = 30
+    MAX_SLEEP = 60  # Re-check the clock at least this often
+
+    def __init__(self, manager, workers=8, dry_run=False):
+        self.manager = manager
+        self.workers = workers
+        self.dry_run = dry_run
+        self.watch_funcs = {
+            'RoleBinding': manager.rbac_v1_api.list_role_binding_for_all_namespaces,
+            'ClusterRoleBinding': manager.rbac_v1_api.list_cluster_role_binding
+        }
+        self.pending = {}  # (kind, namespace, name) -> (expires_at, uid, resourceVersion, labels)
+        self.heap = []  # (expires_at, uid, kind, namespace, name); outdated entries are skipped when popped
+        self.resource_versions = {}
+        self.counts = {}
+        self.cond = threading.Condition()
+        self._stopped = threading.Event()
+
+    def schedule(self, kind, metadata):
+        """
+        Track a binding from its metadata, or stop tracking it if it no longer expires.
+        """
+        key = (kind, metadata.get('namespace') or '', metadata['name'])
+        expires_at = binding_expiry(metadata.get('annotations'))
+        uid = metadata.get('uid') or ''
+        with self.cond:
+            if expires_at is None:
+                self.pending.pop(key, None)
+                return key
+            previous = self.pending.get(key)
+            self.pending[key] = (expires_at, uid, metadata.get('resourceVersion'), metadata.get('labels') or {})
+            if previous and previous[:2] == (expires_at, uid):
+                return key  # Same expiry, its heap entry still stands
+            heapq.heappush(self.heap, (expires_at, uid) + key)
+            self._compact()
+            self.cond.notify()
+        return key
+
+    def unschedule(self, kind, metadata):
+        with self.cond:
+            self.pending.pop((kind, metadata.get('namespace') or '', metadata['name']), None)
+
+    def _compact(self):
+        """
+        Drop outdated heap entries once they outnumber the live ones. Call with cond held.
+        """
+        if len(self.heap) > 2 * len(self.pending) + 1024:
+            self.heap = [(entry[0], entry[1]) + key for key, entry in self.pending.items()]
+            heapq.heapify(self.heap)
+
+    def relist(self, kind):
+        """
+        Replace the pending expiries of one kind with a fresh labelled list.
+        """
+        envelope = {}
+        seen = set()
+        for item in self.manager.stream_list(BINDING_LIST_PATHS[kind], metadata_only=True,
+                                             envelope=envelope, labelSelector=EXPIRING_SELECTOR):
+            seen.add(self.schedule(kind, item['metadata']))
+        with self.cond:
+            for key in [key for key in self.pending if key[0] == kind and key not in seen]:
+                del self.pending[key]
+            self.resource_versions[kind] = (envelope.get('metadata') or {}).get('resourceVersion')
+            self._compact()
+
+    def watch(self, kind, timeout_seconds):
+        """
+        Apply changes to time-bound bindings of one kind from the last known resourceVersion.
+
+        A 410 Gone is recovered with a relist.
+        """
+        stream = watch.Watch()
+        try:
+            for event in stream.stream(
+                self.watch_funcs[kind],
+                label_selector=EXPIRING_SELECTOR,
+                resource_version=self.resource_versions[kind],
+                timeout_seconds=timeout_seconds,
+                allow_watch_bookmarks=True
+            ):
+                metadata = event['raw_object'].get('metadata') or {}
+                if event['type'] == 'DELETED':
+                    self.unschedule(kind, metadata)
+                elif event['type'] != 'BOOKMARK':
+                    self.schedule(kind, metadata)
+                if metadata.get('resourceVersion'):
+                    self.resource_versions[kind] = metadata['resourceVersion']
+                if self._stopped.is_set():
+                    stream.stop()
+        except ApiException as e:
+            if e.status != 410:
+                raise
+            self.relist(kind)
+
+    def take_due(self, now):
+        """
+        Remove and return the bindings due at now, as (key, expires_at, uid, resourceVersion, labels).
+        """
+        due = []
+        with self.cond:
+            while self.heap and self.heap[0][0] <= now:
+                expires_at, uid, kind, namespace, name = heapq.heappop(self.heap)
+                key = (kind, namespace, name)
+                entry = self.pending.get(key)
+                if entry and entry[:2] == (expires_at, uid):
+                    del self.pending[key]
+                    due.append((key,) + entry)
+        return due
+
+    def revoke(self, key, expires_at, uid, resource_version, labels):
+        """
+        Delete one expired binding. Returns the outcome.
+        """
+        kind, namespace, name = key
+        parsed = parse_binding_name(name) or (None, None, None, None)
+        username = parsed[0] or labels.get(USER_LABEL)
+        permission = labels.get(PERMISSION_LABEL) or parsed[2]
+        where = f"in namespace {namespace}" if kind == 'RoleBinding' else "cluster-wide"
+        grant = f"{permission} permissions of {username} {where} (expired {format_expiry(expires_at)})"
+        if self.dry_run:
+            print(f"Would revoke {grant}")
+            return 'would revoke'
+
+        preconditions = client.V1Preconditions(uid=uid or None, resource_version=resource_version)
+        body = client.V1DeleteOptions(preconditions=preconditions)
+        try:
+            if kind == 'RoleBinding':
+                self.manager.rbac_v1_api.delete_namespaced_role_binding(name, namespace, body=body)
+            else:
+                self.manager.rbac_v1_api.delete_cluster_role_binding(name, body=body)
+        except ApiException as e:
+            if e.status == 404:
+                return 'already gone'
+            if e.status == 409:
+                # Changed since it was scheduled (e.g. renewed); the watch delivers the new version
+                return 'changed'
+            print(f"Error revoking {grant}: {e.reason}", file=sys.stderr)
+            with self.cond:
+                if key not in self.pending:
+                    retry_at = time.time() + self.RETRY_SECONDS
+                    self.pending[key] = (retry_at, uid, resource_version, labels)
+                    heapq.heappush(self.heap, (retry_at, uid) + key)
+            return 'failed'
+        print(f"Revoked {grant}")
+        return 'revoked'
+
+    def revoke_due(self, executor):
+        due = self.take_due(time.time())
+        for outcome in executor.map(lambda entry: self.revoke(*entry), due):
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        sys.stdout.flush()
+
+    def run_once(self):
+        """
+        Revoke the grants that have already expired. Returns the outcome counts.
+        """
+        for kind in self.KINDS:
+            self.relist(kind)
+        with CapturingExecutor(max_workers=self.workers) as executor:
+            self.revoke_due(executor)
+        return self.counts
+
+    def run(self, timeout_seconds=300):
+        """
+        Revoke grants as they expire until stopped.
+        """
+        for kind in self.KINDS:
+            self.relist(kind)
+        print(f"Watching {len(self.pending)} time-bound grant(s).", flush=True)
+
+        def watch_loop(kind):
+            while not self._stopped.is_set():
+                try:
+                    self.watch(kind, timeout_seconds)
+                except Exception as e:
+                    print(f"Warning: {kind} watch failed, retrying: {e}", file=sys.stderr)
+                    self._stopped.wait(5)
+
+        for kind in self.KINDS:
+            threading.Thread(target=watch_loop, args=(kind,), daemon=True).start()
+
+        with CapturingExecutor(max_workers=self.workers) as executor:
+            while not self._stopped.is_set():
+                self.revoke_due(executor)
+                with self.cond:
+                    delay = self.heap[0][0] - time.time() if self.heap else self.MAX_SLEEP
+                    if delay > 0:
+                        self.cond.wait(min(delay, self.MAX_SLEEP))
+
+    def stop(self):
+        self._stopped.set()
+        with self.cond:
+            self.cond.notify_all()
+
+
+class PermissionIndex:
+    """
+    RBAC rules compiled into a lookup table for local permission checks.
+
+    Every rule is expanded into (scope, apiGroup, resource, verb) keys, with
+    '*' kept as a value of its own. The scope is the namespace of a
+    RoleBinding, or '' for a ClusterRoleBinding, which applies in every
+    namespace. A check is then a few dictionary lookups (the request's
+    values and the wildcards), following the RBAC authorizer's matching
+    rules, instead of a rule scan or a SubjectAccessReview round trip.
+    """
+    def __init__(self):
+        self.resource_rules = {}  # (scope, group, resource, verb) -> [(resourceNames or None, source)]
+        self.url_rules = {}  # verb -> [(nonResourceURL, source)]
+        self.groups = {}  # resource -> API groups it appears in, to resolve unqualified names
+
+    def add_rules(self, scope, rules, source):
+        """
+        Add the rules of a role bound in scope ('' for cluster-wide).
+
+        Args:
+            scope (str): Namespace of the RoleBinding, or '' for a ClusterRoleBinding
+            rules (list): Policy rules as API dicts (apiGroups, resources, verbs, ...)
+            source (str): Description of the binding and role, reported by --why
+        """
+        for rule in rules:
+            verbs = rule.get('verbs') or []
+            if rule.get('nonResourceURLs'):
+                if not scope:  # Only effective through ClusterRoleBindings
+                    for verb in verbs:
+                        self.url_rules.setdefault(verb, []).extend((url, source) for url in rule['nonResourceURLs'])
+                continue
+            names = frozenset(rule['resourceNames']) if rule.get('resourceNames') else None
+            for group in rule.get('apiGroups') or []:
+                for resource in rule.get('resources') or []:
+                    self.groups.setdefault(resource.split('/')[0], set()).add(group)
+                    for verb in verbs:
+                        self.resource_rules.setdefault((scope, group, resource, verb), []).append((names, source))
+
+    def resolve(self, resource):
+        """
+        Split 'resource[.group][/subresource]' into (group, resource[/subresource]).
+
+        An unqualified resource is taken from the core group unless the
+        compiled rules only know it from a single other group.
+
+        Raises:
+            ValueError: If an unqualified resource appears in several non-core groups
+        """
+        base, _, subresource = resource.partition('/')
+        name, _, group = base.partition('.')
+        if not group:
+            groups = self.groups.get(name, set()) - {'*'}
+            if len(groups) > 1 and '' not in groups:
+                raise ValueError(f"'{name}' is ambiguous, qualify it with one of: "
+                                 f"{', '.join(f'{name}.{g}' for g in sorted(groups))}")
+            group = groups.pop() if len(groups) == 1 else ''
+        return group, f"{name}/{subresource}" if subresource else name
+
+    def check(self, verb, group, resource, namespace=None, name=None):
+        """
+        Return the source of a rule allowing the request, or None if it is denied.
+
+        Args:
+            verb (str): API verb (get, list, create, ...)
+            group (str): API group ('' for core)
+            resource (str): Resource, with '/subresource' if any
+            namespace (str): Namespace of the request; None for a cluster-wide request
+            name (str): Name of the object, matched against resourceNames
+        """
+        resources = [resource, '*']
+        if '/' in resource:
+            resources.append('*/' + resource.split('/', 1)[1])
+        for scope in ((namespace, '') if namespace else ('',)):
+            for rule_group in (group, '*'):
+                for rule_resource in resources:
+                    for rule_verb in (verb, '*'):
+                        for names, source in self.resource_rules.get((scope, rule_group, rule_resource, rule_verb), ()):
+                            if names is None or name in names:
+                                return source
+        return None
+
+    def check_url(self, verb, url):
+        """
+        Return the source of a rule allowing a non-resource request, or None.
+        """
+        for rule_verb in (verb, '*'):
+            for pattern, source in self.url_rules.get(rule_verb, ()):
+                if pattern in (url, '*') or (pattern.endswith('*') and url.startswith(pattern[:-1])):
+                    return source
+        return None
+
+
+def parse_can_query(line):
+    """
+    Parse one batch query for 'pmctl can'.
+
+    A query is 'user verb resource [namespace]' or a JSON object with the
+    fields user, verb, resource and optionally namespace and name.
+    Returns (user, verb, resource, namespace, name), or None for blank lines
+    and comments.
+
+    Raises:
+        ValueError: If the query is malformed
+    """
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('{'):
+        query = json.loads(line)
+        missing = [field for field in ('user', 'verb', 'resource') if not query.get(field)]
+        if missing:
+            raise ValueError(f"missing {', '.join(missing)}")
+        return query['user'], query['verb'], query['resource'], query.get('namespace'), query.get('name')
+    fields = line.split()
+    if len(fields) not in (3, 4):
+        raise ValueError("expected 'user verb resource [namespace]'")
+    return fields[0], fields[1], fields[2], fields[3] if len(fields) == 4 else None, None
+
+
+class TelegramSender:
+    """
+    Delivers files to a Telegram chat over one pooled HTTP session.
+
+    Rate limiting (429) is retried after the 'retry_after' the Bot API asks
+    for; connection errors and 5xx responses are retried with backoff.
+    """
+    def __init__(self, bot_token, chat_id, pool_size=4, max_attempts=5):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.url = f"https://api.telegram.org/bot{bot_token}/sendDocument"
+        self.chat_id = chat_id
+        self.max_attempts = max_attempts
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.request_exception = requests.exceptions.RequestException
+
+    def send(self, file_content, filename):
+        """
+        Send a file. Returns None on success, otherwise the error message.
+
+        Args:
+            file_content (str): The content of the file to send.
+            filename (str): The name of the file.
+        """
+        error = None
+        for attempt in range(self.max_attempts):
+            delay = 2 ** attempt
+            try:
+                response = self.session.post(
+                    self.url,
+                    data={"chat_id": self.chat_id},
+                    files={"document": (filename, StringIO(file_content), 'text/plain')},
+                    timeout=30
+                )
+            except self.request_exception as e:
+                error = str(e)
+            else:
+                if response.status_code == 429:
+                    try:
+                        delay = response.json().get('parameters', {}).get('retry_after', delay)
+                    except ValueError:
+                        delay = int(response.headers.get('Retry-After', delay))
+                    error = "rate limited by Telegram"
+                elif response.status_code >= 500:
+                    error = f"Telegram returned {response.status_code}"
+                else:
+                    try:
+                        response.raise_for_status()  # Raise an error for bad status codes
+                        return None
+                    except self.request_exception as e:
+                        return str(e)
+            if attempt + 1 < self.max_attempts:
+                time.sleep(delay)
+        return error
+
+
+class RequestPolicy:
+    """
+    Client-side throttling and retries shared by all API calls of a manager.
+
+    A token bucket limits requests to qps per second with bursts of up to
+    burst requests (qps 0 disables it). Requests rejected with 429 are
+    retried for every method; 5xx responses and connection errors are
+    retried for every method except DELETE, whose replay would report a
+    deletion that did happen as NotFound (replayed creates come back as
+    AlreadyExists, which callers handle). Retries use full-jitter
+    exponential backoff and wait at least the server's Retry-After.
+    """
+    RETRY_STATUSES = (500, 502, 503, 504)
+    MAX_RETRY_AFTER = 60
+
+    def __init__(self, qps=50.0, burst=100, max_retries=5, backoff=0.5, max_backoff=30.0):
+        self.qps = qps
+        self.burst = max(1, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Build a policy from PMCTL_QPS, PMCTL_BURST and PMCTL_MAX_RETRIES.
+        """
+        return cls(
+            qps=float(os.environ.get('PMCTL_QPS', 50)),
+            burst=int(os.environ.get('PMCTL_BURST', 100)),
+            max_retries=int(os.environ.get('PMCTL_MAX_RETRIES', 5))
+        )
+
+    def acquire(self):
+        """
+        Wait for a token. Tokens are reserved in arrival order, so waiting callers are served fairly.
+        """
+        if not self.qps:
+            return
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.qps)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.qps if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Seconds to wait before retry number attempt (0-based).
+        """
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if retry_after:
+            delay = max(delay, min(retry_after, self.MAX_RETRY_AFTER))
+        return delay
+
+    def retry_after(self, method, error):
+        """
+        Return the server's Retry-After (0 if none) when error is worth a retry, else None.
+        """
+        import urllib3
+
+        if isinstance(error, ApiException):
+            if error.status != 429 and (error.status not in self.RETRY_STATUSES or method == 'DELETE'):
+                return None
+            try:
+                return float((error.headers or {}).get('Retry-After') or 0)
+            except ValueError:
+                return 0  # An HTTP date; fall back to the backoff
+        if isinstance(error, urllib3.exceptions.MaxRetryError):
+            error = error.reason
+        if isinstance(error, (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError)):
+            return 0  # The request was never sent
+        if isinstance(error, (urllib3.exceptions.HTTPError, ConnectionError)) and method != 'DELETE':
+            return 0
+        return None
+
+    def install(self, api_client):
+        """
+        Wrap the REST client of an ApiClient so every request is throttled and retried.
+        """
+        request = api_client.rest_client.request
+        policy = self
+
+        def request_with_policy(method, url, *args, **kwargs):
+            attempt = 0
+            while True:
+                policy.acquire()
+                try:
+                    return request(method, url, *args, **kwargs)
+                except Exception as e:
+                    retry_after = policy.retry_after(method, e)
+                    if retry_after is None or attempt >= policy.max_retries:
+                        raise
+                time.sleep(policy.delay(attempt, retry_after))
+                attempt += 1
+
+        api_client.rest_client.request = request_with_policy
+
+
+def describe_request(method, url, query):
+    """
+    Map an API request to (verb, resource), e.g. ('list', 'rolebindings').
+    """
+    parts = [part for part in urlparse(url).path.split('/') if part]
+    # Strip /api/v1 or /apis/<group>/<version>
+    parts = parts[2:] if parts[:1] == ['api'] else parts[3:]
+    if len(parts) >= 3 and parts[0] == 'namespaces':
+        parts = parts[2:]  # namespaces/<namespace>/<resource>/...
+    resource = parts[0] if parts else ''
+    named = len(parts) > 1
+    if len(parts) > 2:
+        resource = f"{resource}/{parts[2]}"
+    verb = {
+        'GET': 'get' if named else ('watch' if query.get('watch') in ('true', 'True', True) else 'list'),
+        'POST': 'create',
+        'PUT': 'update',
+        'PATCH': 'patch',
+        'DELETE': 'delete' if named else 'deletecollection'
+    }.get(method, method.lower())
+    return verb, resource
+
+
+class ApiTracer:
+    """
+    Records every request made through an ApiClient.
+
+    Per (verb, resource) it keeps the call and page counts, response bytes,
+    time spent deserializing and a latency histogram; phases such as
+    importing the client or loading credentials are recorded as spans. The
+    result can be rendered as a summary table, Chrome trace-event JSON or
+    OpenMetrics text. In the daemon and in batches the histograms simply
+    accumulate over all commands.
+    """
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    MAX_EVENTS = 100000
+
+    def __init__(self, keep_events=True):
+        self.lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.keep_events = keep_events
+        self.requests = {}  # (verb, resource) -> stats
+        self.commands = {}  # command -> stats
+        self.phases = {}  # phase -> seconds
+        self.events = []
+        self._local = threading.local()
+
+    def _stats(self, table, key):
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = {'calls': 0, 'errors': 0, 'pages': 0, 'bytes': 0, 'seconds': 0.0,
+                                  'deserialize_seconds': 0.0, 'buckets': [0] * len(self.BUCKETS),
+                                  'samples': []}
+        return stats
+
+    def _observe(self, stats, seconds):
+        stats['calls'] += 1
+        stats['seconds'] += seconds
+        for index, bound in enumerate(self.BUCKETS):
+            if seconds <= bound:
+                stats['buckets'][index] += 1
+                break
+        if self.keep_events and len(stats['samples']) < self.MAX_EVENTS:
+            stats['samples'].append(seconds)
+
+    def _event(self, name, category, start, seconds, args):
+        if self.keep_events and len(self.events) < self.MAX_EVENTS:
+            event = {
+                'name': name, 'cat': category, 'ph': 'X', 'pid': os.getpid(),
+                'tid': threading.get_ident(), 'ts': round((start - self.started) * 1e6),
+                'dur': round(seconds * 1e6), 'args': args
+            }
+            self.events.append(event)
+            return event
+        return None
+
+    @contextmanager
+    def span(self, name):
+        """
+        Time a phase of the command, e.g. importing the client.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0.0) + seconds
+                self._event(name, 'phase', start, seconds, {})
+
+    def observe_command(self, command, seconds):
+        with self.lock:
+            self._observe(self._stats(self.commands, command), seconds)
+
+    def _count_streamed(self, response, stats, event):
+        """
+        Count the bytes of a streamed response (lists and watches, which the
+        API server sends chunked without a Content-Length) as they are read.
+        """
+        stream = response.stream
+        tracer = self
+
+        def counted_stream(*args, **kwargs):
+            for chunk in stream(*args, **kwargs):
+                with tracer.lock:
+                    stats['bytes'] += len(chunk)
+                    if event is not None:
+                        event['args']['bytes'] += len(chunk)
+                yield chunk
+
+        response.stream = counted_stream
+
+    def install(self, api_client):
+        """
+        Wrap the request and deserialize methods of an ApiClient.
+        """
+        request = api_client.request
+        deserialize = api_client.deserialize
+        tracer = self
+
+        def traced_request(method, url, query_params=None, *args, **kwargs):
+            query = dict(query_params or [])
+            verb, resource = describe_request(method, url, query)
+            start = time.perf_counter()
+            response, failed, size = None, False, 0
+            streamed = not kwargs.get('_preload_content', True)
+            try:
+                response = request(method, url, query_params, *args, **kwargs)
+                return response
+            except Exception as e:
+                failed = True
+                size = len(getattr(e, 'body', None) or '')
+                raise
+            finally:
+                seconds = time.perf_counter() - start
+                if response is not None and not streamed and isinstance(getattr(response, 'data', None), (bytes, str)):
+                    size = len(response.data)
+                tracer._local.key = (verb, resource)
+                with tracer.lock:
+                    stats = tracer._stats(tracer.requests, (verb, resource))
+                    tracer._observe(stats, seconds)
+                    stats['bytes'] += size
+                    stats['errors'] += failed
+                    stats['pages'] += 'limit' in query
+                    event = tracer._event(f"{verb} {resource}", 'api', start, seconds,
+                                          {'bytes': size, 'continue': bool(query.get('continue')), 'failed': failed})
+                if response is not None and streamed:
+                    tracer._count_streamed(response, stats, event)
+
+        def traced_deserialize(response, response_type):
+            start = time.perf_counter()
+            try:
+                return deserialize(response, response_type)
+            finally:
+                seconds = time.perf_counter() - start
+                key = getattr(tracer._local, 'key', None)
+                with tracer.lock:
+                    if key in tracer.requests:
+                        tracer.requests[key]['deserialize_seconds'] += seconds
+                    tracer._event(f"deserialize {response_type}", 'deserialize', start, seconds, {})
+
+        api_client.request = traced_request
+        api_client.deserialize = traced_deserialize
+
+    def _quantile(self, stats, quantile):
+        if stats['samples']:
+            samples = sorted(stats['samples'])
+            return samples[min(len(samples) - 1, int(quantile * len(samples)))]
+        # Histogram only (e.g. the daemon): report the bucket's upper bound
+        target, seen = quantile * stats['calls'], 0
+        for bound, count in zip(self.BUCKETS, stats['buckets']):
+            seen += count
+            if seen >= target and count:
+                return bound
+        return float('inf')
+
+    def render(self, output_format='table'):
+        with self.lock:
+            if output_format == 'chrome':
+                return json.dumps({'traceEvents': self.events, 'displayTimeUnit': 'ms'})
+            if output_format == 'openmetrics':
+                return self._render_openmetrics()
+            return self._render_table()
+
+    def _render_table(self):
+        lines = [f"{'VERB':<17}{'RESOURCE':<28}{'CALLS':>6}{'PAGES':>6}{'BYTES':>12}"
+                 f"{'TOTAL ms':>10}{'P50 ms':>9}{'P95 ms':>9}{'MAX ms':>9}{'DESER ms':>10}"]
+        for (verb, resource), stats in sorted(self.requests.items(), key=lambda item: -item[1]['seconds']):
+            slowest = max(stats['samples']) if stats['samples'] else self._quantile(stats, 1.0)
+            lines.append(
+                f"{verb:<17}{resource:<28}{stats['calls']:>6}{stats['pages']:>6}{stats['bytes']:>12}"
+                f"{stats['seconds'] * 1000:>10.1f}{self._quantile(stats, 0.5) * 1000:>9.1f}"
+                f"{self._quantile(stats, 0.95) * 1000:>9.1f}{slowest * 1000:>9.1f}"
+                f"{stats['deserialize_seconds'] * 1000:>10.1f}"
+            )
+        for command, stats in sorted(self.commands.items()):
+            lines.append(f"command {command}: {stats['calls']} runs, p50 {self._quantile(stats, 0.5) * 1000:.1f} ms, "
+                         f"p95 {self._quantile(stats, 0.95) * 1000:.1f} ms")
+        for phase, seconds in self.phases.items():
+            lines.append(f"{phase}: {seconds * 1000:.1f} ms")
+        api_seconds = sum(stats['seconds'] for stats in self.requests.values())
+        lines.append(f"total: {(time.perf_counter() - self.started) * 1000:.1f} ms, "
+                     f"{sum(stats['calls'] for stats in self.requests.values())} API calls taking {api_seconds * 1000:.1f} ms")
+        return '\n'.join(lines) + '\n'
+
+    def _render_openmetrics(self):
+        lines = []
+
+        def histogram(name, help_text, table, label_names):
+            lines.append(f"# TYPE {name} histogram")
+            lines.append(f"# HELP {name} {help_text}")
+            for key, stats in sorted(table.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                labels = ','.join(f'{label}="{value}"' for label, value in zip(label_names, key))
+                cumulative = 0
+                for bound, count in zip(self.BUCKETS, stats['buckets']):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {stats["calls"]}')
+                lines.append(f'{name}_count{{{labels}}} {stats["calls"]}')
+                lines.append(f'{name}_sum{{{labels}}} {stats["seconds"]:.6f}')
+
+        def counter(name, help_text, field):
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"# HELP {name} {help_text}")
+            for (verb, resource), stats in sorted(self.requests.items()):
+                lines.append(f'{name}_total{{verb="{verb}",resource="{resource}"}} {stats[field]}')
+
+        histogram('pmctl_api_request_duration_seconds', 'Kubernetes API request latency.',
+                  self.requests, ('verb', 'resource'))
+        counter('pmctl_api_response_bytes', 'Bytes received from the Kubernetes API.', 'bytes')
+        counter('pmctl_api_pages', 'Paginated list requests.', 'pages')
+        counter('pmctl_api_errors', 'Failed Kubernetes API requests.', 'errors')
+        counter('pmctl_api_deserialize_seconds', 'Time spent deserializing responses.', 'deserialize_seconds')
+        histogram('pmctl_command_duration_seconds', 'pmctl command latency.', self.commands, ('command',))
+        lines.append("# EOF")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, output_format='table', path=None):
+        """
+        Write the recorded profile to a file, or to stderr.
+        """
+        output = self.render(output_format)
+        if path:
+            with open(path, 'w') as f:
+                f.write(output)
+        else:
+            sys.__stderr__.write(output)
+
+
+def parse_trace_setting(value):
+    """
+    Parse --profile/PMCTL_TRACE: 'table', 'chrome', 'openmetrics', optionally
+    followed by ':<path>' (default: stderr). Any other value means 'table'.
+    """
+    output_format, _, path = (value or '').partition(':')
+    if output_format not in ('table', 'chrome', 'openmetrics'):
+        return 'table', None
+    return output_format, path or None
+
+
+class AccessReportWriter:
+    """
+    Writes access report rows as CSV or JSON Lines; can be shared between threads.
+    """
+    COLUMNS = ('user', 'scope', 'namespace', 'permission', 'binding')
+
+    def __init__(self, stream, output_format='csv', with_cluster=False):
+        self.stream = stream
+        self.output_format = output_format
+        self.columns = (('cluster',) if with_cluster else ()) + self.COLUMNS
+        self.lock = threading.Lock()
+        self.csv = csv.writer(stream, lineterminator='\n')
+        if output_format == 'csv':
+            self.csv.writerow(self.columns)
+
+    def write(self, row, cluster=None):
+        if cluster is not None:
+            row = (cluster,) + tuple(row)
+        with self.lock:
+            if self.output_format == 'csv':
+                self.csv.writerow(row)
+            else:
+                self.stream.write(json.dumps(dict(zip(self.columns, row))) + '\n')
+
+    def flush(self):
+        with self.lock:
+            self.stream.flush()
+
+
+class ClusterTarget:
+    """
+    One cluster of a multi-cluster run.
+    """
+    __slots__ = ('name', 'context', 'kubeconfig', 'namespace', 'server')
+
+    def __init__(self, name, context=None, kubeconfig=None, namespace=None, server=None):
+        self.name = name
+        self.context = context
+        self.kubeconfig = kubeconfig
+        self.namespace = namespace
+        self.server = server
+
+
+def resolve_cluster_targets(clusters=None, registry_path=None):
+    """
+    Turn --clusters / --cluster-registry into a list of ClusterTargets.
+
+    Without a registry, clusters are kubeconfig context names or glob
+    patterns. With a registry, they select entries of the registry (all
+    entries when not given). The registry is a YAML file:
+
+        clusters:
+          prod-eu:
+            context: prod-eu              # kubeconfig context (default: the name)
+            kubeconfig: ~/.kube/prod      # optional kubeconfig file
+            namespace: permission-manager # manager namespace (default: the context's)
+            server: https://prod-eu:6443  # address written to printed kubeconfigs
+
+    Raises:
+        ValueError: If the registry is invalid or nothing matches
+    """
+    patterns = split_list(clusters)
+    if registry_path:
+        import yaml
+
+        try:
+            with open(os.path.expanduser(registry_path), 'r') as f:
+                registry = (yaml.safe_load(f) or {}).get('clusters') or {}
+        except (OSError, yaml.YAMLError, AttributeError) as e:
+            raise ValueError(f"cannot read cluster registry '{registry_path}': {e}")
+        if not isinstance(registry, dict):
+            raise ValueError("'clusters' in the cluster registry must be a mapping")
+        targets = [
+            ClusterTarget(
+                name,
+                context=(entry or {}).get('context', name),
+                kubeconfig=os.path.expanduser(entry['kubeconfig']) if (entry or {}).get('kubeconfig') else None,
+                namespace=(entry or {}).get('namespace'),
+                server=(entry or {}).get('server')
+            )
+            for name, entry in registry.items()
+        ]
+    else:
+        load_kubernetes()
+        contexts, _ = config.list_kube_config_contexts()
+        targets = [ClusterTarget(context['name'], context=context['name']) for context in contexts]
+
+    if patterns:
+        targets = [target for target in targets if any(fnmatch.fnmatchcase(target.name, p) for p in patterns)]
+    if not targets:
+        raise ValueError(f"no cluster matches '{clusters}'")
+    return targets
+
+
+class KubernetesPermissionManager:
+    def __init__(self, pool_size=None, tracer=None, target=None):
+        """
+        Args:
+            pool_size (int): Minimum size of the connection pool
+            tracer (ApiTracer): Records the API calls when profiling
+            target (ClusterTarget): Cluster to manage in multi-cluster mode (default: the
+                in-cluster configuration, else the current kubeconfig context)
+        """
+        self.tracer = tracer
+        self.target = target
+        with self.span('import kubernetes'):
+            load_kubernetes()
+
+        configuration = client.Configuration()
+        with self.span('load config'):
+            if target:
+                self.manager_namespace = self.load_context(configuration, target.kubeconfig, target.context)
+                self.manager_namespace = target.namespace or self.manager_namespace
+            else:
+                try:
+                    # Load service account configuration from in-cluster config
+                    config.load_incluster_config(client_configuration=configuration)
+
+                    # Get the current namespace where the script is running
+                    with open('/var/run/secrets/kubernetes.io/serviceaccount/namespace', 'r') as f:
+                        self.manager_namespace = f.read().strip()
+                except config.ConfigException:
+                    # Outside a cluster (e.g. benchmarks, workstations): use the local kubeconfig
+                    self.manager_namespace = self.load_context(configuration, None, os.environ.get('PMCTL_CONTEXT'))
+                self.manager_namespace = os.environ.get('PMCTL_NAMESPACE', self.manager_namespace)
+
+        # Initialize Kubernetes API clients sharing one connection pool; PMCTL_POOL_SIZE
+        # sizes it explicitly, otherwise it grows to the number of workers
+        if os.environ.get('PMCTL_POOL_SIZE'):
+            configuration.connection_pool_maxsize = int(os.environ['PMCTL_POOL_SIZE'])
+        elif pool_size:
+            configuration.connection_pool_maxsize = max(pool_size, configuration.connection_pool_maxsize or 0)
+        self.api_client = client.ApiClient(configuration)
+        self.request_policy = RequestPolicy.from_env()
+        self.request_policy.install(self.api_client)
+        if tracer:
+            tracer.install(self.api_client)
+        self.core_v1_api = client.CoreV1Api(self.api_client)
+        self.rbac_v1_api = client.RbacAuthorizationV1Api(self.api_client)
+
         # Environment variables for configuration
-        self.control_plane_address = os.environ.get('CONTROL_PLANE_ADDRESS', 'https://kubernetes.default.svc')
-        self.cluster_name = os.environ.get('CLUSTER_NAME', 'default-cluster')
+        if target:
+            self.control_plane_address = target.server or configuration.host
+            self.cluster_name = target.name
+        else:
+            self.control_plane_address = os.environ.get('CONTROL_PLANE_ADDRESS', 'https://kubernetes.default.svc')
+            self.cluster_name = os.environ.get('CLUSTER_NAME', 'default-cluster')
         self.telegram_bot_api = os.environ.get('TELEGRAM_BOT_API')
         self.telegram_chat_id = os.environ.get('TELEGRAM_CHAT_ID')
+        self._telegram_sender = None
+        self._telegram_lock = threading.Lock()
+
+        # Optional directory for on-disk caches (e.g. the RBAC index snapshot)
+        self.cache_dir = os.environ.get('PMCTL_CACHE_DIR')
+        if self.cache_dir and target:
+            self.cache_dir = os.path.join(self.cache_dir, target.name)
+        self._rbac_index = None
+        self._rbac_index_lock = threading.Lock()
+        # Batch and daemon runs keep the RBAC index current with watches and answer
+        # binding lookups from it; one-off commands ask the API server directly
+        self.watch_rbac_index = False
+        self.token_secrets = TokenSecretCache(
+            os.path.join(self.cache_dir, 'token-secrets.json') if self.cache_dir else None
+        )
+        self.token_timeout = float(os.environ.get('PMCTL_TOKEN_TIMEOUT', '30'))
+
+        # ServiceAccounts in the manager namespace that are never pmctl users
+        self.protected_service_accounts = {'default'}
+        own_service_account = os.environ.get('PMCTL_SERVICE_ACCOUNT') or in_cluster_service_account()
+        if own_service_account and not target:
+            self.protected_service_accounts.add(own_service_account)
+        self.token_watcher = TokenReadinessWatcher(self.core_v1_api, self.manager_namespace)
+
+        # Kubeconfig credentials: 'secret' reads long-lived token Secrets, 'request'
+        # mints short-lived tokens with the TokenRequest API
+        self.token_mode = os.environ.get('PMCTL_TOKEN_MODE', 'secret')
+        self.requested_tokens = RequestedTokenCache()
+        self._cluster_ca = None
+
+    @staticmethod
+    def load_context(configuration, kubeconfig, context):
+        """
+        Load a kubeconfig context into configuration. Returns the context's namespace.
+        """
+        config.load_kube_config(config_file=kubeconfig, context=context, client_configuration=configuration)
+        contexts, active_context = config.list_kube_config_contexts(config_file=kubeconfig)
+        if context:
+            active_context = next(entry for entry in contexts if entry['name'] == context)
+        return active_context['context'].get('namespace', 'default')
+
+    def span(self, name):
+        """
+        Time a phase in the profile, if profiling is enabled.
+        """
+        return self.tracer.span(name) if self.tracer else nullcontext()
+
+    def rbac_index(self):
+        """
+        Return the RBAC binding index, synchronized with the cluster.
+
+        The index is filled on first use; with watch_rbac_index set, its
+        background watches are started then too.
+        """
+        with self._rbac_index_lock:
+            if self._rbac_index is None:
+                snapshot_path = None
+                if self.cache_dir:
+                    snapshot_path = os.path.join(self.cache_dir, 'rbac-index.json')
+                self._rbac_index = RbacBindingIndex(
+                    self.rbac_v1_api,
+                    snapshot_path=snapshot_path,
+                    catchup_seconds=int(os.environ.get('PMCTL_WATCH_CATCHUP_SECONDS', '1')),
+                    fetch=self.fetch_bindings
+                )
+            if self.watch_rbac_index:
+                self._rbac_index.start()
+            else:
+                self._rbac_index.sync()
+            return self._rbac_index
+
+    def stop_rbac_index(self):
+        """
+        Stop the RBAC index's watches and save its snapshot, if the index was used.
+        """
+        with self._rbac_index_lock:
+            if self._rbac_index is not None:
+                self._rbac_index.stop()
+
+    def stream_list(self, resource_path, path_params=None, metadata_only=False, envelope=None, **query):
+        """
+        Yield the items of a list as plain dicts, page by page.
+
+        Responses are read with _preload_content=False and parsed
+        incrementally, so no client models are built and memory holds a
+        single item and network chunk at a time. With metadata_only the API
+        server sends PartialObjectMetadata instead of the full objects.
+
+        Args:
+            resource_path (str): API path of the list, e.g. '/api/v1/namespaces/{namespace}/secrets'
+            path_params (dict): Values for the placeholders in resource_path
+            metadata_only (bool): Request a PartialObjectMetadataList
+            envelope (dict): Receives the list's top-level fields (e.g. metadata.resourceVersion)
+            **query: Extra query parameters such as fieldSelector or labelSelector
+
+        A page whose body breaks off is requested again and its items already
+        yielded are skipped. An expired continue token (410) is replaced by the
+        fresh one in the Status, resuming after the last complete page instead
+        of starting over; items changed in the meantime may then be seen in
+        their newer version.
+        """
+        import urllib3
+
+        continue_token = None
+        skip = 0  # Items of the current page already yielded
+        attempt = 0
+        while True:
+            query_params = [(key, value) for key, value in query.items() if value is not None]
+            query_params.append(('limit', 500))
+            if continue_token:
+                query_params.append(('continue', continue_token))
+            try:
+                response = self.api_client.call_api(
+                    resource_path, 'GET',
+                    path_params=path_params or {},
+                    query_params=query_params,
+                    header_params={'Accept': METADATA_ACCEPT if metadata_only else 'application/json'},
+                    auth_settings=['BearerToken'],
+                    _return_http_data_only=True,
+                    _preload_content=False
+                )
+            except ApiException as e:
+                fresh_token = None
+                if e.status == 410 and continue_token:
+                    try:
+                        fresh_token = (json.loads(e.body or '{}').get('metadata') or {}).get('continue')
+                    except ValueError:
+                        pass
+                if not fresh_token:
+                    raise
+                continue_token = fresh_token
+                continue
+
+            page = {}
+            complete = False
+            try:
+                for index, item in enumerate(iter_json_list(response.stream(LIST_CHUNK_SIZE), page)):
+                    if index >= skip:
+                        skip = index + 1
+                        yield item
+                response.drain_conn()
+                complete = True
+            except (urllib3.exceptions.HTTPError, ConnectionError, ValueError):
+                # The body broke off: request the same page again
+                if attempt >= self.request_policy.max_retries:
+                    raise
+                time.sleep(self.request_policy.delay(attempt))
+                attempt += 1
+                continue
+            finally:
+                # A partially read response cannot go back to the pool
+                response.release_conn() if complete else response.close()
+            if envelope is not None:
+                envelope.update(page)
+            continue_token = (page.get('metadata') or {}).get('continue')
+            skip = attempt = 0
+            if not continue_token:
+                break
+
+    def list_metadata(self, resource_path, path_params=None, **query):
+        """
+        Yield the metadata of every object in a list, page by page, without
+        transferring or deserializing the object bodies.
+
+        Args:
+            resource_path (str): API path of the list, e.g. '/api/v1/namespaces/{namespace}/secrets'
+            path_params (dict): Values for the placeholders in resource_path
+            **query: Extra query parameters such as fieldSelector or labelSelector
+        """
+        for item in self.stream_list(resource_path, path_params, metadata_only=True, **query):
+            yield item['metadata']
+
+    def list_bindings(self, kind, namespace=None, envelope=None, **query):
+        """
+        Yield BindingRecords of one kind from the raw JSON list, without client models.
+
+        Args:
+            kind (str): 'RoleBinding' or 'ClusterRoleBinding'
+            namespace (str): Only RoleBindings in this namespace
+            envelope (dict): Receives the list's top-level fields
+            **query: Extra query parameters such as labelSelector
+        """
+        if namespace:
+            path, path_params = NAMESPACED_ROLE_BINDING_PATH, {'namespace': namespace}
+        else:
+            path, path_params = BINDING_LIST_PATHS[kind], None
+        for item in self.stream_list(path, path_params, envelope=envelope, **query):
+            yield BindingRecord.from_json(kind, item)
+
+    def fetch_bindings(self, kind):
+        """
+        List every binding of one kind for the RBAC index. Returns (records, resourceVersion).
+        """
+        envelope = {}
+        records = list(self.list_bindings(kind, envelope=envelope))
+        return records, envelope['metadata']['resourceVersion']
+
+    def find_token_secret(self, username):
+        """
+        Resolve the token Secret of a user without listing every Secret.
+
+        Tries, in order: the cached name, the deterministic '<username>-token'
+        name, a metadata-only list of service account token Secrets and, if the
+        server cannot serve that, a full scan of the manager namespace.
+
+        Args:
+            username (str): Name of the user/service account
+
+        Returns:
+            V1Secret or None
+        """
+        def owned(secret):
+            annotations = secret.metadata.annotations or {}
+            return annotations.get(SA_NAME_ANNOTATION) == username
+
+        def get(name):
+            try:
+                return self.core_v1_api.read_namespaced_secret(name, self.manager_namespace)
+            except ApiException as e:
+                if e.status == 404:
+                    return None
+                raise
+
+        # Step 1: Cached name, trusted as long as the resourceVersion is unchanged
+        cached = self.token_secrets.get(username)
+        if cached:
+            secret = get(cached['name'])
+            if secret and (secret.metadata.resource_version == cached['resource_version'] or owned(secret)):
+                self.token_secrets.put(username, secret.metadata.name, secret.metadata.resource_version)
+                return secret
+            self.token_secrets.drop(username)
+
+        # Step 2: Deterministic name created by user_add
+        secret = get(f"{username}-token")
+        if secret and owned(secret):
+            self.token_secrets.put(username, secret.metadata.name, secret.metadata.resource_version)
+            return secret
+
+        # Step 3: Metadata-only list of token Secrets, then a full scan as a last resort
+        try:
+            for metadata in self.list_metadata(
+                '/api/v1/namespaces/{namespace}/secrets',
+                path_params={'namespace': self.manager_namespace},
+                fieldSelector=f"type={SA_TOKEN_SECRET_TYPE}"
+            ):
+                if (metadata.get('annotations') or {}).get(SA_NAME_ANNOTATION) == username:
+                    secret = get(metadata['name'])
+                    if secret and owned(secret):
+                        self.token_secrets.put(username, secret.metadata.name, secret.metadata.resource_version)
+                        return secret
+            return None
+        except ApiException as e:
+            print(f"Warning: metadata-only Secret list failed ({e.status}), scanning all Secrets.", file=sys.stderr)
+
+        for item in self.stream_list('/api/v1/namespaces/{namespace}/secrets',
+                                     {'namespace': self.manager_namespace}):
+            if item.get('type') == SA_TOKEN_SECRET_TYPE and \
+                    (item['metadata'].get('annotations') or {}).get(SA_NAME_ANNOTATION) == username:
+                secret = get(item['metadata']['name'])
+                if secret and owned(secret):
+                    self.token_secrets.put(username, secret.metadata.name, secret.metadata.resource_version)
+                    return secret
+        return None
+
+    def list_managed_bindings(self, username=None, scope=None, permission=None, namespace=None):
+        """
+        Yield pmctl-managed bindings, filtered server-side with label selectors.
+
+        Args:
+            username (str): Only bindings of this user
+            scope (str): 'namespace' or 'cluster'; both when not set
+            permission (str): Only bindings granting this permission
+            namespace (str): Only RoleBindings in this namespace
+        """
+        selector = label_selector(username=username, permission=permission)
+        if scope in (None, 'namespace'):
+            yield from self.list_bindings('RoleBinding', namespace, labelSelector=selector)
+        if scope in (None, 'cluster') and not namespace:
+            yield from self.list_bindings('ClusterRoleBinding', labelSelector=selector)
+
+    def find_user_bindings(self, username):
+        """
+        Return the pmctl-managed bindings of a user.
+
+        Batch and daemon runs answer from the RBAC index; one-off commands
+        ask the API server for the user's labelled bindings. Either way only
+        bindings carrying the user's pmctl labels count, so bindings made by
+        hand (or by pmctl before `migrate labels`) are left out.
+
+        Args:
+            username (str): Name of the user/service account
+        """
+        if self.watch_rbac_index:
+            label_value = user_label_value(username)
+            return [
+                binding
+                for binding in self.rbac_index().lookup(('ServiceAccount', self.manager_namespace, username))
+                if binding.labels.get(MANAGED_BY_LABEL) == MANAGED_BY_VALUE
+                and binding.labels.get(USER_LABEL) == label_value
+            ]
+        return list(self.list_managed_bindings(username=username))
+
+    def label_service_account(self, username):
+        """
+        Mark an existing ServiceAccount as a pmctl user. Returns True on success.
+        """
+        body = {'metadata': {'labels': {MANAGED_BY_LABEL: MANAGED_BY_VALUE}}}
+        try:
+            self.core_v1_api.patch_namespaced_service_account(username, self.manager_namespace, body)
+            return True
+        except ApiException as e:
+            print(f"Error labelling Service Account '{username}': {e.reason}")
+            return False
 
-    def send_file_to_telegram(self, file_content, filename):
+    def migrate_labels(self, workers=8, dry_run=False):
         """
-        Send a file to a Telegram chat using the Telegram Bot API.
+        Backfill pmctl labels on existing bindings that follow pmctl's naming scheme,
+        and on the ServiceAccounts of existing users.
+
+        A ServiceAccount counts as a user when a binding in pmctl's naming
+        scheme or a token Secret of pmctl's refers to it. 'default' and the
+        ServiceAccount pmctl runs as are never labelled.
 
         Args:
-            file_content (str): The content of the file to send.
-            filename (str): The name of the file.
+            workers (int): Number of concurrent PATCH requests
+            dry_run (bool): Only report the bindings that would be labelled
         """
-        if not self.telegram_bot_api or not self.telegram_chat_id:
-            print("Error: Telegram Bot API token or chat ID not set.")
-            return
+        counts = {'labelled': 0, 'up-to-date': 0, 'failed': 0}
+        usernames = set()
 
-        url = f"https://api.telegram.org/bot{self.telegram_bot_api}/sendDocument"
-        files = {
-            "document": (filename, StringIO(file_content), 'text/plain')
-        }
-        payload = {
-            "chat_id": self.telegram_chat_id
-        }
+        def patch(binding, labels):
+            body = {'metadata': {'labels': labels}}
+            try:
+                if binding.kind == 'RoleBinding':
+                    self.rbac_v1_api.patch_namespaced_role_binding(binding.name, binding.namespace, body)
+                else:
+                    self.rbac_v1_api.patch_cluster_role_binding(binding.name, body)
+                return 'labelled'
+            except ApiException as e:
+                print(f"Error labelling {binding.kind} {binding.namespace or ''}/{binding.name}: {e.reason}")
+                return 'failed'
+
+        with CapturingExecutor(max_workers=workers) as executor:
+            for kind in BINDING_LIST_PATHS:
+                pending = []
+                for binding in self.list_bindings(kind):
+                    parsed = parse_binding_name(binding.name)
+                    if not parsed:
+                        continue
+                    username, scope, permission, _ = parsed
+                    usernames.add(username)
+                    template = NAMESPACED_TEMPLATE if scope == 'namespace' else CLUSTER_TEMPLATE
+                    if binding.role_ref != f"{template}___{permission}":
+                        continue
+                    labels = binding_labels(username, scope, permission)
+                    if all(binding.labels.get(k) == v for k, v in labels.items()):
+                        counts['up-to-date'] += 1
+                    elif dry_run:
+                        print(f"Would label {kind} {binding.namespace or ''}/{binding.name}")
+                        counts['labelled'] += 1
+                    else:
+                        pending.append(executor.submit(patch, binding, labels))
+                    if len(pending) >= 500:
+                        for future in pending:
+                            counts[future.result()] += 1
+                        pending = []
+                for future in pending:
+                    counts[future.result()] += 1
+
+        action = "Would label" if dry_run else "Labelled"
+        print(f"{action} {counts['labelled']} bindings ({counts['up-to-date']} already labelled, {counts['failed']} failed).")
+
+        # Users: ServiceAccounts referenced by pmctl bindings or owning a pmctl token Secret
+        for metadata in self.list_metadata(
+            '/api/v1/namespaces/{namespace}/secrets',
+            path_params={'namespace': self.manager_namespace},
+            fieldSelector=f"type={SA_TOKEN_SECRET_TYPE}"
+        ):
+            annotated = (metadata.get('annotations') or {}).get(SA_NAME_ANNOTATION)
+            if annotated and metadata['name'] == f"{annotated}-token":
+                usernames.add(annotated)
+        user_counts = {'labelled': 0, 'up-to-date': 0, 'failed': 0}
+        unlabelled = []
+        for metadata in self.list_metadata(
+            '/api/v1/namespaces/{namespace}/serviceaccounts',
+            path_params={'namespace': self.manager_namespace}
+        ):
+            name = metadata['name']
+            if name not in usernames or name in self.protected_service_accounts:
+                continue
+            if (metadata.get('labels') or {}).get(MANAGED_BY_LABEL) == MANAGED_BY_VALUE:
+                user_counts['up-to-date'] += 1
+            elif dry_run:
+                print(f"Would label ServiceAccount {self.manager_namespace}/{name}")
+                user_counts['labelled'] += 1
+            else:
+                unlabelled.append(name)
+        with CapturingExecutor(max_workers=workers) as executor:
+            for labelled in executor.map(self.label_service_account, unlabelled):
+                user_counts['labelled' if labelled else 'failed'] += 1
+        print(f"{action} {user_counts['labelled']} users ({user_counts['up-to-date']} already labelled, "
+              f"{user_counts['failed']} failed).")
+        if counts['failed'] or user_counts['failed']:
+            sys.exit(1)
+
+    def iter_access(self, usernames=None, namespaces=None, permissions=None):
+        """
+        Yield one (user, scope, namespace, permission, binding) row per grant.
+
+        Every RoleBinding and ClusterRoleBinding is streamed once, page by
+        page, and inverted on the fly: a row is produced for each
+        ServiceAccount subject of the manager namespace, so the cost is
+        proportional to the number of bindings and memory stays flat.
+
+        Args:
+            usernames (list): Only rows of these users
+            namespaces (list): Only RoleBindings in these namespaces (cluster grants are skipped)
+            permissions (list): Only rows granting these permissions
+        """
+        if namespaces:
+            scans = [('RoleBinding', namespace) for namespace in namespaces]
+        else:
+            scans = [('RoleBinding', None), ('ClusterRoleBinding', None)]
+        usernames = set(usernames or [])
+        permissions = set(permissions or [])
+
+        for kind, namespace in scans:
+            for binding in self.list_bindings(kind, namespace):
+                permission = binding_permission(binding)
+                if permissions and permission not in permissions:
+                    continue
+                for subject_kind, name, subject_namespace in binding.subjects:
+                    if subject_kind != 'ServiceAccount' or subject_namespace != self.manager_namespace:
+                        continue
+                    if usernames and name not in usernames:
+                        continue
+                    yield (
+                        name,
+                        'namespace' if kind == 'RoleBinding' else 'cluster',
+                        binding.namespace or '',
+                        permission,
+                        binding.name
+                    )
+
+    def report(self, usernames=None, namespaces=None, permissions=None, output_format='csv', writer=None, cluster=None):
+        """
+        Write the user -> namespace -> permission matrix to stdout
+
+        Rows are written as each page of bindings arrives, in API order.
+
+        Args:
+            usernames (list): Only rows of these users
+            namespaces (list): Only RoleBindings in these namespaces
+            permissions (list): Only rows granting these permissions
+            output_format (str): csv or jsonl
+            writer (AccessReportWriter): Shared writer (multi-cluster reports)
+            cluster (str): Value of the cluster column, if the writer has one
+        """
+        if writer is None:
+            writer = AccessReportWriter(sys.stdout, output_format)
 
         try:
-            response = requests.post(url, data=payload, files=files)
-            response.raise_for_status()  # Raise an error for bad status codes
-            print("File sent to Telegram successfully.")
-        except requests.exceptions.RequestException as e:
-            print(f"Error sending file to Telegram: {e}")
+            for row in self.iter_access(usernames, namespaces, permissions):
+                writer.write(row, cluster)
+            writer.flush()
+        except ApiException as e:
+            print(f"Error generating access report: {e.reason}", file=sys.stderr)
+            sys.exit(1)
+
+    def telegram(self, pool_size=4):
+        """
+        Return the shared Telegram sender, or None if Telegram is not configured.
+        """
+        if not self.telegram_bot_api or not self.telegram_chat_id:
+            return None
+        with self._telegram_lock:
+            if self._telegram_sender is None:
+                self._telegram_sender = TelegramSender(self.telegram_bot_api, self.telegram_chat_id, pool_size)
+            return self._telegram_sender
 
-    def user_add(self, username):
+    def user_add(self, username, timeout=None, token_secret=None):
         """
         Create a service account for the given username and ensure it has a token.
+
+        Returns once the token controller has populated the token Secret.
         
         Args:
             username (str): Name of the user/service account to create.
+            timeout (float): Seconds to wait for the token (default: PMCTL_TOKEN_TIMEOUT)
+            token_secret (bool): Create a long-lived token Secret (default: unless
+                PMCTL_TOKEN_MODE is 'request', where kubeconfigs use minted tokens)
         """
         try:
-            # Step 1: Create Service Account if it doesn't exist
+            # Step 1: Create Service Account if it doesn't exist, labelled as a pmctl user
             sa_manifest = client.V1ServiceAccount(
-                metadata=client.V1ObjectMeta(name=username)
+                metadata=client.V1ObjectMeta(name=username, labels={MANAGED_BY_LABEL: MANAGED_BY_VALUE})
             )
             self.core_v1_api.create_namespaced_service_account(
                 namespace=self.manager_namespace, 
@@ -76,68 +2359,77 @@ class KubernetesPermissionManager:
         except ApiException as e:
             if e.status == 409:
                 print(f"Service Account '{username}' already exists.")
+                if username not in self.protected_service_accounts:
+                    self.label_service_account(username)
             else:
                 print(f"Unexpected error creating Service Account: {e}")
                 sys.exit(1)
-                
-        time.sleep(1)
+
+        if token_secret is None:
+            token_secret = self.token_mode != 'request'
+        if not token_secret:
+            return
+
         # Step 2: Check if a Secret with a token exists for the ServiceAccount
         try:
-            secrets = self.core_v1_api.list_namespaced_secret(self.manager_namespace)
-            token_secret_name = None
+            token_secret = self.find_token_secret(username)
+            token_secret_name = token_secret.metadata.name if token_secret else None
 
-            for secret in secrets.items:
-                if secret.metadata.annotations and \
-                   secret.metadata.annotations.get("kubernetes.io/service-account.name") == username:
-                    token_secret_name = secret.metadata.name
-                    break  # Stop if we find a matching token Secret
-            
             # Step 3: If no token Secret is found, create one
             if not token_secret_name:
                 token_secret_name = f"{username}-token"
                 secret_manifest = client.V1Secret(
                     metadata=client.V1ObjectMeta(
                         name=token_secret_name,
-                        annotations={"kubernetes.io/service-account.name": username}
+                        annotations={SA_NAME_ANNOTATION: username}
                     ),
-                    type="kubernetes.io/service-account-token"
+                    type=SA_TOKEN_SECRET_TYPE
                 )
-                self.core_v1_api.create_namespaced_secret(
+                created = self.core_v1_api.create_namespaced_secret(
                     namespace=self.manager_namespace, 
                     body=secret_manifest
                 )
+                self.token_secrets.put(username, token_secret_name, created.metadata.resource_version)
                 print(f"Token Secret '{token_secret_name}' created for ServiceAccount '{username}'.")
             else:
                 print(f"Token Secret '{token_secret_name}' already exists for ServiceAccount '{username}'.")
 
+            # Step 4: Wait for the token controller to populate the Secret
+            if not (token_secret and token_secret_ready(token_secret)):
+                timeout = self.token_timeout if timeout is None else timeout
+                if not self.token_watcher.wait(token_secret_name, timeout):
+                    print(f"Error: Token Secret '{token_secret_name}' was not populated within {timeout:g}s.")
+                    sys.exit(1)
+
         except ApiException as e:
             print(f"Error while checking/creating token Secret: {e}")
             sys.exit(1)
 
-    def user_remove(self, username):
+    def user_remove(self, username, cascade=False, assume_yes=False, dry_run=False, workers=8):
         """
         Remove a service account and its associated token Secret for the given username.
 
         Args:
             username (str): Name of the user/service account to remove.
+            cascade (bool): Also delete all of the user's bindings
+            assume_yes (bool): Skip the confirmation prompt (cascade only)
+            dry_run (bool): Only show what would be deleted (cascade only)
+            workers (int): Maximum concurrent deletions (cascade only)
         """
+        if cascade:
+            return self.user_remove_cascade(username, assume_yes, dry_run, workers)
+
         try:
             # Step 1: Find and Delete the Service Account Token Secret
-            secrets = self.core_v1_api.list_namespaced_secret(self.manager_namespace)
-            deleted_secret = None
-
-            for secret in secrets.items:
-                if secret.metadata.annotations and \
-                secret.metadata.annotations.get("kubernetes.io/service-account.name") == username:
-                    self.core_v1_api.delete_namespaced_secret(
-                        name=secret.metadata.name,
-                        namespace=self.manager_namespace
-                    )
-                    deleted_secret = secret.metadata.name
-                    print(f"Deleted Token Secret '{deleted_secret}' for ServiceAccount '{username}'.")
-                    break  # Stop after deleting the first matching token
-
-            if not deleted_secret:
+            token_secret = self.find_token_secret(username)
+            if token_secret:
+                self.core_v1_api.delete_namespaced_secret(
+                    name=token_secret.metadata.name,
+                    namespace=self.manager_namespace
+                )
+                self.token_secrets.drop(username)
+                print(f"Deleted Token Secret '{token_secret.metadata.name}' for ServiceAccount '{username}'.")
+            else:
                 print(f"No token Secret found for ServiceAccount '{username}', skipping Secret deletion.")
 
             # Step 2: Delete the Service Account
@@ -145,8 +2437,15 @@ class KubernetesPermissionManager:
                 name=username,
                 namespace=self.manager_namespace
             )
+            self.requested_tokens.drop(username)  # Tokens bound to the deleted ServiceAccount are invalid
             print(f"Service Account '{username}' removed successfully.")
 
+            # Step 3: Warn about bindings that still reference the user
+            remaining = sum(1 for _ in self.list_managed_bindings(username=username))
+            if remaining:
+                print(f"Warning: {remaining} role binding(s) still grant permissions to '{username}'. "
+                      f"Use 'pmctl user describe {username}' to list them.")
+
         except ApiException as e:
             if e.status == 404:
                 print(f"Error: Service Account '{username}' does not exist.")
@@ -156,17 +2455,217 @@ class KubernetesPermissionManager:
                 sys.exit(1)
 
 
-    def user_list(self):
+    def find_owned_bindings(self, username):
+        """
+        Find all pmctl bindings of a user in one pass over every binding.
+
+        Matches the user's label as well as unlabelled bindings that follow
+        pmctl's naming scheme, so bindings created by older versions are
+        included.
+
+        Returns:
+            list: BindingRecords of the user
+        """
+        owned = []
+        for kind in BINDING_LIST_PATHS:
+            for binding in self.list_bindings(kind):
+                if binding.labels.get(MANAGED_BY_LABEL) == MANAGED_BY_VALUE:
+                    if binding.labels.get(USER_LABEL) == user_label_value(username):
+                        owned.append(binding)
+                    continue
+                parsed = parse_binding_name(binding.name)
+                if parsed and parsed[0] == username:
+                    owned.append(binding)
+        return owned
+
+    def user_remove_cascade(self, username, assume_yes=False, dry_run=False, workers=8):
+        """
+        Remove a user together with all of their RoleBindings and ClusterRoleBindings.
+
+        The bindings are found in a single pass. Where all of a user's
+        bindings in a namespace (or at cluster scope) carry pmctl labels they
+        are removed with one deletecollection call; the others are deleted one
+        by one. Deletions run concurrently, and objects that are already gone
+        are counted rather than treated as errors.
+
+        Args:
+            username (str): Name of the user/service account to remove
+            assume_yes (bool): Skip the confirmation prompt
+            dry_run (bool): Only show what would be deleted
+            workers (int): Maximum concurrent deletions
+        """
+        try:
+            bindings = self.find_owned_bindings(username)
+            token_secret = self.find_token_secret(username)
+        except ApiException as e:
+            print(f"Error looking up user '{username}': {e.reason}")
+            sys.exit(1)
+
+        # Group by namespace ('' for ClusterRoleBindings)
+        groups = {}
+        for binding in bindings:
+            groups.setdefault(binding.namespace or '', []).append(binding)
+        namespaces = sorted(namespace for namespace in groups if namespace)
+
+        print(f"User '{username}': {len(bindings)} binding(s) in {len(namespaces)} namespace(s)"
+              f"{' and at cluster scope' if '' in groups else ''}, "
+              f"token Secret {'found' if token_secret else 'not found'}.")
+        if dry_run:
+            for binding in bindings:
+                print(f"Would delete {binding.kind} {binding.namespace + '/' if binding.namespace else ''}{binding.name}")
+            if token_secret:
+                print(f"Would delete Secret {token_secret.metadata.name}")
+            print(f"Would delete ServiceAccount {username}")
+            return
+
+        if not assume_yes:
+            confirm = ask(f"Are you sure you want to remove {username} and all of their permissions? (y/N): ")
+            if confirm.lower() != 'y':
+                print("Operation cancelled.")
+                return
+
+        selector = label_selector(username=username)
+        counts = {'deleted': 0, 'already gone': 0, 'failed': 0}
+        lock = threading.Lock()
+
+        def count(outcome, amount=1):
+            with lock:
+                counts[outcome] += amount
+
+        def delete_group(namespace):
+            group = groups[namespace]
+            if all(binding.labels.get(USER_LABEL) == user_label_value(username) for binding in group):
+                try:
+                    if namespace:
+                        self.rbac_v1_api.delete_collection_namespaced_role_binding(namespace, label_selector=selector)
+                    else:
+                        self.rbac_v1_api.delete_collection_cluster_role_binding(label_selector=selector)
+                    count('deleted', len(group))
+                    return
+                except ApiException as e:
+                    if e.status not in (403, 405):
+                        print(f"Error deleting bindings of {username} in {namespace or 'cluster scope'}: {e.reason}")
+                        count('failed', len(group))
+                        return
+                    # deletecollection not allowed: fall back to single deletes
+            for binding in group:
+                delete_binding(binding)
+
+        def delete_binding(binding):
+            try:
+                if binding.kind == 'RoleBinding':
+                    self.rbac_v1_api.delete_namespaced_role_binding(binding.name, binding.namespace)
+                else:
+                    self.rbac_v1_api.delete_cluster_role_binding(binding.name)
+                count('deleted')
+            except ApiException as e:
+                if e.status == 404:
+                    count('already gone')
+                else:
+                    print(f"Error deleting {binding.kind} {binding.name}: {e.reason}")
+                    count('failed')
+
+        # Every group is one task; the per-binding fallback stays on the group's worker
+        with CapturingExecutor(max_workers=max(1, workers)) as executor:
+            list(executor.map(delete_group, sorted(groups)))
+
+        # The Secret and the ServiceAccount go last, once no binding refers to them
+        for kind, name, delete in [
+            ('Secret', token_secret.metadata.name if token_secret else None, self.core_v1_api.delete_namespaced_secret),
+            ('ServiceAccount', username, self.core_v1_api.delete_namespaced_service_account)
+        ]:
+            if not name:
+                continue
+            try:
+                delete(name=name, namespace=self.manager_namespace)
+                counts['deleted'] += 1
+            except ApiException as e:
+                if e.status == 404:
+                    counts['already gone'] += 1
+                else:
+                    print(f"Error deleting {kind} {name}: {e.reason}")
+                    counts['failed'] += 1
+        self.token_secrets.drop(username)
+        self.requested_tokens.drop(username)  # Tokens bound to the deleted ServiceAccount are invalid
+
+        print(f"Removed user '{username}': {counts['deleted']} object(s) deleted, "
+              f"{counts['already gone']} already gone, {counts['failed']} failed.")
+        if counts['failed']:
+            sys.exit(1)
+
+    def access_by_user(self, usernames=None):
+        """
+        Collect every user's grants from a single pass over all bindings.
+
+        Returns:
+            dict: username -> {'namespaces': {namespace: [permissions]}, 'cluster': [permissions]}
+        """
+        access = {}
+        for username, scope, namespace, permission, _ in self.iter_access(usernames=usernames):
+            grants = access.setdefault(username, {'namespaces': {}, 'cluster': []})
+            if scope == 'cluster':
+                grants['cluster'].append(permission)
+            else:
+                grants['namespaces'].setdefault(namespace, []).append(permission)
+        return access
+
+    def user_list(self, selector=None, prefix=None, output='text', with_permissions=False):
         """
         List all service accounts in the manager's namespace
+
+        The list is read page by page (metadata only) and each page is
+        printed as it arrives. The label selector is applied by the API
+        server; the name prefix is applied locally.
+
+        Args:
+            selector (str): Label selector
+            prefix (str): Only users whose name starts with this prefix
+            output (str): text, name, json or yaml
+            with_permissions (bool): Add each user's grants, from one pass over all bindings
         """
-        sa_list = self.core_v1_api.list_namespaced_service_account(namespace=self.manager_namespace)
-        if not sa_list.items:
+        access = self.access_by_user() if with_permissions else None
+
+        count = 0
+        for metadata in self.list_metadata(
+            '/api/v1/namespaces/{namespace}/serviceaccounts',
+            path_params={'namespace': self.manager_namespace},
+            labelSelector=selector
+        ):
+            name = metadata['name']
+            if prefix and not name.startswith(prefix):
+                continue
+            item = {'name': name, 'created': metadata.get('creationTimestamp')}
+            if metadata.get('labels'):
+                item['labels'] = metadata['labels']
+            if access is not None:
+                item['permissions'] = access.get(name, {'namespaces': {}, 'cluster': []})
+
+            if output == 'name':
+                line = name
+            elif output == 'json':
+                line = ('[' if count == 0 else ',') + '\n  ' + json.dumps(item)
+            elif output == 'yaml':
+                import yaml
+                line = yaml.safe_dump([item], default_flow_style=False).rstrip('\n')
+            else:
+                if count == 0:
+                    print("Service Accounts:")
+                line = f"- {name}"
+                if access is not None:
+                    grants = item['permissions']
+                    summary = [f"{ns}:{','.join(perms)}" for ns, perms in sorted(grants['namespaces'].items())]
+                    if grants['cluster']:
+                        summary.append(f"cluster:{','.join(grants['cluster'])}")
+                    line += f"  {' '.join(summary) or '-'}"
+            print(line)
+            count += 1
+
+        if output == 'json':
+            print(']' if count else '[]')
+        elif output == 'yaml' and not count:
+            print('[]')
+        elif output == 'text' and not count:
             print("No service accounts found.")
-        else:
-            print("Service Accounts:")
-            for sa in sa_list.items:
-                print(f"- {sa.metadata.name}")
 
     def user_describe(self, username):
         """
@@ -175,270 +2674,875 @@ class KubernetesPermissionManager:
         Args:
             username (str): Name of the user/service account to describe
         """
-        # Collect Namespace Role Bindings
         ns_permissions = {}
-        rb_list = []
-        continue_token = None  # Used for pagination
-        while True:
-            role_binding_list = self.rbac_v1_api.list_role_binding_for_all_namespaces(limit=100, _continue=continue_token)
-            for rb in role_binding_list.items:
-                if rb.subjects:
-                    for sub in rb.subjects:
-                        if sub.name == username:
-                            rb_list.append(rb)
-                            break
-            continue_token = role_binding_list.metadata._continue
-            if not continue_token:
-                break
-
-        for rb in rb_list:
-            namespace = rb.metadata.namespace
-            role_ref = rb.role_ref.name
-            
-            ns_permissions.setdefault(namespace, {})
-            ns_permissions[namespace][role_ref.split('___')[1]] = True
-
         cluster_permissions = {}
 
-        # Fetch all ClusterRoleBindings
-        crb_list = self.rbac_v1_api.list_cluster_role_binding()
-
-        # Filter for the user's ClusterRoleBindings
-        for crb in crb_list.items:
-            if crb.subjects:
-                for sub in crb.subjects:
-                    if sub.name == username:
-                        role_ref = crb.role_ref.name
-                        if "___" in role_ref:
-                            cluster_permissions[role_ref.split('___')[1]] = True
-                        else:
-                            cluster_permissions[role_ref] = True  # Fallback if no "___" delimiter
-                        break  # Stop checking other subjects in this CRB once found
-
+        for binding in self.find_user_bindings(username):
+            expires_at = binding.annotations.get(EXPIRES_AT_ANNOTATION)
+            if binding.kind == 'RoleBinding':
+                ns_permissions.setdefault(binding.namespace, {})
+                ns_permissions[binding.namespace][binding_permission(binding)] = expires_at
+            else:
+                cluster_permissions[binding_permission(binding)] = expires_at
 
         # Print Namespace Permissions
         if ns_permissions:
             print("Namespace:")
             for ns, perms in ns_permissions.items():
                 print(f"  - {ns}:")
-                for perm, _ in perms.items():
-                    print(f"      - {perm}")
+                for perm, expires_at in perms.items():
+                    print(f"      - {perm}" + (f" (expires {expires_at})" if expires_at else ''))
 
         # Print Cluster Permissions
         if cluster_permissions:
             print("Cluster:")
-            for perm, _ in cluster_permissions.items():
-                print(f"  - {perm}")
+            for perm, expires_at in cluster_permissions.items():
+                print(f"  - {perm}" + (f" (expires {expires_at})" if expires_at else ''))
+
+    def permission_indexes(self, usernames):
+        """
+        Compile the bindings of users and the rules of the roles they reference.
+
+        Every user's bindings come from find_user_bindings, so the same
+        pmctl-managed bindings count in one-off, batch and daemon runs, and a
+        one-off query only fetches the bindings of its user. Bindings made by
+        hand and bindings that grant access through groups
+        (system:serviceaccounts, system:serviceaccounts:<namespace>,
+        system:authenticated) are not evaluated. The users' bindings and each
+        referenced role are fetched once, concurrently.
+
+        Returns:
+            dict: username -> PermissionIndex
+        """
+        usernames = set(usernames)
+        with CapturingExecutor(max_workers=max(1, min(8, len(usernames)))) as executor:
+            bindings = dict(zip(usernames, executor.map(self.find_user_bindings, usernames)))
+
+        def fetch(role):
+            kind, namespace, name = role
+            try:
+                if kind == 'Role':
+                    return role, self.rbac_v1_api.read_namespaced_role(name, namespace).rules or []
+                return role, self.rbac_v1_api.read_cluster_role(name).rules or []
+            except ApiException as e:
+                if e.status != 404:
+                    raise
+                return role, None
+
+        def role_of(binding):
+            if binding.role_kind == 'Role':
+                return 'Role', binding.namespace, binding.role_ref
+            return 'ClusterRole', None, binding.role_ref
+
+        roles = {role_of(binding) for user_bindings in bindings.values() for binding in user_bindings}
+        with CapturingExecutor(max_workers=max(1, min(8, len(roles)))) as executor:
+            role_rules = {
+                role: None if rules is None else self.api_client.sanitize_for_serialization(rules)
+                for role, rules in executor.map(fetch, roles)
+            }
+
+        indexes = {}
+        for username, user_bindings in bindings.items():
+            permissions = indexes[username] = PermissionIndex()
+            for binding in user_bindings:
+                scope = binding.namespace if binding.kind == 'RoleBinding' else None
+                role = role_of(binding)
+                rules = role_rules[role]
+                source = (f"{binding.kind} {binding.namespace + '/' if scope else ''}{binding.name} -> "
+                          f"{role[0] if rules is not None else 'missing ' + role[0]} {binding.role_ref}")
+                permissions.add_rules(scope or '', rules or [], source)
+        return indexes
+
+    def access_review(self, username, verb, group, resource, namespace=None, name=None):
+        """
+        Ask the API server with a SubjectAccessReview whether the user's service account may do something.
+
+        The review carries the groups the API server gives every service
+        account, so access granted through those groups shows up as a
+        mismatch with the local evaluation rather than being hidden.
+        """
+        spec = client.V1SubjectAccessReviewSpec(
+            user=f"system:serviceaccount:{self.manager_namespace}:{username}",
+            groups=['system:serviceaccounts', f"system:serviceaccounts:{self.manager_namespace}",
+                    'system:authenticated']
+        )
+        if resource.startswith('/'):
+            spec.non_resource_attributes = client.V1NonResourceAttributes(path=resource, verb=verb)
+        else:
+            base, _, subresource = resource.partition('/')
+            spec.resource_attributes = client.V1ResourceAttributes(
+                namespace=namespace, verb=verb, group=group, resource=base,
+                subresource=subresource or None, name=name
+            )
+        review = client.AuthorizationV1Api(self.api_client).create_subject_access_review(
+            client.V1SubjectAccessReview(spec=spec)
+        )
+        return bool(review.status.allowed)
+
+    def can(self, queries, why=False, verify=0, output_format='text', single=False):
+        """
+        Evaluate permission queries locally from the users' compiled bindings
+
+        Args:
+            queries (list): (user, verb, resource, namespace, name) tuples
+            why (bool): Show the binding and role allowing each request
+            verify (int): Cross-check this many sampled answers with SubjectAccessReview
+            output_format (str): text or json
+            single (bool): Print only 'yes'/'no' and exit with status 1 when denied, like 'kubectl auth can-i'
+        """
+        try:
+            indexes = self.permission_indexes(query[0] for query in queries)
+        except ApiException as e:
+            print(f"Error reading bindings or roles: {e.reason}")
+            sys.exit(1)
+
+        answers = []
+        failed = 0
+        for username, verb, resource, namespace, name in queries:
+            index = indexes[username]
+            try:
+                if resource.startswith('/'):
+                    group, source = None, index.check_url(verb, resource)
+                else:
+                    group, resource = index.resolve(resource)
+                    source = index.check(verb, group, resource, namespace, name)
+            except ValueError as e:
+                print(f"Error: {username} {verb} {resource}: {e}", file=sys.stderr)
+                failed += 1
+                continue
+            answers.append((username, verb, group, resource, namespace, name, source))
+
+        for username, verb, group, resource, namespace, name, source in answers:
+            allowed = source is not None
+            if output_format == 'json':
+                result = {'user': username, 'verb': verb, 'group': group, 'resource': resource,
+                          'namespace': namespace, 'name': name, 'allowed': allowed}
+                if why:
+                    result['reason'] = source
+                print(json.dumps(result))
+                continue
+            line = 'yes' if allowed else 'no'
+            if not single:
+                qualified = f"{resource}.{group}" if group else resource
+                line += '\t' + ' '.join(filter(None, [username, verb, qualified, namespace, name]))
+            if why and allowed:
+                line += f"\t({source})"
+            print(line)
+
+        if verify and answers:
+            sample = random.sample(answers, min(verify, len(answers)))
+
+            def review(answer):
+                username, verb, group, resource, namespace, name, source = answer
+                try:
+                    return answer, self.access_review(username, verb, group, resource, namespace, name), None
+                except ApiException as e:
+                    return answer, None, e.reason
+
+            mismatches = errors = 0
+            with CapturingExecutor(max_workers=min(8, len(sample))) as executor:
+                for answer, allowed, error in executor.map(review, sample):
+                    query = ' '.join(filter(None, [answer[0], answer[1], answer[3], answer[4], answer[5]]))
+                    if error:
+                        errors += 1
+                        print(f"Error verifying '{query}': {error}", file=sys.stderr)
+                    elif allowed != (answer[6] is not None):
+                        mismatches += 1
+                        print(f"Mismatch: '{query}': local {'yes' if answer[6] else 'no'}, "
+                              f"SubjectAccessReview {'yes' if allowed else 'no'}", file=sys.stderr)
+            print(f"Verified {len(sample)} answer(s) with SubjectAccessReview: {mismatches} mismatch(es), "
+                  f"{errors} error(s).", file=sys.stderr)
+            failed += mismatches + errors
+
+        if failed or (single and answers and answers[0][6] is None):
+            sys.exit(1)
+
+    def create_role_binding(self, username, namespace, permission, expires_at=None):
+        """
+        Create the RoleBinding granting a namespace permission to a user.
+
+        Args:
+            username (str): Name of the user/service account
+            namespace (str): Target namespace
+            permission (str): Permission level (developer, operation, monitoring)
+            expires_at (float): Expiry time of a time-bound grant, in seconds since the epoch
+
+        Raises:
+            ApiException: If the API server rejects the request
+        """
+        expiry = expiry_metadata(expires_at) if expires_at else {}
+        rb_manifest = client.V1RoleBinding(
+            metadata=client.V1ObjectMeta(
+                name=namespaced_binding_name(username, namespace, permission),
+                namespace=namespace,
+                labels=dict(binding_labels(username, 'namespace', permission), **expiry.get('labels', {})),
+                annotations=expiry.get('annotations')
+            ),
+            role_ref=client.V1RoleRef(
+                api_group='rbac.authorization.k8s.io',
+                kind='ClusterRole',
+                name=f"{NAMESPACED_TEMPLATE}___{permission}"
+            ),
+            subjects=[
+                client.RbacV1Subject(
+                    kind='ServiceAccount',
+                    name=username,
+                    namespace=self.manager_namespace
+                )
+            ]
+        )
+        return self.rbac_v1_api.create_namespaced_role_binding(
+            namespace=namespace,
+            body=rb_manifest
+        )
+
+    def update_expiry(self, kind, name, namespace, expires_at):
+        """
+        Bring the expiry of an existing binding in line with a repeated grant.
+
+        A time-bound binding takes the new expiry, or becomes permanent when
+        granted again without one. A permanent binding stays permanent.
+
+        Args:
+            kind (str): RoleBinding or ClusterRoleBinding
+            name (str): Name of the binding
+            namespace (str): Namespace of a RoleBinding
+            expires_at (float): New expiry time, or None for a permanent grant
+
+        Returns:
+            str: 'already granted', 'kept permanent', 'expiry updated' or 'made permanent'
+
+        Raises:
+            ApiException: If the API server rejects the request
+        """
+        if kind == 'RoleBinding':
+            binding = self.rbac_v1_api.read_namespaced_role_binding(name, namespace)
+        else:
+            binding = self.rbac_v1_api.read_cluster_role_binding(name)
+        current = binding_expiry(binding.metadata.annotations)
+        if current is None:
+            return 'kept permanent' if expires_at else 'already granted'
+        if current == expires_at:
+            return 'already granted'
+
+        # The resourceVersion makes the patch fail if the binding changed in between
+        body = {'metadata': dict(expiry_metadata(expires_at), resourceVersion=binding.metadata.resource_version)}
+        if kind == 'RoleBinding':
+            self.rbac_v1_api.patch_namespaced_role_binding(name, namespace, body)
+        else:
+            self.rbac_v1_api.patch_cluster_role_binding(name, body)
+        return 'expiry updated' if expires_at else 'made permanent'
+
+    def resolve_namespaces(self, namespace, namespace_selector=None):
+        """
+        Expand a namespace argument into a sorted list of namespaces.
+
+        The argument is a comma-separated list of names and glob patterns
+        (e.g. 'team-a-*,shared'). Plain names without a selector are taken as
+        they are; otherwise the namespaces are resolved with one paged,
+        metadata-only list, filtered server-side by the label selector.
+
+        Args:
+            namespace (str): Names and/or glob patterns, comma-separated
+            namespace_selector (str): Label selector the namespaces must match
+        """
+        patterns = split_list(namespace)
+        if not namespace_selector and not any(set(pattern) & set('*?[') for pattern in patterns):
+            return sorted(set(patterns))
+        return sorted(
+            metadata['name'] for metadata in self.list_metadata('/api/v1/namespaces', labelSelector=namespace_selector)
+            if any(fnmatch.fnmatchcase(metadata['name'], pattern) for pattern in patterns)
+        )
+
+    def fan_out(self, func, namespaces, workers):
+        """
+        Run func(namespace) concurrently and count the outcomes it returns.
+        """
+        counts = {}
+        with CapturingExecutor(max_workers=max(1, min(workers, len(namespaces)))) as executor:
+            for outcome in executor.map(func, namespaces):
+                counts[outcome] = counts.get(outcome, 0) + 1
+        return counts
 
-    def ns_grant(self, username, namespace, permission):
+    def ns_grant(self, username, namespace, permission, namespace_selector=None, workers=8, expires_at=None):
         """
         Grant namespace-level permissions to a user
         
         Args:
             username (str): Name of the user/service account
-            namespace (str): Target namespace
+            namespace (str): Target namespace, or comma-separated names and glob patterns
             permission (str): Permission level (developer, operation, monitoring)
+            namespace_selector (str): Only namespaces matching this label selector
+            workers (int): Concurrent RoleBinding creations when granting in several namespaces
+            expires_at (float): Expiry time of a time-bound grant, in seconds since the epoch
         """
-        role_binding_name = f"{username}___template-namespaced-resources___{permission}___{namespace}"
-        role_name = f"template-namespaced-resources___{permission}"
+        if namespace_selector or set(namespace) & set(',*?['):
+            return self.ns_grant_many(username, namespace, permission, namespace_selector, workers, expires_at)
+
+        role_binding_name = namespaced_binding_name(username, namespace, permission)
+        until = f" until {format_expiry(expires_at)}" if expires_at else ''
 
         try:
             # Create Role Binding
-            rb_manifest = client.V1RoleBinding(
-                metadata=client.V1ObjectMeta(
-                    name=role_binding_name,
-                    namespace=namespace
-                ),
-                role_ref=client.V1RoleRef(
-                    api_group='rbac.authorization.k8s.io',
-                    kind='ClusterRole',
-                    name=role_name
-                ),
-                subjects=[
-                    client.RbacV1Subject(
-                        kind='ServiceAccount',
-                        name=username,
-                        namespace=self.manager_namespace
-                    )
-                ]
-            )
-            
-            self.rbac_v1_api.create_namespaced_role_binding(
-                namespace=namespace, 
-                body=rb_manifest
-            )
-            print(f"Granted {permission} permissions to {username} in namespace {namespace}")
+            self.create_role_binding(username, namespace, permission, expires_at)
+            print(f"Granted {permission} permissions to {username} in namespace {namespace}{until}")
         
         except ApiException as e:
-            if e.status == 409:
+            if e.status != 409:
+                print(f"Unexpected error granting permissions: {e}")
+                sys.exit(1)
+            try:
+                outcome = self.update_expiry('RoleBinding', role_binding_name, namespace, expires_at)
+            except ApiException as e:
+                print(f"Unexpected error updating the expiry: {e.reason}")
+                sys.exit(1)
+            if outcome == 'expiry updated':
+                print(f"Extended {permission} permissions of {username} in namespace {namespace}{until}")
+            elif outcome == 'made permanent':
+                print(f"Made {permission} permissions of {username} in namespace {namespace} permanent")
+            elif outcome == 'kept permanent':
+                print(f"Warning: Role binding {role_binding_name} already exists as a permanent grant; no expiry set.")
+            else:
                 print(f"Warning: Role binding {role_binding_name} already exists.")
+
+    def ns_grant_many(self, username, namespace, permission, namespace_selector=None, workers=8, expires_at=None):
+        """
+        Grant a namespace permission in every namespace matching the patterns and selector.
+        """
+        try:
+            namespaces = self.resolve_namespaces(namespace, namespace_selector)
+        except ApiException as e:
+            print(f"Error listing namespaces: {e.reason}")
+            sys.exit(1)
+        if not namespaces:
+            print("Error: No namespace matches.")
+            sys.exit(1)
+
+        def grant(target):
+            try:
+                try:
+                    self.create_role_binding(username, target, permission, expires_at)
+                    return 'granted'
+                except ApiException as e:
+                    if e.status != 409:
+                        raise
+                    return self.update_expiry(
+                        'RoleBinding', namespaced_binding_name(username, target, permission), target, expires_at
+                    )
+            except ApiException as e:
+                print(f"Error granting {permission} to {username} in namespace {target}: {e.reason}")
+                return 'failed'
+
+        counts = self.fan_out(grant, namespaces, workers)
+        until = f" until {format_expiry(expires_at)}" if expires_at else ''
+        renewals = ''.join(
+            f", {counts[outcome]} {outcome}" for outcome in ('expiry updated', 'made permanent', 'kept permanent')
+            if counts.get(outcome)
+        )
+        print(f"Granted {permission} permissions to {username}{until} in {len(namespaces)} namespace(s): "
+              f"{counts.get('granted', 0)} granted, {counts.get('already granted', 0)} already granted{renewals}, "
+              f"{counts.get('failed', 0)} failed.")
+        if counts.get('failed'):
+            sys.exit(1)
+
+    def ns_revoke(self, username, namespace, permission, assume_yes=False, namespace_selector=None, workers=8):
+        """
+        Revoke namespace-level permissions from a user
+        
+        Args:
+            username (str): Name of the user/service account
+            namespace (str): Target namespace, or comma-separated names and glob patterns
+            permission (str): Permission level to revoke
+            assume_yes (bool): Skip the confirmation prompt
+            namespace_selector (str): Only namespaces matching this label selector
+            workers (int): Concurrent RoleBinding deletions when revoking in several namespaces
+        """
+        if namespace_selector or set(namespace) & set(',*?['):
+            return self.ns_revoke_many(username, namespace, permission, assume_yes, namespace_selector, workers)
+
+        role_binding_name = namespaced_binding_name(username, namespace, permission)
+        
+        # Confirm revocation
+        confirm = 'y' if assume_yes else ask(f"Are you sure you want to revoke {permission} permissions for {username} in {namespace}? (y/N): ")
+        if confirm.lower() not in ['y', '']:
+            print("Operation cancelled.")
+            return
+
+        try:
+            # Prefer the labelled bindings, fall back to the generated name for unlabelled ones
+            binding_names = [
+                binding.name for binding in self.list_managed_bindings(
+                    username=username, scope='namespace', permission=permission, namespace=namespace
+                )
+            ] or [role_binding_name]
+            for binding_name in binding_names:
+                self.rbac_v1_api.delete_namespaced_role_binding(
+                    name=binding_name,
+                    namespace=namespace
+                )
+            print(f"Revoked {permission} permissions from {username} in namespace {namespace}")
+        
+        except ApiException as e:
+            if e.status == 404:
+                print(f"Error: Role binding {role_binding_name} does not exist.")
+                sys.exit(1)
             else:
-                print(f"Unexpected error granting permissions: {e}")
+                print(f"Unexpected error revoking permissions: {e}")
                 sys.exit(1)
 
-    def ns_revoke(self, username, namespace, permission):
+    def ns_revoke_many(self, username, namespace, permission, assume_yes=False, namespace_selector=None, workers=8):
+        """
+        Revoke a namespace permission in every namespace matching the patterns and selector,
+        after a single confirmation.
+        """
+        try:
+            namespaces = self.resolve_namespaces(namespace, namespace_selector)
+            # One labelled lookup for all namespaces; unlabelled bindings fall back to the generated name
+            labelled = {}
+            for binding in self.list_managed_bindings(username=username, scope='namespace', permission=permission):
+                labelled.setdefault(binding.namespace, []).append(binding.name)
+        except ApiException as e:
+            print(f"Error listing namespaces or bindings: {e.reason}")
+            sys.exit(1)
+        if not namespaces:
+            print("Error: No namespace matches.")
+            sys.exit(1)
+
+        preview = ', '.join(namespaces[:5]) + (f", ... ({len(namespaces)} in total)" if len(namespaces) > 5 else '')
+        confirm = 'y' if assume_yes else ask(
+            f"Are you sure you want to revoke {permission} permissions for {username} in {preview}? (y/N): "
+        )
+        if confirm.lower() not in ['y', '']:
+            print("Operation cancelled.")
+            return
+
+        def revoke(target):
+            outcome = 'not granted'
+            for binding_name in labelled.get(target) or [namespaced_binding_name(username, target, permission)]:
+                try:
+                    self.rbac_v1_api.delete_namespaced_role_binding(name=binding_name, namespace=target)
+                    outcome = 'revoked'
+                except ApiException as e:
+                    if e.status != 404:
+                        print(f"Error revoking {permission} from {username} in namespace {target}: {e.reason}")
+                        return 'failed'
+            return outcome
+
+        counts = self.fan_out(revoke, namespaces, workers)
+        print(f"Revoked {permission} permissions from {username} in {len(namespaces)} namespace(s): "
+              f"{counts.get('revoked', 0)} revoked, {counts.get('not granted', 0)} not granted, "
+              f"{counts.get('failed', 0)} failed.")
+        if counts.get('failed'):
+            sys.exit(1)
+
+    def secret_credentials(self, username):
+        """
+        Return (token, base64 CA certificate) from the user's long-lived token Secret.
+
+        Waits for the token Secret to be populated if it is not yet.
+
+        Raises:
+            ValueError: If the user has no usable token Secret
+        """
+        sa_secrets = self.find_token_secret(username)
+        if not sa_secrets:
+            raise ValueError(f"No token secret found for {username}")
+
+        if not token_secret_ready(sa_secrets):
+            # Freshly added user: wait for the token controller
+            sa_secrets = self.token_watcher.wait(sa_secrets.metadata.name, self.token_timeout)
+            if not sa_secrets:
+                raise ValueError(f"Token secret of {username} was not populated within {self.token_timeout:g}s")
+
+        # Decode token and CA certificate
+        token = base64.b64decode(sa_secrets.data['token']).decode('utf-8')
+        return token, sa_secrets.data['ca.crt']
+
+    def cluster_ca(self):
+        """
+        Return the cluster CA certificate, base64-encoded for a kubeconfig.
+
+        Read once from the kube-root-ca.crt ConfigMap of the manager namespace,
+        falling back to the CA file of pmctl's own API client configuration.
+
+        Raises:
+            ValueError: If no CA certificate is available
+        """
+        if self._cluster_ca is None:
+            ca_cert = None
+            try:
+                config_map = self.core_v1_api.read_namespaced_config_map(ROOT_CA_CONFIGMAP, self.manager_namespace)
+                ca_cert = (config_map.data or {}).get('ca.crt')
+            except ApiException as e:
+                if e.status not in (403, 404):
+                    raise
+            if not ca_cert and self.api_client.configuration.ssl_ca_cert:
+                with open(self.api_client.configuration.ssl_ca_cert, 'r') as f:
+                    ca_cert = f.read()
+            if not ca_cert:
+                raise ValueError(f"No cluster CA certificate found (ConfigMap {ROOT_CA_CONFIGMAP} "
+                                 f"in {self.manager_namespace})")
+            self._cluster_ca = base64.b64encode(ca_cert.encode('utf-8')).decode('ascii')
+        return self._cluster_ca
+
+    def requested_credentials(self, username, audiences=(), duration=3600):
+        """
+        Return (token, base64 CA certificate) with a token minted by the TokenRequest API.
+
+        Tokens are cached in memory until shortly before they expire, so
+        repeated prints for the same user make no API calls.
+
+        Args:
+            username (str): Name of the user/service account
+            audiences (tuple): Audiences of the token (default: the API server's)
+            duration (int): Requested lifetime in seconds; the API server may shorten it
+
+        Raises:
+            ValueError: If the service account does not exist
+        """
+        key = (username, tuple(audiences), int(duration))
+        cached = self.requested_tokens.get(key)
+        if cached:
+            return cached[0], self.cluster_ca()
+
+        token_request = client.AuthenticationV1TokenRequest(
+            spec=client.V1TokenRequestSpec(audiences=list(audiences), expiration_seconds=int(duration))
+        )
+        try:
+            result = self.core_v1_api.create_namespaced_service_account_token(
+                name=username, namespace=self.manager_namespace, body=token_request
+            )
+        except ApiException as e:
+            if e.status == 404:
+                raise ValueError(f"Service Account '{username}' does not exist")
+            raise
+        self.requested_tokens.put(key, result.status.token, result.status.expiration_timestamp.timestamp())
+        return result.status.token, self.cluster_ca()
+
+    def build_kubeconfig(self, username, namespaces, qualified=False, token_mode=None, audiences=(), duration=3600):
+        """
+        Build a kubeconfig for a user with one context per namespace.
+
+        Args:
+            username (str): Name of the user/service account
+            namespaces (list): Namespaces to create contexts for; the first one is the current context
+            qualified (bool): Suffix user and context names with '@<cluster>', for merging
+                kubeconfigs of several clusters
+            token_mode (str): 'secret' to use the long-lived token Secret, 'request' to mint
+                a short-lived token (default: PMCTL_TOKEN_MODE)
+            audiences (tuple): Audiences of a minted token
+            duration (int): Lifetime of a minted token in seconds
+
+        Raises:
+            ValueError: If no credentials can be obtained for the user
+        """
+        if (token_mode or self.token_mode) == 'request':
+            token, ca_cert = self.requested_credentials(username, audiences, duration)
+        else:
+            token, ca_cert = self.secret_credentials(username)
+
+        suffix = f"@{self.cluster_name}" if qualified else ''
+        return {
+            'apiVersion': 'v1',
+            'kind': 'Config',
+            'current-context': f"{username}-{namespaces[0]}{suffix}",
+            'clusters': [{
+                'cluster': {
+                    'certificate-authority-data': ca_cert,
+                    'server': self.control_plane_address
+                },
+                'name': self.cluster_name
+            }],
+            'contexts': [{
+                'context': {
+                    'cluster': self.cluster_name,
+                    'user': f"{username}{suffix}",
+                    'namespace': namespace
+                },
+                'name': f"{username}-{namespace}{suffix}"
+            } for namespace in namespaces],
+            'users': [{
+                'name': f"{username}{suffix}",
+                'user': {
+                    'token': token
+                }
+            }]
+        }
+
+    def bound_namespaces(self, username):
+        """
+        Return the namespaces in which a user holds RoleBindings.
+        """
+        return sorted({
+            binding.namespace for binding in self.find_user_bindings(username)
+            if binding.kind == 'RoleBinding'
+        })
+
+    def merged_kubeconfig(self, username, namespaces, all_bound, clusters, credentials=None):
         """
-        Revoke namespace-level permissions from a user
-        
+        Build one kubeconfig for a user covering every cluster where the user holds bindings.
+
+        User and context names are suffixed with '@<cluster>'. Clusters that
+        fail are reported on stderr and left out.
+
         Args:
             username (str): Name of the user/service account
-            namespace (str): Target namespace
-            permission (str): Permission level to revoke
+            namespaces (list): Namespaces to create contexts for in each cluster
+            all_bound (bool): Also add every namespace the user is bound in, per cluster
+            clusters (list): KubernetesPermissionManager of each cluster
+            credentials (dict): token_mode, audiences and duration for build_kubeconfig
+
+        Raises:
+            ValueError: If the user holds no bindings in any cluster
         """
-        role_binding_name = f"{username}___template-namespaced-resources___{permission}___{namespace}"
-        
-        # Confirm revocation
-        confirm = input(f"Are you sure you want to revoke {permission} permissions for {username} in {namespace}? (y/N): ")
-        if confirm.lower() not in ['y', '']:
-            print("Operation cancelled.")
-            return
+        def build(manager):
+            try:
+                bindings = manager.find_user_bindings(username)
+                if not bindings:
+                    return None
+                user_namespaces = list(namespaces)
+                if all_bound:
+                    bound = sorted({binding.namespace for binding in bindings if binding.kind == 'RoleBinding'})
+                    user_namespaces += [ns for ns in bound if ns not in user_namespaces]
+                return manager.build_kubeconfig(username, user_namespaces or ['default'], qualified=True,
+                                                **(credentials or {}))
+            except ValueError as e:
+                print(f"{username}@{manager.cluster_name}: Error: {e}", file=sys.stderr)
+            except Exception as e:
+                print(f"{username}@{manager.cluster_name}: Error generating kubeconfig: {e}", file=sys.stderr)
+            return None
 
-        try:
-            self.rbac_v1_api.delete_namespaced_role_binding(
-                name=role_binding_name, 
-                namespace=namespace
-            )
-            print(f"Revoked {permission} permissions from {username} in namespace {namespace}")
-        
-        except ApiException as e:
-            if e.status == 404:
-                print(f"Error: Role binding {role_binding_name} does not exist.")
-                sys.exit(1)
-            else:
-                print(f"Unexpected error revoking permissions: {e}")
-                sys.exit(1)
+        with CapturingExecutor(max_workers=len(clusters)) as executor:
+            kubeconfigs = [kubeconfig for kubeconfig in executor.map(build, clusters) if kubeconfig]
+        if not kubeconfigs:
+            raise ValueError(f"{username} holds no bindings in any cluster")
 
-    def ns_print(self, username, namespace, output_type='std'):
+        merged = dict(kubeconfigs[0])
+        for key in ('clusters', 'contexts', 'users'):
+            merged[key] = [entry for kubeconfig in kubeconfigs for entry in kubeconfig[key]]
+        return merged
+
+    def ns_print(self, username, namespace=None, output_type='std', all_bound=False, workers=8, clusters=None,
+                 token_mode=None, audiences=(), duration=3600):
         """
-        Print kubeconfig for a specific user and namespace
+        Print kubeconfig for one or more users and namespaces
+
+        Each user gets one kubeconfig with a context per namespace. Several
+        users are written as a stream of YAML documents, each as soon as it is
+        ready, or delivered to Telegram concurrently.
         
         Args:
-            username (str): Name of the user/service account
-            namespace (str): Target namespace
+            username (str): Name of the user/service account, comma-separated for several users
+            namespace (str): Target namespace, comma-separated for several namespaces
             output_type (str): Output method (std or telegram)
+            all_bound (bool): Use every namespace the user is bound in
+            workers (int): Maximum number of users processed concurrently
+            clusters (list): Managers of all clusters in multi-cluster mode; each user's
+                kubeconfig then covers every cluster where the user holds bindings
+            token_mode (str): 'secret' for long-lived token Secrets, 'request' for short-lived
+                TokenRequest tokens (default: PMCTL_TOKEN_MODE)
+            audiences (tuple): Audiences of requested tokens (default: the API server's)
+            duration (int): Lifetime of requested tokens in seconds
         """
-        try:
-            secrets = self.core_v1_api.list_namespaced_secret(self.manager_namespace)
-            sa_secrets = None
+        import yaml
 
-            for secret in secrets.items:
-                if secret.metadata.annotations and \
-                secret.metadata.annotations.get("kubernetes.io/service-account.name") == username:
-                    sa_secrets = secret
-                    break  # Stop after deleting the first matching token
-        
-            if not sa_secrets:
-                print(f"Error: No token secret found for {username}")
-                sys.exit(1)
-            
-            # Decode token and CA certificate
-            token = base64.b64decode(sa_secrets.data['token']).decode('utf-8')
-            ca_cert = sa_secrets.data['ca.crt']
-
-            # Generate kubeconfig
-            kubeconfig = {
-                'apiVersion': 'v1',
-                'kind': 'Config',
-                'current-context': f"{username}-{namespace}",
-                'clusters': [{
-                    'cluster': {
-                        'certificate-authority-data': ca_cert,
-                        'server': self.control_plane_address
-                    },
-                    'name': self.cluster_name
-                }],
-                'contexts': [{
-                    'context': {
-                        'cluster': self.cluster_name,
-                        'user': username,
-                        'namespace': namespace
-                    },
-                    'name': f"{username}-{namespace}"
-                }],
-                'users': [{
-                    'name': username,
-                    'user': {
-                        'token': token
-                    }
-                }]
-            }
+        if output_type not in ('std', 'telegram'):
+            print(f"Error: Invalid output type '{output_type}'.")
+            sys.exit(1)
+
+        usernames = split_list(username)
+        namespaces = split_list(namespace)
+        if not namespaces and not all_bound and not clusters:
+            print("Error: A namespace is required unless --all-bound is set.")
+            sys.exit(1)
+        if output_type == 'telegram' and not self.telegram(pool_size=workers):
+            print("Error: Telegram Bot API token or chat ID not set.")
+            sys.exit(1)
+        bulk = len(usernames) > 1 or len(namespaces) > 1 or all_bound or bool(clusters)
+        credentials = {'token_mode': token_mode, 'audiences': tuple(audiences), 'duration': duration}
+
+        def render(name):
+            try:
+                if clusters:
+                    kubeconfig = self.merged_kubeconfig(name, namespaces, all_bound, clusters, credentials)
+                    user_namespaces = sorted({entry['context']['namespace'] for entry in kubeconfig['contexts']})
+                else:
+                    user_namespaces = list(namespaces)
+                    if all_bound:
+                        user_namespaces += [ns for ns in self.bound_namespaces(name) if ns not in user_namespaces]
+                    if not user_namespaces:
+                        raise ValueError(f"{name} is not bound in any namespace")
+                    kubeconfig = self.build_kubeconfig(name, user_namespaces, **credentials)
+                kubeconfig_yaml = yaml.safe_dump(
+                    kubeconfig,
+                    default_flow_style=False,
+                    explicit_start=len(usernames) > 1
+                )
+            except ValueError as e:
+                return name, None, str(e), 0
+            except Exception as e:
+                return name, None, f"Error generating kubeconfig: {e}", 0
 
-            kubeconfig_yaml = yaml.safe_dump(kubeconfig, default_flow_style=False)
-            
-            # Output handling
-            if output_type == 'std':
-                yaml.safe_dump(kubeconfig, sys.stdout, default_flow_style=False)
-            elif output_type == 'telegram':
+            if output_type == 'telegram':
                 # Send as a .txt file
-                filename = f"kubeconfig_{username}_{namespace}.txt"
-                self.send_file_to_telegram(kubeconfig_yaml, filename)
-            else:
-                print(f"Error: Invalid output type '{output_type}'.")
-                sys.exit(1)
-        
-        except Exception as e:
-            print(f"Error generating kubeconfig: {e}")
+                if len(user_namespaces) == 1:
+                    filename = f"kubeconfig_{name}_{user_namespaces[0]}.txt"
+                else:
+                    filename = f"kubeconfig_{name}.txt"
+                error = self.telegram().send(kubeconfig_yaml, filename)
+                if error:
+                    return name, None, f"Error sending file to Telegram: {error}", 0
+            return name, kubeconfig_yaml, None, len(kubeconfig['contexts'])
+
+        failed = 0
+        with CapturingExecutor(max_workers=max(1, min(workers, len(usernames)))) as executor:
+            for name, kubeconfig_yaml, error, contexts in executor.map(render, usernames):
+                if error:
+                    failed += 1
+                    message = error if error.startswith("Error") else f"Error: {error}"
+                    if bulk:
+                        print(f"{name}: {message}", file=sys.stderr)
+                    else:
+                        print(message)
+                    continue
+                if output_type == 'std':
+                    sys.stdout.write(kubeconfig_yaml)
+                    sys.stdout.flush()
+                    if bulk:
+                        print(f"{name}: kubeconfig with {contexts} context(s) written", file=sys.stderr)
+                elif bulk:
+                    print(f"{name}: kubeconfig with {contexts} context(s) sent to Telegram")
+                else:
+                    print("File sent to Telegram successfully.")
+
+        if bulk:
+            print(f"Kubeconfigs: {len(usernames) - failed} delivered, {failed} failed.", file=sys.stderr)
+        if failed:
             sys.exit(1)
 
-    def cluster_grant(self, username, permission):
+    def create_cluster_role_binding(self, username, permission, expires_at=None):
+        """
+        Create the ClusterRoleBinding granting a cluster permission to a user.
+
+        Args:
+            username (str): Name of the user/service account
+            permission (str): Cluster permission level (read-only, admin)
+            expires_at (float): Expiry time of a time-bound grant, in seconds since the epoch
+
+        Raises:
+            ApiException: If the API server rejects the request
+        """
+        expiry = expiry_metadata(expires_at) if expires_at else {}
+        crb_manifest = client.V1ClusterRoleBinding(
+            metadata=client.V1ObjectMeta(
+                name=cluster_binding_name(username, permission),
+                labels=dict(binding_labels(username, 'cluster', permission), **expiry.get('labels', {})),
+                annotations=expiry.get('annotations')
+            ),
+            role_ref=client.V1RoleRef(
+                api_group='rbac.authorization.k8s.io',
+                kind='ClusterRole',
+                name=f"{CLUSTER_TEMPLATE}___{permission}"
+            ),
+            subjects=[
+                client.RbacV1Subject(
+                    kind='ServiceAccount',
+                    name=username,
+                    namespace=self.manager_namespace
+                )
+            ]
+        )
+        return self.rbac_v1_api.create_cluster_role_binding(body=crb_manifest)
+
+    def cluster_grant(self, username, permission, expires_at=None):
         """
         Grant cluster-level permissions to a user
         
         Args:
             username (str): Name of the user/service account
             permission (str): Cluster permission level (read-only, admin)
+            expires_at (float): Expiry time of a time-bound grant, in seconds since the epoch
         """
-        cluster_role_binding_name = f"{username}___template-cluster-resources___{permission}"
-        cluster_role_name = f"template-cluster-resources___{permission}"
+        cluster_role_binding_name = cluster_binding_name(username, permission)
+        until = f" until {format_expiry(expires_at)}" if expires_at else ''
 
         try:
             # Create Cluster Role Binding
-            crb_manifest = client.V1ClusterRoleBinding(
-                metadata=client.V1ObjectMeta(name=cluster_role_binding_name),
-                role_ref=client.V1RoleRef(
-                    api_group='rbac.authorization.k8s.io',
-                    kind='ClusterRole',
-                    name=cluster_role_name
-                ),
-                subjects=[
-                    client.RbacV1Subject(
-                        kind='ServiceAccount',
-                        name=username,
-                        namespace=self.manager_namespace
-                    )
-                ]
-            )
-            
-            self.rbac_v1_api.create_cluster_role_binding(body=crb_manifest)
-            print(f"Granted {permission} cluster permissions to {username}")
+            self.create_cluster_role_binding(username, permission, expires_at)
+            print(f"Granted {permission} cluster permissions to {username}{until}")
         
         except ApiException as e:
-            if e.status == 409:
-                print(f"Warning: Cluster role binding {cluster_role_binding_name} already exists.")
-            else:
+            if e.status != 409:
                 print(f"Unexpected error granting cluster permissions: {e}")
                 sys.exit(1)
+            try:
+                outcome = self.update_expiry('ClusterRoleBinding', cluster_role_binding_name, None, expires_at)
+            except ApiException as e:
+                print(f"Unexpected error updating the expiry: {e.reason}")
+                sys.exit(1)
+            if outcome == 'expiry updated':
+                print(f"Extended {permission} cluster permissions of {username}{until}")
+            elif outcome == 'made permanent':
+                print(f"Made {permission} cluster permissions of {username} permanent")
+            elif outcome == 'kept permanent':
+                print(f"Warning: Cluster role binding {cluster_role_binding_name} already exists as a permanent grant; "
+                      f"no expiry set.")
+            else:
+                print(f"Warning: Cluster role binding {cluster_role_binding_name} already exists.")
 
-    def cluster_revoke(self, username, permission):
+    def expire(self, once=False, dry_run=False, workers=8):
+        """
+        Revoke time-bound grants when they expire (see ExpiryScheduler)
+
+        Args:
+            once (bool): Revoke the grants that have already expired and exit
+            dry_run (bool): Only print what would be revoked
+            workers (int): Concurrent deletions
+        """
+        scheduler = ExpiryScheduler(self, workers, dry_run)
+        try:
+            if once:
+                counts = scheduler.run_once()
+                summary = ', '.join(f"{count} {outcome}" for outcome, count in sorted(counts.items()))
+                print(f"Expired grants: {summary or 'none'}.")
+                if counts.get('failed'):
+                    sys.exit(1)
+            else:
+                scheduler.run()
+        except ApiException as e:
+            print(f"Error listing time-bound grants: {e.reason}")
+            sys.exit(1)
+        except KeyboardInterrupt:
+            scheduler.stop()
+
+    def cluster_revoke(self, username, permission, assume_yes=False):
         """
         Revoke cluster-level permissions from a user
         
         Args:
             username (str): Name of the user/service account
             permission (str): Cluster permission level to revoke
+            assume_yes (bool): Skip the confirmation prompt
         """
-        cluster_role_binding_name = f"{username}___template-cluster-resources___{permission}"
+        cluster_role_binding_name = cluster_binding_name(username, permission)
         
         # Confirm revocation
-        confirm = input(f"Are you sure you want to revoke {permission} cluster permissions for {username}? (y/N): ")
+        confirm = 'y' if assume_yes else ask(f"Are you sure you want to revoke {permission} cluster permissions for {username}? (y/N): ")
         if confirm.lower() not in ['y', '']:
             print("Operation cancelled.")
             return
 
         try:
-            self.rbac_v1_api.delete_cluster_role_binding(
-                name=cluster_role_binding_name
-            )
+            # Prefer the labelled bindings, fall back to the generated name for unlabelled ones
+            binding_names = [
+                binding.name for binding in self.list_managed_bindings(
+                    username=username, scope='cluster', permission=permission
+                )
+            ] or [cluster_role_binding_name]
+            for binding_name in binding_names:
+                self.rbac_v1_api.delete_cluster_role_binding(
+                    name=binding_name
+                )
             print(f"Revoked {permission} cluster permissions from {username}")
         
         except ApiException as e:
@@ -449,8 +3553,582 @@ class KubernetesPermissionManager:
                 print(f"Unexpected error revoking cluster permissions: {e}")
                 sys.exit(1)
 
-def main():
+    def fetch_access_state(self):
+        """
+        Fetch the current pmctl-managed access in one concurrent pass.
+
+        Returns:
+            (users, namespace_grants, cluster_grants, managed_users): the first
+            three in the same shape as load_access_spec(). users holds every
+            ServiceAccount of the manager namespace; managed_users only those
+            labelled as pmctl users, minus 'default' and pmctl's own.
+        """
+        def users():
+            names, managed = set(), set()
+            for metadata in self.list_metadata(
+                '/api/v1/namespaces/{namespace}/serviceaccounts',
+                path_params={'namespace': self.manager_namespace}
+            ):
+                names.add(metadata['name'])
+                if (metadata.get('labels') or {}).get(MANAGED_BY_LABEL) == MANAGED_BY_VALUE:
+                    managed.add(metadata['name'])
+            return names, managed - self.protected_service_accounts
+
+        def bindings(scope):
+            return list(self.list_managed_bindings(scope=scope))
+
+        with CapturingExecutor(max_workers=3) as executor:
+            users_future = executor.submit(users)
+            role_bindings_future = executor.submit(bindings, 'namespace')
+            cluster_role_bindings_future = executor.submit(bindings, 'cluster')
+
+        namespace_grants = {
+            (binding_username(binding), binding.namespace, binding.labels[PERMISSION_LABEL])
+            for binding in role_bindings_future.result()
+            if binding_username(binding) and binding.labels.get(PERMISSION_LABEL)
+        }
+        cluster_grants = {
+            (binding_username(binding), binding.labels[PERMISSION_LABEL])
+            for binding in cluster_role_bindings_future.result()
+            if binding_username(binding) and binding.labels.get(PERMISSION_LABEL)
+        }
+        users, managed_users = users_future.result()
+        return users, namespace_grants, cluster_grants, managed_users
+
+    def apply_access(self, desired, dry_run=False, diff=False, prune=False, workers=8):
+        """
+        Reconcile the cluster against a declarative access matrix.
+
+        Only the difference between the desired and the current state is
+        applied: missing users and bindings are created, managed bindings that
+        are no longer wanted are deleted. Without prune, only the users listed
+        in the matrix are touched; with prune, managed bindings and users that
+        are absent from the matrix are removed as well.
+
+        Args:
+            desired (tuple): Output of load_access_spec()
+            dry_run (bool): Print the planned changes without applying them
+            diff (bool): Print the planned changes as a diff without applying them
+            prune (bool): Also remove users and bindings missing from the matrix
+            workers (int): Maximum concurrent API requests
+        """
+        desired_users, desired_ns, desired_cluster = desired
+        current_users, current_ns, current_cluster, managed_users = self.fetch_access_state()
+
+        def in_scope(username):
+            return prune or username in desired_users
+
+        changes = []
+        for username in sorted(desired_users - current_users):
+            changes.append(('+', f"user {username}", lambda u=username: self.user_add(u)))
+        for username, namespace, permission in sorted(desired_ns - current_ns):
+            changes.append(('+', f"ns grant {username} {namespace} {permission}",
+                            lambda g=(username, namespace, permission): self.create_role_binding(*g)))
+        for username, permission in sorted(desired_cluster - current_cluster):
+            changes.append(('+', f"cluster grant {username} {permission}",
+                            lambda g=(username, permission): self.create_cluster_role_binding(*g)))
+        for username, namespace, permission in sorted(current_ns - desired_ns):
+            if in_scope(username):
+                changes.append(('-', f"ns grant {username} {namespace} {permission}",
+                                lambda g=(username, namespace, permission): self.rbac_v1_api.delete_namespaced_role_binding(
+                                    namespaced_binding_name(*g), g[1])))
+        for username, permission in sorted(current_cluster - desired_cluster):
+            if in_scope(username):
+                changes.append(('-', f"cluster grant {username} {permission}",
+                                lambda g=(username, permission): self.rbac_v1_api.delete_cluster_role_binding(
+                                    cluster_binding_name(*g))))
+        if prune:
+            # Only ServiceAccounts labelled by 'user add' (or 'migrate labels') are users
+            for username in sorted(managed_users - desired_users):
+                changes.append(('-', f"user {username}", lambda u=username: self.user_remove(u)))
+
+        unchanged = len(desired_ns & current_ns) + len(desired_cluster & current_cluster)
+        if not changes:
+            print(f"No changes ({unchanged} bindings up to date).")
+            return
+
+        if diff:
+            for sign, description, _ in changes:
+                print(f"{sign} {description}")
+            sys.exit(1)
+        if dry_run:
+            for sign, description, _ in changes:
+                print(f"Would {'create' if sign == '+' else 'delete'}: {description}")
+            print(f"{len(changes)} changes planned ({unchanged} bindings up to date).")
+            return
+
+        def run(change):
+            sign, description, action = change
+            try:
+                action()
+                return sign, description, None
+            except ApiException as e:
+                # Already in the desired state: created or deleted concurrently
+                if (sign == '+' and e.status == 409) or (sign == '-' and e.status == 404):
+                    return sign, description, None
+                return sign, description, e.reason
+            except SystemExit:
+                return sign, description, "failed"
+
+        # New users first so new bindings never reference a missing ServiceAccount, and
+        # pruned users last so their bindings are gone before their ServiceAccounts
+        new_users = [change for change in changes if change[1].startswith('user ') and change[0] == '+']
+        pruned_users = [change for change in changes if change[1].startswith('user ') and change[0] == '-']
+        binding_changes = [change for change in changes if not change[1].startswith('user ')]
+        counts = {'+': 0, '-': 0, 'failed': 0}
+        with CapturingExecutor(max_workers=workers) as executor:
+            for batch in (new_users, binding_changes, pruned_users):
+                for sign, description, error in executor.map(run, batch):
+                    if error:
+                        counts['failed'] += 1
+                        print(f"Error applying '{sign} {description}': {error}")
+                    else:
+                        counts[sign] += 1
+                        print(f"{'Created' if sign == '+' else 'Deleted'}: {description}")
+
+        print(f"Apply finished: {counts['+']} created, {counts['-']} deleted, "
+              f"{counts['failed']} failed, {unchanged} bindings unchanged.")
+        if counts['failed']:
+            sys.exit(1)
+
+
+class ThreadLocalOutput:
+    """
+    Stand-in for sys.stdout/sys.stderr that lets a thread capture its own output.
+
+    Threads that are not capturing write straight through to the wrapped stream.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, data):
+        buffer = getattr(self.local, 'buffer', None)
+        return (buffer if buffer is not None else self.stream).write(data)
+
+    def flush(self):
+        if getattr(self.local, 'buffer', None) is None:
+            self.stream.flush()
+
+    def start_capture(self, buffer):
+        """
+        Redirect the calling thread's output to buffer. Returns the previous target.
+        """
+        previous = getattr(self.local, 'buffer', None)
+        self.local.buffer = buffer
+        return previous
+
+    def stop_capture(self, previous=None):
+        self.local.buffer = previous
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class CapturingExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor whose tasks inherit the submitting thread's output capture.
+
+    Output capture is per thread, so without this whatever a command prints
+    from its worker threads would bypass run_captured and end up on the
+    process's own stdout. Daemon prompts are inherited the same way.
+    """
+    def submit(self, fn, /, *args, **kwargs):
+        streams = [stream for stream in (sys.stdout, sys.stderr) if isinstance(stream, ThreadLocalOutput)]
+        buffers = [getattr(stream.local, 'buffer', None) for stream in streams]
+        prompt_handler = getattr(_prompt, 'handler', None)
+        if all(buffer is None for buffer in buffers) and prompt_handler is None:
+            return super().submit(fn, *args, **kwargs)
+
+        def run():
+            previous = [stream.start_capture(buffer) for stream, buffer in zip(streams, buffers)]
+            previous_handler = getattr(_prompt, 'handler', None)
+            _prompt.handler = prompt_handler
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                for stream, buffer in zip(streams, previous):
+                    stream.stop_capture(buffer)
+                _prompt.handler = previous_handler
+
+        return super().submit(run)
+
+
+# Positional arguments of each command, used to turn batch objects into argv
+BATCH_POSITIONALS = {
+    'user add': ['username'],
+    'user remove': ['username'],
+    'user list': [],
+    'user describe': ['username'],
+    'ns grant': ['username', 'namespace', 'permission'],
+    'ns revoke': ['username', 'namespace', 'permission'],
+    'ns print': ['username', 'namespace'],
+    'cluster grant': ['username', 'permission'],
+    'cluster revoke': ['username', 'permission'],
+    'can': ['username', 'verb', 'resource', 'namespace'],
+}
+
+
+def batch_argv(operation):
+    """
+    Convert one batch operation into pmctl arguments.
+
+    An operation is either a JSON array of arguments, e.g.
+    ["ns", "grant", "alice", "staging", "developer"], or an object naming the
+    command in "op" with its arguments as fields, e.g.
+    {"op": "ns grant", "username": "alice", "namespace": "staging", "permission": "developer"}.
+    """
+    if isinstance(operation, list):
+        return [str(arg) for arg in operation]
+    if not isinstance(operation, dict) or 'op' not in operation:
+        raise ValueError("expected a JSON array of arguments or an object with an 'op' field")
+
+    op = ' '.join(operation['op'].split())
+    argv = op.split()
+    positionals = BATCH_POSITIONALS.get(op, [])
+    for name in positionals:
+        if name not in operation:
+            break  # argparse reports missing required arguments
+        argv.append(str(operation[name]))
+    for key, value in operation.items():
+        if key == 'op' or key in positionals or value is None or value is False:
+            continue
+        argv.append(f"--{key.replace('_', '-')}")
+        if value is not True:
+            argv.append(str(value))
+    return argv
+
+
+def install_output_capture():
+    """
+    Route sys.stdout and sys.stderr through ThreadLocalOutput.
+
+    Returns the (stdout, stderr) wrappers; calling it again reuses them.
+    """
+    if not isinstance(sys.stdout, ThreadLocalOutput):
+        sys.stdout = ThreadLocalOutput(sys.stdout)
+    if not isinstance(sys.stderr, ThreadLocalOutput):
+        sys.stderr = ThreadLocalOutput(sys.stderr)
+    return sys.stdout, sys.stderr
+
+
+def run_captured(manager, parser, argv, output, error_output=None, assume_yes=False):
+    """
+    Run one pmctl command with the calling thread's output redirected.
+
+    Args:
+        manager (KubernetesPermissionManager): Manager to run the command with
+        parser (argparse.ArgumentParser): pmctl argument parser
+        argv (list): Command line arguments, without the program name
+        output (file): Receives what the command prints to stdout
+        error_output (file): Receives stderr (default: same as output)
+        assume_yes (bool): Skip confirmation prompts
+
+    Returns:
+        int: The command's exit code
+    """
+    stdout, stderr = install_output_capture()
+    previous_stdout = stdout.start_capture(output)
+    previous_stderr = stderr.start_capture(error_output if error_output is not None else output)
+    started = time.perf_counter()
+    command = None
+    try:
+        args = parser.parse_args(argv)
+        command = ' '.join(filter(None, [args.command, getattr(args, f"{args.command}_command", None)]))
+        if not run_command(manager, args, assume_yes):
+            parser.print_help()
+            return 1
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        print(e.code, file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        stdout.stop_capture(previous_stdout)
+        stderr.stop_capture(previous_stderr)
+        if manager.tracer and command:
+            manager.tracer.observe_command(command, time.perf_counter() - started)
+
+
+def run_batch(manager, parser, stream, workers=8, output_format='text'):
+    """
+    Run newline-delimited JSON operations through a single permission manager.
+
+    Operations run concurrently on a bounded pool and share the manager's
+    connection pool. Binding lookups are answered from the RBAC index, kept
+    current with watches while the batch runs. Each line gets its own
+    result; failures are reported and the batch carries on.
+
+    Args:
+        manager (KubernetesPermissionManager): Shared manager
+        parser (argparse.ArgumentParser): pmctl argument parser
+        stream (file): Source of the operations
+        workers (int): Maximum number of concurrent operations
+        output_format (str): 'text' or 'json'
+    """
+    def run(line_number, line):
+        buffer = StringIO()
+        command = line.strip()
+        try:
+            argv = batch_argv(json.loads(line))
+            command = ' '.join(argv)
+            if argv[:1] in (['batch'], ['serve']):
+                raise ValueError(f"'{argv[0]}' cannot run inside a batch")
+            exit_code = run_captured(manager, parser, argv, buffer, assume_yes=True)
+        except ValueError as e:
+            buffer.write(f"Error: {e}\n")
+            exit_code = 1
+        return {
+            'line': line_number,
+            'command': command,
+            'status': 'ok' if exit_code == 0 else 'error',
+            'output': buffer.getvalue().rstrip('\n')
+        }
+
+    stdout, stderr = sys.stdout, sys.stderr
+    failed = 0
+    total = 0
+    manager.watch_rbac_index = True
+    try:
+        with CapturingExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(run, line_number, line)
+                for line_number, line in enumerate(stream, start=1)
+                if line.strip() and not line.lstrip().startswith('#')
+            ]
+            for future in futures:
+                result = future.result()
+                total += 1
+                if result['status'] != 'ok':
+                    failed += 1
+                if output_format == 'json':
+                    stdout.write(json.dumps(result) + '\n')
+                else:
+                    stdout.write(f"[{result['line']}] {result['status']}: {result['command']}\n")
+                    for output_line in result['output'].splitlines():
+                        stdout.write(f"    {output_line}\n")
+                stdout.flush()
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+        manager.stop_rbac_index()
+
+    print(f"Batch finished: {total - failed} succeeded, {failed} failed.", file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+class DaemonOutput:
+    """
+    File-like object streaming one output channel of a daemon request to the client.
+    """
+    def __init__(self, connection, stream_name):
+        self.connection = connection
+        self.stream_name = stream_name
+
+    def write(self, data):
+        if data:
+            self.connection.send({'stream': self.stream_name, 'data': data})
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Runs one forwarded pmctl command.
+
+    The client sends {"argv": [...], "environment": <digest>} as a JSON
+    line. The daemon answers with JSON lines: {"stream": "stdout"|"stderr",
+    "data": ...} for output, {"prompt": ...} when a command asks a question
+    (the client replies with {"answer": ...}) and finally {"exit": <code>}.
+    When the environment digest differs from the daemon's, it answers
+    {"fallback": <reason>} instead and the client runs the command itself.
+    """
+    def setup(self):
+        super().setup()
+        self.send_lock = threading.Lock()  # Worker threads of a command write concurrently
+
+    def send(self, message):
+        with self.send_lock:
+            self.wfile.write(json.dumps(message).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+    def prompt(self, question):
+        self.send({'prompt': question})
+        line = self.rfile.readline()
+        if not line:
+            raise EOFError("client disconnected")
+        return json.loads(line).get('answer', '')
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            argv = [str(arg) for arg in request['argv']]
+        except (ValueError, KeyError, TypeError):
+            self.send({'stream': 'stderr', 'data': "Error: malformed request\n"})
+            self.send({'exit': 2})
+            return
+
+        if request.get('environment') != self.server.environment:
+            self.send({'fallback': "environment differs from the daemon's"})
+            return
+
+        if argv[:1] in (['serve'], ['batch'], ['apply']):
+            self.send({'stream': 'stderr', 'data': f"Error: '{argv[0]}' cannot be forwarded to the daemon\n"})
+            self.send({'exit': 2})
+            return
+
+        _prompt.handler = self.prompt
+        try:
+            exit_code = run_captured(
+                self.server.manager, self.server.parser, argv,
+                DaemonOutput(self, 'stdout'), DaemonOutput(self, 'stderr')
+            )
+            self.send({'exit': exit_code})
+        except (BrokenPipeError, ConnectionResetError, EOFError):
+            pass  # Client went away
+        finally:
+            _prompt.handler = None
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(manager, parser, socket_path):
+    """
+    Run the resident daemon on a Unix socket.
+
+    The daemon keeps one warm KubernetesPermissionManager, its keep-alive
+    connections and caches in memory. The RBAC index is kept current with
+    background watches, so lookups are answered from memory.
+
+    Args:
+        manager (KubernetesPermissionManager): Manager shared by all requests
+        parser (argparse.ArgumentParser): pmctl argument parser
+        socket_path (str): Path of the Unix socket to listen on
+    """
+    if os.path.exists(socket_path):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(socket_path)
+            print(f"Error: A pmctl daemon is already listening on {socket_path}.")
+            sys.exit(1)
+        except OSError:
+            os.unlink(socket_path)  # Stale socket from a previous run
+
+    manager.watch_rbac_index = True
+    manager.rbac_index()
+
+    old_umask = os.umask(0o177)  # Socket readable and writable by the owner only
+    try:
+        server = DaemonServer(socket_path, DaemonRequestHandler)
+    finally:
+        os.umask(old_umask)
+    server.manager = manager
+    server.parser = parser
+    server.environment = environment_digest()
+    install_output_capture()
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    print(f"pmctl daemon listening on {socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        manager.stop_rbac_index()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def environment_digest(environ=None):
+    """
+    Return a digest of the environment variables that shape how commands run.
+
+    The daemon compares it with its own, so a command whose caller set
+    e.g. PMCTL_TOKEN_MODE differently runs in-process instead of with the
+    daemon's settings. Only the digest crosses the socket, not the values.
+    """
+    environ = os.environ if environ is None else environ
+    relevant = {
+        name: value for name, value in environ.items()
+        if (name.startswith('PMCTL_') and name not in CLIENT_ENV_NAMES) or name in DAEMON_ENV_NAMES
+    }
+    return hashlib.sha256(json.dumps(relevant, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def forward_to_daemon(argv, socket_path):
+    """
+    Run a command in the resident daemon, if one is listening.
+
+    Args:
+        argv (list): Command line arguments, without the program name
+        socket_path (str): Path of the daemon's Unix socket
+
+    Returns:
+        int or None: The command's exit code, or None when no daemon is
+        available, or it runs with a different environment, and the command
+        should run in-process.
+    """
+    if not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        return None
+
+    with sock, sock.makefile('rwb') as connection:
+        connection.write(json.dumps({'argv': argv, 'environment': environment_digest()}).encode('utf-8') + b'\n')
+        connection.flush()
+        for line in connection:
+            message = json.loads(line)
+            if 'fallback' in message:
+                return None
+            elif 'data' in message:
+                stream = sys.stderr if message['stream'] == 'stderr' else sys.stdout
+                stream.write(message['data'])
+                stream.flush()
+            elif 'prompt' in message:
+                try:
+                    answer = input(message['prompt'])
+                except EOFError:
+                    answer = 'n'
+                connection.write(json.dumps({'answer': answer}).encode('utf-8') + b'\n')
+                connection.flush()
+            elif 'exit' in message:
+                return message['exit']
+
+    print("Error: The pmctl daemon closed the connection before the command finished.", file=sys.stderr)
+    return 1
+
+
+def add_expiry_arguments(parser):
+    expiry = parser.add_mutually_exclusive_group()
+    expiry.add_argument('--ttl', help="Revoke the grant after this long, e.g. '90m', '8h' or '1d12h'")
+    expiry.add_argument('--until', help="Revoke the grant at this time (ISO 8601, e.g. '2025-01-31T18:00')")
+
+
+def build_parser():
     parser = argparse.ArgumentParser(description='Kubernetes Permission Management CLI')
+    parser.add_argument('--profile', action='store_const', const='table',
+                        help='Record every API call and print a profile to stderr at exit')
+    parser.add_argument('--profile-format', choices=['table', 'chrome', 'openmetrics'],
+                        help="Profile format: 'table' (default), 'chrome' (trace-event JSON) or 'openmetrics'")
+    parser.add_argument('--profile-file', help='Write the profile to this file instead of stderr')
+    parser.add_argument('--clusters', default=os.environ.get('PMCTL_CLUSTERS'),
+                        help='Run against several clusters: comma-separated kubeconfig contexts or registry '
+                             'entries, globs allowed (default: $PMCTL_CLUSTERS)')
+    parser.add_argument('--cluster-registry', default=os.environ.get('PMCTL_CLUSTER_REGISTRY'),
+                        help='YAML file listing the clusters (default: $PMCTL_CLUSTER_REGISTRY)')
     subparsers = parser.add_subparsers(dest='command', help='Commands')
 
     # User management commands
@@ -459,11 +4137,26 @@ def main():
 
     add_parser = user_add_subparsers.add_parser('add', help='Add a new user')
     add_parser.add_argument('username', help='Username to add')
+    add_parser.add_argument('--timeout', type=float,
+                            help='Seconds to wait for the token to be issued (default: $PMCTL_TOKEN_TIMEOUT or 30)')
+    add_parser.add_argument('--no-token-secret', dest='token_secret', action='store_false', default=None,
+                            help="Skip the long-lived token Secret, for kubeconfigs printed with --token-mode request "
+                                 "(default when $PMCTL_TOKEN_MODE is 'request')")
 
     remove_parser = user_add_subparsers.add_parser('remove', help='Remove a user')
     remove_parser.add_argument('username', help='Username to remove')
+    remove_parser.add_argument('--cascade', action='store_true', help="Also delete all of the user's role bindings")
+    remove_parser.add_argument('-y', '--yes', action='store_true', help='Do not ask for confirmation (with --cascade)')
+    remove_parser.add_argument('--dry-run', action='store_true', help='Only show what would be deleted (with --cascade)')
+    remove_parser.add_argument('--workers', type=int, default=8, help='Concurrent deletions (default: 8)')
 
-    list_parser = user_add_subparsers.add_parser('list', help='List users')
+    list_parser = user_add_subparsers.add_parser('list', aliases=['ls'], help='List users')
+    list_parser.add_argument('-l', '--selector', help='Label selector, applied by the API server')
+    list_parser.add_argument('--prefix', help='Only users whose name starts with this prefix')
+    list_parser.add_argument('-o', '--output', choices=['text', 'name', 'json', 'yaml'], default='text',
+                             help='Output format (default: text)')
+    list_parser.add_argument('--with-permissions', action='store_true',
+                             help="Show each user's permissions (one pass over all bindings)")
     
     describe_parser = user_add_subparsers.add_parser('describe', help='Describe user permissions')
     describe_parser.add_argument('username', help='Username to describe')
@@ -474,18 +4167,34 @@ def main():
 
     grant_parser = ns_subparsers.add_parser('grant', help='Grant namespace permissions')
     grant_parser.add_argument('username', help='Username')
-    grant_parser.add_argument('namespace', help='Target namespace')
-    grant_parser.add_argument('permission', choices=['developer', 'operation', 'monitoring'], help='Permission level')
+    grant_parser.add_argument('namespace', help="Target namespace; also comma-separated names and globs, e.g. 'team-a-*'")
+    grant_parser.add_argument('permission', choices=NAMESPACE_PERMISSIONS, help='Permission level')
+    grant_parser.add_argument('--namespace-selector', help='Only namespaces matching this label selector')
+    grant_parser.add_argument('--workers', type=int, default=8, help='Concurrent requests across namespaces (default: 8)')
+    add_expiry_arguments(grant_parser)
 
     revoke_parser = ns_subparsers.add_parser('revoke', help='Revoke namespace permissions')
     revoke_parser.add_argument('username', help='Username')
-    revoke_parser.add_argument('namespace', help='Target namespace')
-    revoke_parser.add_argument('permission', choices=['developer', 'operation', 'monitoring'], help='Permission level')
+    revoke_parser.add_argument('namespace', help="Target namespace; also comma-separated names and globs, e.g. 'team-a-*'")
+    revoke_parser.add_argument('permission', choices=NAMESPACE_PERMISSIONS, help='Permission level')
+    revoke_parser.add_argument('-y', '--yes', action='store_true', help='Do not ask for confirmation')
+    revoke_parser.add_argument('--namespace-selector', help='Only namespaces matching this label selector')
+    revoke_parser.add_argument('--workers', type=int, default=8, help='Concurrent requests across namespaces (default: 8)')
 
     print_parser = ns_subparsers.add_parser('print', help='Print kubeconfig')
-    print_parser.add_argument('username', help='Username')
-    print_parser.add_argument('namespace', help='Target namespace')
+    print_parser.add_argument('username', help='Username (comma-separated for several users)')
+    print_parser.add_argument('namespace', nargs='?', help='Target namespace (comma-separated for several namespaces)')
     print_parser.add_argument('--output', choices=['std', 'telegram'], default='std', help='Output method (default: std)')
+    print_parser.add_argument('--all-bound', action='store_true', help='Add a context for every namespace the user is bound in')
+    print_parser.add_argument('--workers', type=int, default=8, help='Users processed concurrently (default: 8)')
+    print_parser.add_argument('--token-mode', choices=['secret', 'request'],
+                              help="'secret' uses the long-lived token Secret, 'request' mints a short-lived token "
+                                   "with the TokenRequest API (default: $PMCTL_TOKEN_MODE or secret)")
+    print_parser.add_argument('--token-audience',
+                              help="Audiences of a requested token, comma-separated "
+                                   "(default: $PMCTL_TOKEN_AUDIENCE, else the API server's)")
+    print_parser.add_argument('--token-duration',
+                              help='Lifetime of a requested token, e.g. 1h or 7d (default: $PMCTL_TOKEN_DURATION or 8h)')
 
     # Cluster permission commands
     cluster_parser = subparsers.add_parser('cluster', help='Cluster permission management')
@@ -493,44 +4202,345 @@ def main():
 
     cluster_grant_parser = cluster_subparsers.add_parser('grant', help='Grant cluster permissions')
     cluster_grant_parser.add_argument('username', help='Username')
-    cluster_grant_parser.add_argument('permission', choices=['read-only', 'admin'], help='Permission level')
+    cluster_grant_parser.add_argument('permission', choices=CLUSTER_PERMISSIONS, help='Permission level')
+    add_expiry_arguments(cluster_grant_parser)
 
     cluster_revoke_parser = cluster_subparsers.add_parser('revoke', help='Revoke cluster permissions')
     cluster_revoke_parser.add_argument('username', help='Username')
-    cluster_revoke_parser.add_argument('permission', choices=['read-only', 'admin'], help='Permission level')
+    cluster_revoke_parser.add_argument('permission', choices=CLUSTER_PERMISSIONS, help='Permission level')
+    cluster_revoke_parser.add_argument('-y', '--yes', action='store_true', help='Do not ask for confirmation')
 
-    # Parse arguments
-    args = parser.parse_args()
+    # Migration commands
+    migrate_parser = subparsers.add_parser('migrate', help='One-shot migrations')
+    migrate_subparsers = migrate_parser.add_subparsers(dest='migrate_command')
 
-    # Initialize the permission manager
-    manager = KubernetesPermissionManager()
+    migrate_labels_parser = migrate_subparsers.add_parser('labels', help='Backfill pmctl labels on existing bindings')
+    migrate_labels_parser.add_argument('--workers', type=int, default=8, help='Concurrent PATCH requests (default: 8)')
+    migrate_labels_parser.add_argument('--dry-run', action='store_true', help='Only show the bindings that would be labelled')
 
-    # Execute the appropriate command
+    # Declarative access management
+    apply_parser = subparsers.add_parser('apply', help='Reconcile access with a declarative YAML matrix')
+    apply_parser.add_argument('-f', '--file', required=True, help="Access matrix file ('-' for stdin)")
+    apply_parser.add_argument('--dry-run', action='store_true', help='Show the planned changes without applying them')
+    apply_parser.add_argument('--diff', action='store_true', help='Print the planned changes as a diff (exit code 1 if there are changes)')
+    apply_parser.add_argument('--prune', action='store_true', help='Also remove users and managed bindings missing from the file')
+    apply_parser.add_argument('--workers', type=int, default=8, help='Maximum concurrent API requests (default: 8)')
+
+    # Access report
+    report_parser = subparsers.add_parser('report', help='Stream the access matrix of all users')
+    report_parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help='Output format (default: csv)')
+    report_parser.add_argument('--user', help='Only these users (comma-separated)')
+    report_parser.add_argument('--namespace', help='Only these namespaces (comma-separated); excludes cluster grants')
+    report_parser.add_argument('--permission', help='Only these permissions (comma-separated)')
+
+    # Local permission checks
+    can_parser = subparsers.add_parser('can', help='Check whether a user may do something, evaluated locally')
+    can_parser.add_argument('username', nargs='?', help='Username')
+    can_parser.add_argument('verb', nargs='?', help='API verb, e.g. get, list, create, delete')
+    can_parser.add_argument('resource', nargs='?',
+                            help="Resource, e.g. 'pods', 'deployments.apps', 'pods/log', or a URL such as '/metrics'")
+    can_parser.add_argument('namespace', nargs='?', help='Namespace (default: cluster-wide)')
+    can_parser.add_argument('--name', help='Name of the object, for rules limited to resourceNames')
+    can_parser.add_argument('-f', '--file', help="Queries, one per line: 'user verb resource [namespace]' or a "
+                                                 "JSON object ('-' for stdin)")
+    can_parser.add_argument('--why', action='store_true', help='Show the binding and role allowing each request')
+    can_parser.add_argument('--verify', type=int, default=0, metavar='N',
+                            help='Cross-check N sampled answers with SubjectAccessReview')
+    can_parser.add_argument('--format', choices=['text', 'json'], default='text', help='Output format (default: text)')
+
+    # Expiry controller
+    expire_parser = subparsers.add_parser('expire', help='Revoke time-bound grants when they expire')
+    expire_parser.add_argument('--once', action='store_true', help='Revoke the grants that have already expired and exit')
+    expire_parser.add_argument('--dry-run', action='store_true', help='Only show what would be revoked')
+    expire_parser.add_argument('--workers', type=int, default=8, help='Concurrent deletions (default: 8)')
+
+    # Daemon metrics
+    subparsers.add_parser('metrics', help="Print the daemon's API and command latency histograms (OpenMetrics)")
+
+    # Batch commands
+    batch_parser = subparsers.add_parser('batch', help='Run many operations from a file or stdin')
+    batch_parser.add_argument('-f', '--file', default='-', help='NDJSON file with one operation per line (default: stdin)')
+    batch_parser.add_argument('--workers', type=int, default=8, help='Maximum concurrent operations (default: 8)')
+    batch_parser.add_argument('--format', choices=['text', 'json'], default='text', help='Result format (default: text)')
+
+    # Resident daemon
+    serve_parser = subparsers.add_parser('serve', help='Run the resident daemon that other pmctl calls forward to')
+    serve_parser.add_argument('--socket', default=os.environ.get('PMCTL_SOCKET', DEFAULT_SOCKET_PATH),
+                              help=f'Unix socket path (default: $PMCTL_SOCKET or {DEFAULT_SOCKET_PATH})')
+
+    return parser
+
+
+def parse_token_arguments(args):
+    """
+    Return the credential options of ns print as keyword arguments. Exits on invalid values.
+    """
+    try:
+        duration = parse_duration(args.token_duration or os.environ.get('PMCTL_TOKEN_DURATION', '8h'))
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if duration < MIN_TOKEN_DURATION:
+        print(f"Error: Token duration must be at least {MIN_TOKEN_DURATION // 60} minutes.")
+        sys.exit(1)
+    return {
+        'token_mode': args.token_mode,
+        'audiences': tuple(split_list(args.token_audience or os.environ.get('PMCTL_TOKEN_AUDIENCE'))),
+        'duration': int(duration),
+    }
+
+
+def parse_expiry_arguments(args):
+    """
+    Return the expiry time requested with --ttl / --until, or None. Exits on invalid values.
+    """
+    try:
+        return grant_expiry(args.ttl, args.until)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+def run_command(manager, args, assume_yes=False):
+    """
+    Execute a parsed pmctl command. Returns False if the command is incomplete.
+
+    Args:
+        manager (KubernetesPermissionManager): Manager to run the command with
+        args (argparse.Namespace): Parsed arguments
+        assume_yes (bool): Skip confirmation prompts
+    """
     if args.command == 'user':
         if args.user_command == 'add':
-            manager.user_add(args.username)
+            manager.user_add(args.username, args.timeout, args.token_secret)
         elif args.user_command == 'remove':
-            manager.user_remove(args.username)
+            manager.user_remove(args.username, args.cascade, assume_yes or args.yes, args.dry_run, args.workers)
         elif args.user_command in ['list', 'ls']:
-            manager.user_list()
+            manager.user_list(args.selector, args.prefix, args.output, args.with_permissions)
         elif args.user_command == 'describe':
             manager.user_describe(args.username)
 
     elif args.command == 'ns':
         if args.ns_command == 'grant':
-            manager.ns_grant(args.username, args.namespace, args.permission)
+            manager.ns_grant(args.username, args.namespace, args.permission, args.namespace_selector, args.workers,
+                             parse_expiry_arguments(args))
         elif args.ns_command == 'revoke':
-            manager.ns_revoke(args.username, args.namespace, args.permission)
+            manager.ns_revoke(args.username, args.namespace, args.permission, assume_yes or args.yes,
+                              args.namespace_selector, args.workers)
         elif args.ns_command == 'print':
-            manager.ns_print(args.username, args.namespace, args.output)
+            manager.ns_print(args.username, args.namespace, args.output, args.all_bound, args.workers,
+                             **parse_token_arguments(args))
 
     elif args.command == 'cluster':
         if args.cluster_command == 'grant':
-            manager.cluster_grant(args.username, args.permission)
+            manager.cluster_grant(args.username, args.permission, parse_expiry_arguments(args))
         elif args.cluster_command == 'revoke':
-            manager.cluster_revoke(args.username, args.permission)
+            manager.cluster_revoke(args.username, args.permission, assume_yes or args.yes)
+
+    elif args.command == 'apply':
+        try:
+            desired = load_access_spec(args.file)
+        except (OSError, ValueError) as e:
+            print(f"Error: Invalid access file '{args.file}': {e}")
+            sys.exit(1)
+        manager.apply_access(desired, args.dry_run, args.diff, args.prune, args.workers)
+
+    elif args.command == 'expire':
+        manager.expire(args.once, args.dry_run, args.workers)
+
+    elif args.command == 'can':
+        if args.file:
+            if args.username:
+                print("Error: Give either a query or --file, not both.")
+                sys.exit(1)
+            queries = []
+            try:
+                with (nullcontext(sys.stdin) if args.file == '-' else open(args.file, 'r')) as f:
+                    for number, line in enumerate(f, 1):
+                        try:
+                            query = parse_can_query(line)
+                        except ValueError as e:
+                            print(f"Error: {args.file}:{number}: {e}")
+                            sys.exit(1)
+                        if query:
+                            queries.append(query)
+            except OSError as e:
+                print(f"Error: Cannot read '{args.file}': {e}")
+                sys.exit(1)
+            manager.can(queries, args.why, args.verify, args.format)
+        elif args.resource:
+            manager.can([(args.username, args.verb, args.resource, args.namespace, args.name)],
+                        args.why, args.verify, args.format, single=True)
+        else:
+            print("Error: Give a query (user verb resource [namespace]) or --file.")
+            sys.exit(1)
+
+    elif args.command == 'metrics':
+        if not manager.tracer:
+            print("Error: Metrics are only recorded by the pmctl daemon or with --profile.")
+            sys.exit(1)
+        sys.stdout.write(manager.tracer.render('openmetrics'))
+
+    elif args.command == 'report':
+        manager.report(split_list(args.user), split_list(args.namespace), split_list(args.permission), args.format)
+
+    elif args.command == 'migrate':
+        if args.migrate_command == 'labels':
+            manager.migrate_labels(args.workers, args.dry_run)
 
     else:
+        return False
+    return True
+
+
+def run_multi_cluster(targets, parser, args, argv, tracer=None):
+    """
+    Run one command against several clusters concurrently.
+
+    Every cluster gets its own manager and connection pool. Output of each
+    cluster is printed as a block, in target order, with every line prefixed
+    by '[<cluster>] '. `report` writes one merged report with a cluster
+    column, and `ns print` one kubeconfig per user covering every cluster
+    where the user holds bindings.
+
+    Args:
+        targets (list): ClusterTarget of each cluster
+        parser (argparse.ArgumentParser): pmctl argument parser
+        args (argparse.Namespace): Parsed arguments
+        argv (list): Command line arguments, without the program name
+        tracer (ApiTracer): Records the API calls when profiling
+
+    Returns:
+        int: The highest exit code of all clusters
+    """
+    def connect(target):
+        try:
+            return KubernetesPermissionManager(getattr(args, 'workers', None), tracer, target), None
+        except Exception as e:
+            return None, str(e)
+
+    # Step 1: Load every cluster's configuration concurrently
+    with CapturingExecutor(max_workers=len(targets)) as executor:
+        connected = list(executor.map(connect, targets))
+    exit_code = 0
+    managers = []
+    for target, (manager, error) in zip(targets, connected):
+        if error:
+            print(f"[{target.name}] Error: Cannot load cluster configuration: {error}", file=sys.stderr)
+            exit_code = 1
+        else:
+            managers.append(manager)
+    if not managers:
+        return exit_code
+
+    def guarded(function, manager):
+        try:
+            function(manager)
+            return 0
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else 1
+        except Exception as e:
+            print(f"[{manager.cluster_name}] Error: {e}", file=sys.stderr)
+            return 1
+
+    # Step 2: Commands with merged output
+    if args.command == 'report':
+        writer = AccessReportWriter(sys.stdout, args.format, with_cluster=True)
+        usernames, namespaces, permissions = split_list(args.user), split_list(args.namespace), split_list(args.permission)
+
+        def report(manager):
+            manager.report(usernames, namespaces, permissions, args.format, writer, manager.cluster_name)
+
+        with CapturingExecutor(max_workers=len(managers)) as executor:
+            codes = list(executor.map(lambda manager: guarded(report, manager), managers))
+        return max([exit_code] + codes)
+
+    if args.command == 'ns' and args.ns_command == 'print':
+        code = guarded(lambda manager: manager.ns_print(args.username, args.namespace, args.output,
+                                                         args.all_bound, args.workers, clusters=managers,
+                                                         **parse_token_arguments(args)),
+                       managers[0])
+        return max(exit_code, code)
+
+    # Step 3: Everything else runs per cluster; destructive commands are confirmed once for all clusters
+    assume_yes = False
+    if getattr(args, 'yes', None) is False:
+        names = ', '.join(manager.cluster_name for manager in managers)
+        confirm = ask(f"Run '{' '.join(argv)}' on {len(managers)} cluster(s) ({names})? (y/N): ")
+        if confirm.lower() != 'y':
+            print("Operation cancelled.")
+            return exit_code
+        assume_yes = True
+
+    def run(manager):
+        output = StringIO()
+        return run_captured(manager, parser, argv, output, assume_yes=assume_yes), output.getvalue()
+
+    with CapturingExecutor(max_workers=len(managers)) as executor:
+        results = list(executor.map(run, managers))
+    for manager, (code, output) in zip(managers, results):
+        for line in output.splitlines():
+            print(f"[{manager.cluster_name}] {line}")
+        exit_code = max(exit_code, code)
+    return exit_code
+
+
+def main():
+    parser = build_parser()
+
+    # Parse arguments
+    args = parser.parse_args()
+
+    # --profile[-format|-file] or PMCTL_TRACE=<format>[:<path>]
+    trace = os.environ.get('PMCTL_TRACE')
+    if args.profile or args.profile_format or args.profile_file:
+        trace = f"{args.profile_format or 'table'}:{args.profile_file or ''}"
+
+    # Multi-cluster mode: --clusters / --cluster-registry
+    targets = None
+    if args.command and (args.clusters or args.cluster_registry):
+        if args.command in ('serve', 'batch', 'metrics') or (args.command == 'expire' and not args.once):
+            print(f"Error: '{args.command}' does not support multi-cluster mode" +
+                  (" (use 'expire --once')." if args.command == 'expire' else "."))
+            sys.exit(1)
+        try:
+            targets = resolve_cluster_targets(args.clusters, args.cluster_registry)
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+    # Forward to the resident daemon when one is running (profiles are taken in-process).
+    # Commands that read a file or stdin run in-process: the daemon has neither
+    reads_input = args.command == 'can' and args.file
+    if args.command not in (None, 'serve', 'batch', 'apply', 'expire') and not reads_input and not targets \
+            and not trace and not os.environ.get('PMCTL_NO_DAEMON'):
+        exit_code = forward_to_daemon(sys.argv[1:], os.environ.get('PMCTL_SOCKET', DEFAULT_SOCKET_PATH))
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    # The daemon always keeps latency histograms for `pmctl metrics`
+    tracer = None
+    if trace or args.command == 'serve':
+        tracer = ApiTracer(keep_events=bool(trace))
+        if trace:
+            atexit.register(tracer.write, *parse_trace_setting(trace))
+
+    if targets:
+        sys.exit(run_multi_cluster(targets, parser, args, sys.argv[1:], tracer))
+
+    # Initialize the permission manager
+    manager = KubernetesPermissionManager(pool_size=getattr(args, 'workers', None), tracer=tracer)
+
+    # Execute the appropriate command
+    if args.command == 'serve':
+        serve(manager, parser, args.socket)
+    elif args.command == 'batch':
+        if args.file == '-':
+            run_batch(manager, parser, sys.stdin, args.workers, args.format)
+        else:
+            with open(args.file, 'r') as f:
+                run_batch(manager, parser, f, args.workers, args.format)
+    elif not run_command(manager, args):
         parser.print_help()
         sys.exit(1)
 